@@ -0,0 +1,409 @@
+import sys
+import os
+import shutil
+import socket
+import signal
+import argparse
+import contextlib
+
+from fluxminator.Model import Model
+from fluxminator.Batch import BatchSession, BatchEngine
+from fluxminator.Refinement import refine_parameter_table
+from fluxminator.Optimizer import BayesianOptimizer
+from fluxminator.MetricsStore import MetricsStore
+from fluxminator.Constants import *
+
+
+def parse_arguments(argv=None):
+    """ Command line of the batch mode (same settings as the main GUI, without Qt) """
+
+    parser = argparse.ArgumentParser(
+        description="Run a Fluxminator sweep without the GUI. The progress is written to the standard output as JSON "
+                    "lines, the messages of the execution to the standard error.")
+
+    parser.add_argument("model", help="path of the .FLU model")
+    parser.add_argument("--session", choices=["new", "continue", "summary"], default="new",
+                        help="new sweep, continue the sweep in the Results folder, or create only the summary files")
+    parser.add_argument("--sets", help="parameter set file, copied to Results/Sets.xlsx (new session)")
+    parser.add_argument("--project-info", help="take the scenario settings from this Project_Info.xlsx (new session)")
+    parser.add_argument("--export-summary", action="store_true",
+                        help="only generate Results/Summary.xlsx from the metrics store (Results/" + METRICS_STORE_FILE
+                             + ") of the project")
+
+    # Motor & scenario settings (new session):
+    parser.add_argument("--slots", type=int, default=0, help="slot number of the motor")
+    parser.add_argument("--poles", type=int, default=0, help="pole number of the motor")
+    parser.add_argument("--cogging", type=float, nargs=3, metavar=("MIN", "MAX", "STEP"),
+                        help="rotor positions of the cogging scenario")
+    parser.add_argument("--ripple", type=float, nargs=3, metavar=("MIN", "MAX", "STEP"),
+                        help="rotor positions of the ripple scenario")
+    parser.add_argument("--current", type=float, nargs=3, metavar=("MIN", "MAX", "STEP"), default=[0, 0, 0],
+                        help="current variation of the ripple scenario")
+    parser.add_argument("--gamma", type=float, nargs=3, metavar=("MIN", "MAX", "STEP"), default=[0, 0, 0],
+                        help="gamma variation of the ripple scenario")
+    parser.add_argument("--gamma-dependency", action="store_true", help="create the gamma vs ripple sheet")
+    parser.add_argument("--load-dependency", action="store_true", help="create the load vs ripple sheet")
+    parser.add_argument("--gamma-name", default="", help="name of the gamma parameter in Flux")
+    parser.add_argument("--current-name", default="", help="name of the current parameter in Flux")
+    parser.add_argument("--current-source-name", default="", help="name of the current source in Flux")
+    parser.add_argument("--delete-results", action="store_true", help="delete the scenario solutions in Flux")
+
+    # Execution settings:
+    parser.add_argument("--flux-path", help="Flux installation directory (default: " + FLUX_PATH_INFO_FILE + ")")
+    parser.add_argument("--flux-exe", help="executable called instead of Flux (e.g. flux_standin.py for benchmarks)")
+    parser.add_argument("--workers", type=int, default=1, help="number of parallel Flux workers")
+    parser.add_argument("--parse-processes", type=int, default=1,
+                        help="number of processes parsing the ripple result files in parallel")
+    parser.add_argument("--pipelined", action="store_true", help="process the results during the next simulation")
+    parser.add_argument("--checkpoint-rows", type=int, default=SUMMARY_CHECKPOINT_ROWS,
+                        help="generate Summary.xlsx after this many rows (in the background), 0: only at the end")
+    parser.add_argument("--checkpoint-time", type=int, default=SUMMARY_CHECKPOINT_TIME,
+                        help="generate Summary.xlsx after this much time [s] (in the background), 0: only at the end")
+    parser.add_argument("--timeout", type=int, default=0, help="time limit of one simulation [min], 0: no limit")
+    parser.add_argument("--cache", nargs="?", const=SIMULATION_CACHE_DIRECTORY, metavar="DIRECTORY",
+                        help="reuse the raw result files of identical simulations from the cache (default directory: "
+                             + SIMULATION_CACHE_DIRECTORY + ")")
+    parser.add_argument("--waveform-store", action="store_true",
+                        help="keep the waveforms of every row in memory-mapped arrays (Results/"
+                             + WAVEFORM_DIRECTORY + ")")
+
+    # Surrogate model (skip the rows predicted outside the region of interest):
+    parser.add_argument("--surrogate", nargs=3, action="append", metavar=("METRIC", "MIN", "MAX"),
+                        help="region of interest of a metric (" + ", ".join(sorted(REFINE_METRICS)) +
+                             "), '-': no limit; repeat for more metrics")
+    parser.add_argument("--surrogate-confidence", type=float, default=SURROGATE_CONFIDENCE,
+                        help="skip a row if its prediction is this many standard deviations outside the region")
+
+    # Adaptive grid refinement (before continuing the session):
+    parser.add_argument("--refine", choices=sorted(REFINE_METRICS), metavar="METRIC",
+                        help="append refined rows to Sets.xlsx based on a metric of Summary.xlsx (" +
+                             ", ".join(sorted(REFINE_METRICS)) + "), then run them")
+    parser.add_argument("--refine-rows", type=int, default=20, help="maximum number of refined rows")
+    parser.add_argument("--refine-mode", choices=[REFINE_GRADIENT, REFINE_MINIMUM, REFINE_BOTH], default=REFINE_BOTH,
+                        help="refine where the metric changes fastest, around its minimum, or both")
+    parser.add_argument("--refine-load", type=int, default=1, help="load index of the load dependent metrics")
+    parser.add_argument("--refine-maximum", action="store_true", help="refine around the maximum of the metric")
+
+    # Closed-loop optimization (the rows of Sets.xlsx are the initial design, the optimizer proposes the others):
+    parser.add_argument("--optimize", choices=sorted(REFINE_METRICS), metavar="METRIC",
+                        help="minimize a metric of Summary.xlsx (" + ", ".join(sorted(REFINE_METRICS)) +
+                             ") within the parameter ranges of Sets.xlsx")
+    parser.add_argument("--optimize-maximum", action="store_true", help="maximize the metric")
+    parser.add_argument("--optimize-bound", nargs=3, action="append", metavar=("METRIC", "MIN", "MAX"),
+                        help="bounds of another metric (e.g. t_mean 5 -), '-': no limit; repeat for more metrics")
+    parser.add_argument("--optimize-runs", type=int, default=30, help="total number of simulated rows")
+    parser.add_argument("--optimize-batch", type=int, default=0,
+                        help="rows proposed at once (default: the number of workers)")
+    parser.add_argument("--optimize-load", type=int, default=1,
+                        help="load index of the load dependent metrics (e.g. the rated current)")
+
+    # Multi-node execution (the first node starts a new session, the others continue it):
+    parser.add_argument("--distributed", action="store_true",
+                        help="share the rows with other nodes through the Results folder (existing raw result files "
+                             "count as simulated), then one of the nodes merges the results into Summary.xlsx")
+    parser.add_argument("--node", default=socket.gethostname() + "_" + str(os.getpid()),
+                        help="name of this node (default: host name and process ID)")
+
+    return parser, parser.parse_args(argv)
+
+
+def set_up_model(model, arguments):
+    """ Update the model based on the command line; return an error message or None """
+
+    model_path = os.path.abspath(arguments.model).replace('\\', '/').rstrip('/')
+
+    if model_path[-4:] != '.FLU' or not os.path.exists(model_path):
+        return "Flux model path is invalid!"
+
+    path_data = model_path.rsplit('/', 1)
+    results_path = path_data[0] + "/Results"
+
+    model.fluxModel.set_modelPath(path_data[0])
+    model.fluxModel.set_modelName(path_data[1])
+
+    # The merging node replaces the memory-mapped files of the store, the other nodes mustn't have them open:
+    if arguments.waveform_store and arguments.distributed:
+        return "The waveform store can't be used in the distributed execution!"
+
+    model.set_sessionNew(arguments.session == "new")
+    model.set_sessionOld(arguments.session == "continue")
+    model.set_sessionSummary(arguments.session == "summary")
+
+    model.set_workerNumber(max(1, min(arguments.workers, MAX_WORKER_NUMBER)))
+    model.set_parserProcessNumber(max(1, min(arguments.parse_processes, MAX_PARSER_PROCESS_NUMBER)))
+    model.set_pipelinedExecution(arguments.pipelined)
+    model.set_checkpointRows(max(0, arguments.checkpoint_rows))
+    model.set_checkpointTime(max(0, arguments.checkpoint_time))
+    model.set_simulationTimeout(arguments.timeout)
+    if arguments.flux_exe is not None:
+        model.set_fluxExecutable(os.path.abspath(arguments.flux_exe))
+    model.set_waveformStore(arguments.waveform_store)
+    model.set_distributedExecution(arguments.distributed)
+    model.set_nodeName(arguments.node)
+
+    if arguments.cache is not None:
+        model.set_simulationCache(True)
+        model.set_cacheDirectory(os.path.abspath(arguments.cache))
+
+    if arguments.surrogate is not None:
+        bounds, error = parse_metric_bounds(arguments.surrogate)
+        if error is not None:
+            return error
+        model.set_surrogateBounds(bounds)
+        model.set_surrogateConfidence(arguments.surrogate_confidence)
+
+    if not os.path.exists(results_path):
+        os.makedirs(results_path)
+
+    if arguments.session == "new":
+        if arguments.sets is not None and os.path.abspath(arguments.sets) != os.path.abspath(results_path + "/Sets.xlsx"):
+            shutil.copy(arguments.sets, results_path + "/Sets.xlsx")
+        if arguments.project_info is not None:
+            shutil.copy(arguments.project_info, results_path + "/Project_Info.xlsx")
+
+    if not os.path.exists(results_path + "/Sets.xlsx"):
+        return "Results/Sets.xlsx file does not exist!"
+
+    # To continue the simulations (or to take over the settings), the Project_Info file is necessary:
+    if arguments.session != "new" or arguments.project_info is not None:
+        try:
+            model.read_project_info_file()
+        except (IOError, AttributeError, ValueError):
+            return "Problem with Results/Project_Info.xlsx file!"
+        return None
+
+    model.fluxModel.motor.set_parameterSetExcelPath(results_path + "/Sets.xlsx")
+    model.fluxModel.motor.set_numberSlot(arguments.slots)
+    model.fluxModel.motor.set_numberPole(arguments.poles)
+
+    model.set_scenarioCogging(arguments.cogging is not None)
+    model.set_scenarioRipple(arguments.ripple is not None)
+
+    for range_, values in [[model.fluxModel.positionCogging, arguments.cogging],
+                           [model.fluxModel.positionRipple, arguments.ripple],
+                           [model.fluxModel.rangeCurrent, arguments.current],
+                           [model.fluxModel.rangeGamma, arguments.gamma]]:
+        if values is not None:
+            range_.set_min(values[0])
+            range_.set_max(values[1])
+            range_.set_step(values[2])
+
+    model.set_dependencyGamma(arguments.gamma_dependency)
+    model.set_dependencyLoad(arguments.load_dependency)
+
+    model.fluxModel.set_nameGamma(arguments.gamma_name)
+    model.fluxModel.set_nameCurrent(arguments.current_name)
+    model.fluxModel.set_nameCurrentSource(arguments.current_source_name)
+
+    model.set_deleteScenarioSolutions(arguments.delete_results)
+
+    error = check_scenario_parameters(model)
+    if error is not None:
+        return error
+
+    try:
+        model.create_info_files()
+    except IOError:
+        return "There is a problem with the Project_Info file."
+
+    return None
+
+
+def export_summary(model_path):
+    """ Generate Summary.xlsx from the metrics store of the project; return an error message or None """
+
+    results_path = os.path.dirname(os.path.abspath(model_path)) + "/Results"
+
+    metrics_store = MetricsStore(results_path)
+    if not metrics_store.exists():
+        return "Results/" + METRICS_STORE_FILE + " file does not exist!"
+
+    try:
+        metrics_store.export(results_path + "/Summary.xlsx")
+    except IOError:
+        return "Something went wrong during saving the summary file. Close the 'Summary.xlsx' file if its open!"
+
+    return None
+
+
+def parse_metric_bounds(metric_bounds):
+    """ Bounds of the metrics from the command line ([METRIC, MIN, MAX] lists); return the bounds (key=metric;
+    value=[min, max], None: no limit) and an error message or None """
+
+    bounds = {}
+    for metric, lower, upper in metric_bounds:
+        if metric not in REFINE_METRICS:
+            return None, "Unknown metric: " + metric
+
+        try:
+            bounds[metric] = [None if lower == "-" else float(lower), None if upper == "-" else float(upper)]
+        except ValueError:
+            return None, "Invalid bounds of the metric: " + metric
+
+    return bounds, None
+
+
+def check_scenario_parameters(model):
+    """ Check the motor and the scenario parameters of a new session (see the checks of the Presenter) """
+
+    if model.fluxModel.motor.get_numberSlot() == 0:
+        return "Slot number can't be zero!"
+
+    if model.fluxModel.motor.get_numberPole() == 0:
+        return "Pole number can't be zero!"
+
+    if not model.is_scenarioCogging() and not model.is_scenarioRipple():
+        return "You have to choose at least one scenario!"
+
+    if model.is_scenarioCogging():
+        if not model.fluxModel.positionCogging.is_valid_range() or model.fluxModel.positionCogging.get_step() == 0:
+            return "Invalid rotor position values for cogging scenario!"
+
+    if model.is_scenarioRipple():
+        if not model.fluxModel.positionRipple.is_valid_range() or model.fluxModel.positionRipple.get_step() == 0:
+            return "Invalid rotor position values for ripple scenario!"
+
+        if not model.fluxModel.rangeGamma.is_valid_range():
+            return "Invalid gamma values for ripple scenario!"
+
+        if not model.fluxModel.rangeCurrent.is_valid_range() or model.fluxModel.rangeCurrent.get_max() == 0:
+            return "Invalid current values for ripple scenario!"
+
+        if model.is_dependencyGamma() and model.fluxModel.rangeGamma.get_step() == 0:
+            return "Gamma dependency sheet has been requested, but there is only one variation of gamma!"
+
+        if model.is_dependencyLoad() and model.fluxModel.rangeCurrent.get_step() == 0:
+            return "Load dependency sheet has been requested, but there is only one variation of current!"
+
+    if model.fluxModel.get_nameGamma() == "":
+        return "'Gamma name' is missing!"
+
+    if model.fluxModel.get_nameCurrent() == "":
+        return "'Current name' is missing!"
+
+    if model.fluxModel.get_nameCurrentSource() == "":
+        return "'Current source name' is missing!"
+
+    return None
+
+
+def refine(model, arguments):
+    """ Append the refined rows of the finished sweep to Sets.xlsx as a new batch; return an error message or None """
+
+    if model.is_sessionNew():
+        return "The refinement needs the results of an existing project (--session continue)!"
+
+    summary_path = model.fluxModel.get_modelPath() + "/Results/Summary.xlsx"
+    if not os.path.exists(summary_path):
+        return "Results/Summary.xlsx file does not exist!"
+
+    try:
+        new_rows = refine_parameter_table(summary_path, model.fluxModel.motor.get_parameterSetExcelPath(),
+                                          arguments.refine, arguments.refine_rows, arguments.refine_mode,
+                                          arguments.refine_load, arguments.refine_maximum,
+                                          {CONSTRAINT_SLOT_NUMBER: model.fluxModel.motor.get_numberSlot(),
+                                           CONSTRAINT_POLE_NUMBER: model.fluxModel.motor.get_numberPole()})
+    except IOError:
+        return "Something went wrong during saving the parameter sets file. Close the 'Sets.xlsx' file if its open!"
+
+    print("Refined rows added to Sets.xlsx:", len(new_rows), file=sys.stderr)
+
+    return None
+
+
+def create_optimizer(model, arguments):
+    """ Optimizer over the parameter ranges (and constraints) of Sets.xlsx; return the optimizer and an error message
+    or None """
+
+    if model.is_sessionSummary() or model.is_distributedExecution():
+        return None, "The optimization needs a new or a continued session on a single node!"
+
+    bounds, error = parse_metric_bounds(arguments.optimize_bound or [])
+    if error is not None:
+        return None, error
+
+    motor = model.fluxModel.motor
+    try:
+        motor.read_parameter_table_excel(motor.get_parameterSetExcelPath())
+    except (IOError, TypeError, ValueError):
+        return None, "Problem with the parameter ranges of Results/Sets.xlsx!"
+
+    optimizer = BayesianOptimizer(motor.get_parameters(), arguments.optimize, bounds, arguments.optimize_maximum,
+                                  arguments.optimize_load,
+                                  motor.feasible_rows if len(motor.get_constraints()) > 0 else None)
+
+    return optimizer, None
+
+
+def read_flux_application_path(arguments):
+    """ Flux installation directory from the command line or from the path information file of the GUI """
+
+    if arguments.flux_path is not None:
+        return arguments.flux_path
+
+    if not os.path.exists(FLUX_PATH_INFO_FILE):
+        return ""
+
+    flux_application_path_file = open(FLUX_PATH_INFO_FILE, 'r')
+    flux_application_path = flux_application_path_file.readline().strip()
+    flux_application_path_file.close()
+
+    return flux_application_path
+
+
+def main(argv=None):
+
+    parser, arguments = parse_arguments(argv)
+
+    if arguments.export_summary:
+        error = export_summary(arguments.model)
+        if error is not None:
+            parser.error(error)
+        return 0
+
+    model = Model()
+
+    error = set_up_model(model, arguments)
+    if error is not None:
+        parser.error(error)
+
+    if arguments.refine is not None:
+        error = refine(model, arguments)
+        if error is not None:
+            parser.error(error)
+
+    optimizer = None
+    if arguments.optimize is not None:
+        optimizer, error = create_optimizer(model, arguments)
+        if error is not None:
+            parser.error(error)
+
+    flux_application_path = read_flux_application_path(arguments)
+    if arguments.flux_exe is not None:
+        if not os.path.exists(model.get_fluxExecutable()):
+            parser.error("Flux executable path is invalid!")
+    elif not model.is_sessionSummary() and not os.path.exists(flux_application_path + FLUX_EXE_PATH):
+        parser.error("Flux application path is invalid!")
+
+    # The JSON lines go to the standard output, the messages of the Runner to the standard error:
+    session = BatchSession(model, flux_application_path, BatchEngine(sys.stdout))
+
+    # CTRL+C: stop at the end of the current simulation (like the STOP button); the next one interrupts
+    def stop(signal_number, frame):
+        session.stop()
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+
+    signal.signal(signal.SIGINT, stop)
+
+    with contextlib.redirect_stdout(sys.stderr):
+        if optimizer is not None:
+            execution_result = session.optimize(optimizer, arguments.optimize_runs,
+                                                arguments.optimize_batch or model.get_workerNumber())
+        else:
+            execution_result = session.run()
+
+    return 0 if execution_result == EXECUTION_DONE else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
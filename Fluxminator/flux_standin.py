@@ -0,0 +1,27 @@
+import os
+import sys
+
+from fluxminator.StandIn import FluxStandIn
+from fluxminator.Constants import *
+
+
+def main():
+    """ Stand-in for the Flux executable: called like Flux (flux.exe -runPy <script> -application Flux2D -batch) in
+    the directory of the channel file, it writes synthetic raw result files instead of solving the model.
+    Configuration: FLUX_STANDIN_LATENCY [s per scenario step], FLUX_STANDIN_WAVEFORM_STEPS (minimal number of rotor
+    positions in the result files), FLUX_STANDIN_FAILING_ROWS (IDs of the rows crashing after their first result
+    file) environment variables """
+
+    failing_rows = os.environ.get(STANDIN_FAILING_ROWS_VARIABLE, "")
+
+    stand_in = FluxStandIn(latency=float(os.environ.get(STANDIN_LATENCY_VARIABLE, 0)),
+                           waveform_steps=int(os.environ.get(STANDIN_WAVEFORM_STEPS_VARIABLE, 0)),
+                           failing_rows=[row_id for row_id in failing_rows.split(",") if row_id != ""])
+
+    stand_in.run(os.path.join(os.getcwd(), CHANNEL_FILE_NAME))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,147 @@
+import os
+import sys
+import json
+import time
+
+from fluxminator.Constants import *
+from fluxminator.Runner import Runner
+from fluxminator.Refinement import add_parameter_sets, read_parameter_sets
+
+
+class BatchEngine:
+    """ Execution engine of the batch mode: the progress reported by the Runner is written to the output stream as
+    JSON lines (one object for every report), instead of updating the widgets of the view """
+
+    def __init__(self, stream=None):
+
+        self.stream = stream if stream is not None else sys.stdout
+
+        self.maximum = 0
+
+        # Throttling: each report type is written at most once in every PROGRESS_REPORT_INTERVAL seconds
+        self.lastReportTimes = {"progress": 0, "estimate": 0}
+        self.pendingReports = {}                        # key=report type; value=last reported but not written data
+
+    def report_progress(self, value, maximum=None):
+        """ Report the number of the executed simulations (and the number of all simulations, if it's known) """
+
+        if maximum is not None:
+            self.maximum = maximum
+
+        self._write_throttled("progress", {"value": value, "maximum": self.maximum})
+
+    def report_estimated_time(self, index, sets_number, finish_time):
+        """ Report the index of the actual simulation and the estimated finish time of the execution """
+
+        self._write_throttled("estimate", {"index": index, "sets": sets_number,
+                                           "finish": None if finish_time is None else finish_time.isoformat()})
+
+    def report_finished(self, execution_result, next_simulation_id):
+        """ Report the result of the execution (see Constants) and the upcoming row of Sets.xlsx """
+
+        self.flush()
+        self._write("finished", {"result": execution_result, "done": execution_result == EXECUTION_DONE,
+                                 "next": next_simulation_id})
+
+    def report_optimum(self, parameter_values, objective):
+        """ Report the best simulated row of the optimization (None: no row satisfies the bounds) """
+        self._write("optimum", {"values": parameter_values, "objective": objective})
+
+    def flush(self):
+        """ Write the last reported data even if the throttling interval hasn't elapsed yet """
+
+        for report_type, data in self.pendingReports.items():
+            self._write(report_type, data)
+            self.lastReportTimes[report_type] = time.time()
+
+        self.pendingReports = {}
+
+    def _write_throttled(self, report_type, data):
+
+        if time.time() - self.lastReportTimes[report_type] < PROGRESS_REPORT_INTERVAL:
+            self.pendingReports[report_type] = data
+            return
+
+        self.pendingReports.pop(report_type, None)
+        self.lastReportTimes[report_type] = time.time()
+        self._write(report_type, data)
+
+    def _write(self, report_type, data):
+
+        self.stream.write(json.dumps(dict(event=report_type, **data)) + "\n")
+        self.stream.flush()
+
+
+class BatchSession(Runner):
+    """ Headless counterpart of the Presenter: holds the model, the Flux application path and the batch engine,
+    and drives the same Runner/Result pipeline without Qt """
+
+    def __init__(self, model, flux_application_path, engine=None):
+
+        self.model = model
+        self.flux_application_path = flux_application_path
+
+        self.engine = engine if engine is not None else BatchEngine()
+
+        self.stopRequested = False
+
+    def run(self):
+        """ Execute the simulations (or the summary file creation) in the calling thread; return the execution
+        result (see Constants) """
+
+        # Get gamma values for 2Stack & 3Stack:
+        self.model.fluxModel.read_skewing_file()
+
+        self.model.set_executionInProgress(True)
+
+        execution_result = BatchSession._run(self)
+
+        self.model.set_executionInProgress(False)
+        self.engine.report_finished(execution_result, self.model.get_simulationID())
+
+        return execution_result
+
+    def optimize(self, optimizer, run_number, batch_size):
+        """ Closed loop: simulate the rows of Sets.xlsx, train the optimizer on the summary file, append the rows it
+        proposes to Sets.xlsx and continue the session with them, until run_number rows have been simulated; return
+        the execution result of the last session """
+
+        sets_path = self.model.fluxModel.motor.get_parameterSetExcelPath()
+        summary_path = self.model.fluxModel.get_modelPath() + "/Results/Summary.xlsx"
+
+        execution_result = self.run()
+
+        while execution_result == EXECUTION_DONE and not self.stopRequested:
+
+            existing_rows = read_parameter_sets(sets_path)
+            if len(existing_rows) >= run_number:
+                break
+
+            if os.path.exists(summary_path):
+                optimizer.train(summary_path)
+
+            new_rows = optimizer.ask(min(batch_size, run_number - len(existing_rows)), existing_rows)
+            if len(new_rows) == 0:                                  # every row of the grid has been simulated
+                break
+
+            try:
+                add_parameter_sets(sets_path, new_rows)
+            except IOError:
+                return RESULT_FILE_IO_ERROR
+
+            # The new rows are simulated in the continued session:
+            self.model.set_sessionNew(False)
+            self.model.set_sessionOld(True)
+
+            execution_result = self.run()
+
+        if os.path.exists(summary_path):
+            optimizer.train(summary_path)
+        self.engine.report_optimum(*optimizer.best())
+
+        return execution_result
+
+    def stop(self):
+        """ Stop the execution at the end of the current simulation """
+        self.stopRequested = True
+        self.model.set_executionInProgress(False)
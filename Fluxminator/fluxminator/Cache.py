@@ -0,0 +1,101 @@
+import os
+import glob
+import shutil
+import hashlib
+
+from fluxminator.Constants import *
+
+
+class SimulationCache:
+    """ Content-addressed store of the raw result files, shared across projects. The key of a simulation is the hash
+    of the Flux model and of the lines of its channel data which determine the raw result files: the scenario
+    settings, the parameter names, the formatted parameter values and the current source. The project specific lines
+    (model path & name, row ID), the deletion of the scenario solutions in Flux and the data of the price calculation
+    aren't part of the key. Only simulations whose raw result files have been processed successfully are stored. """
+
+    SCENARIO_LINES = slice(3, 12)           # lines of the channel data: scenario ... parameter values
+    CURRENT_SOURCE_LINES = slice(13, 14)    # after the line of the deletion flag
+
+    def __init__(self, cache_path, model_path, model_name):
+
+        self.cachePath = cache_path
+        self.resultsPath = os.path.join(model_path, "Results")
+        self.filePrefix = model_name[:-4] + "_"                     # raw result files: <model>_<id>_<suffix>
+
+        self.modelHash = SimulationCache._hash_model(os.path.join(model_path, model_name))
+
+        if not os.path.exists(cache_path):
+            os.makedirs(cache_path)
+
+    def get_modelHash(self): return self.modelHash
+
+    def key(self, channel_data):
+        """ Return the key of the simulation described by the channel data """
+
+        lines = channel_data.split("\n")
+        scenario_data = "\n".join(lines[SimulationCache.SCENARIO_LINES] + lines[SimulationCache.CURRENT_SOURCE_LINES])
+
+        return hashlib.sha256((self.modelHash + "\n" + scenario_data).encode("utf-8")).hexdigest()
+
+    def fetch(self, channel_data, parameter_values_id):
+        """ Copy the cached raw result files of the simulation into the Results folder with the name of the row;
+        return False if the simulation isn't in the cache """
+
+        entry_path = self._entry_path(self.key(channel_data))
+
+        if not os.path.exists(os.path.join(entry_path, CACHE_COMPLETE_FILE)):
+            return False
+
+        for file in os.listdir(entry_path):
+            if file != CACHE_COMPLETE_FILE:
+                shutil.copy2(os.path.join(entry_path, file),
+                             os.path.join(self.resultsPath, self.filePrefix + parameter_values_id + "_" + file))
+
+        return True
+
+    def store(self, channel_data, parameter_values_id):
+        """ Add the raw result files of the simulation to the cache (the entry is published by renaming a complete
+        temporary folder, so the other processes never see a partial entry) """
+
+        entry_path = self._entry_path(self.key(channel_data))
+        if os.path.exists(entry_path):
+            return
+
+        row_prefix = self.filePrefix + parameter_values_id + "_"
+        files = glob.glob(os.path.join(self.resultsPath, glob.escape(row_prefix) + "*.xls"))
+        if len(files) == 0:
+            return
+
+        temporary_path = entry_path + "." + str(os.getpid()) + ".tmp"
+        os.makedirs(temporary_path)
+
+        for file in files:
+            shutil.copy2(file, os.path.join(temporary_path, os.path.basename(file)[len(row_prefix):]))
+        open(os.path.join(temporary_path, CACHE_COMPLETE_FILE), 'w').close()
+
+        try:
+            os.rename(temporary_path, entry_path)
+        except OSError:                                             # stored by another process in the meantime
+            shutil.rmtree(temporary_path, ignore_errors=True)
+
+    def _entry_path(self, key):
+        return os.path.join(self.cachePath, key[:2], key)
+
+    @staticmethod
+    def _hash_model(model_file):
+        """ Hash the .FLU model (a directory or a single file) by its content """
+
+        model_hash = hashlib.sha256()
+
+        if os.path.isdir(model_file):
+            files = sorted(os.path.join(root, file) for root, _, names in os.walk(model_file) for file in names)
+        else:
+            files = [model_file]
+
+        for file in files:
+            model_hash.update(os.path.relpath(file, model_file).replace('\\', '/').encode("utf-8"))
+            with open(file, 'rb') as model_part:
+                for block in iter(lambda: model_part.read(1024 ** 2), b""):
+                    model_hash.update(block)
+
+        return model_hash.hexdigest()
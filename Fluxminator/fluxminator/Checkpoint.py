@@ -0,0 +1,80 @@
+import time
+import sqlite3
+import threading
+
+
+class SummaryCheckpointer:
+    """ Generates Summary.xlsx from the metrics store at checkpoints instead of after every row: after a number of rows
+    or after some time, in a background thread, so the next simulation isn't delayed by it. The rows since the last
+    checkpoint are written by close() (stop, error, completion). The rows themselves are safe in the metrics store as
+    soon as they are committed. """
+
+    def __init__(self, metrics_store, summary_path, row_interval, time_interval):
+
+        self.metricsStore = metrics_store
+        self.summaryPath = summary_path
+        self.rowInterval = row_interval         # rows between the checkpoints, 0: no periodic checkpoint
+        self.timeInterval = time_interval       # [s] between the checkpoints, 0: no periodic checkpoint
+
+        self.writer = None                      # thread of the running export
+        self.error = None                       # error of the background export, raised in the runner thread
+
+        self.pendingRows = 0                    # rows finished since the last checkpoint
+        self.finishedRows = 0
+        self.exportedRows = 0                   # finished rows in the last exported file
+        self.checkpointTime = time.monotonic()
+
+    def get_pendingRows(self): return self.pendingRows
+
+    def finish_row(self):
+        """ The row is committed into the metrics store: start the export in the background if a checkpoint is due (a
+        running export isn't waited for, the next checkpoint will include the row); the error of the last export is
+        raised here """
+
+        self.finishedRows += 1
+        self.pendingRows += 1
+
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+        if self.is_due() and (self.writer is None or not self.writer.is_alive()):
+            self.pendingRows = 0
+            self.checkpointTime = time.monotonic()
+
+            self.writer = threading.Thread(target=self._export, args=(self.finishedRows,), daemon=True)
+            self.writer.start()
+
+    def is_due(self):
+
+        if self.rowInterval > 0 and self.pendingRows >= self.rowInterval:
+            return True
+
+        return self.timeInterval > 0 and time.monotonic() - self.checkpointTime >= self.timeInterval
+
+    def close(self, save=True):
+        """ Wait for the running export, then export the rows since the last checkpoint; raise the IOError (or the
+        sqlite3.Error, e.g. the metrics store is locked) of the export """
+
+        if self.writer is not None:
+            self.writer.join()
+            self.writer = None
+
+        self.error = None
+        if save and self.finishedRows != self.exportedRows:
+            self._export(self.finishedRows)
+
+        self.pendingRows = 0
+
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def _export(self, finished_rows):
+
+        try:
+            self.metricsStore.export(self.summaryPath)
+            self.exportedRows = finished_rows
+
+        except (IOError, sqlite3.Error) as error:
+            self.error = error
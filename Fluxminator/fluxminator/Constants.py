@@ -1,12 +1,146 @@
 
-from openpyxl.styles import Color, PatternFill
+from openpyxl.styles import Color, PatternFill, Font, Alignment
 from openpyxl.styles.borders import Border, Side, BORDER_THIN
+from openpyxl.styles.fonts import DEFAULT_FONT
 
 # Altair Flux:
 
 FLUX_PATH_INFO_FILE = "WorkingDirectory/flux_directory.txt"
 FLUX_EXE_PATH = "\\flux\Flux\Bin\prg\win64\\flux.exe"
 PYFLUX_SCRIPT_NAME = "Script_3_0.py"
+CHANNEL_FILE_NAME = "Channel.txt"
+FLUX_START_DELAY = 5                            # [s] before the first simulation of the execution
+
+# Flux stand-in (flux_standin.py instead of the Flux executable, see StandIn):
+STANDIN_LATENCY_VARIABLE = "FLUX_STANDIN_LATENCY"                   # [s] solving time of one scenario step
+STANDIN_WAVEFORM_STEPS_VARIABLE = "FLUX_STANDIN_WAVEFORM_STEPS"     # minimal number of rotor positions
+STANDIN_FAILING_ROWS_VARIABLE = "FLUX_STANDIN_FAILING_ROWS"         # row IDs (comma separated) crashing after one file
+
+# Flux launcher (per-row log files and resource accounting, inside the Results folder):
+
+LOG_DIRECTORY = "Logs"
+SIMULATION_RECORDS_FILE = "Simulation_Records.csv"
+
+# Parsed raw result files (.npy sidecar files in the Parsed folder next to the raw files; the name contains the
+# number of rotor steps, the size [byte] & the modification time [ns] of the raw file):
+
+PARSED_DIRECTORY = "Parsed"
+PARSED_FILE_NAME = "{0}.{1}-{2}-{3}.npy"
+
+# Parameter sets of Sets.xlsx for the execution (IDs & values: .npy sidecar files in the Parsed folder; the name
+# contains the size [byte] & the modification time [ns] of Sets.xlsx):
+
+PARSED_SETS_FILE_NAME = "{0}.{1}-{2}.{3}.npy"
+PARAMETER_SETS_BLOCK_SIZE = 10000               # rows converted at once
+
+# Waveform store (memory-mapped .npy arrays of the waveforms of every row, inside the Results folder):
+
+WAVEFORM_DIRECTORY = "Waveforms"
+WAVEFORM_LAYOUT_FILE = "Layout.json"
+WAVEFORM_ROWS_FILE = "Rows.npy"
+WAVEFORM_TORQUE = "Torque"
+WAVEFORM_VOLTAGE = "Voltage"
+WAVEFORM_CURRENT = "Current"
+WAVEFORM_COGGING_TORQUE = "Cogging_Torque"
+WAVEFORM_BEMF_VOLTAGE = "BEMF_Voltage"
+WAVEFORM_RIPPLE_QUANTITIES = [WAVEFORM_TORQUE, WAVEFORM_VOLTAGE, WAVEFORM_CURRENT]
+WAVEFORM_COGGING_QUANTITIES = [WAVEFORM_COGGING_TORQUE, WAVEFORM_BEMF_VOLTAGE]
+WAVEFORM_QUANTITIES = WAVEFORM_RIPPLE_QUANTITIES + WAVEFORM_COGGING_QUANTITIES
+WAVEFORM_SKEWED_SUFFIX = "_Skewed"                  # file of the skewed ripple waveforms (2 & 3 stack motors)
+WAVEFORM_SKEWED_STACKS = [2, 3]
+
+# Parallel execution (one scratch directory for each Flux worker inside the project directory):
+
+WORKER_DIRECTORY = "Workers"
+WORKER_NAME = "Worker_{:02d}"
+MAX_WORKER_NUMBER = 32
+MAX_PARSER_PROCESS_NUMBER = 32                                      # processes parsing the ripple result files
+
+# Multi-node execution (the nodes claim the rows of Sets.xlsx with lease files inside the shared Results folder):
+
+LEASE_DIRECTORY = "Leases"
+LEASE_FILE_NAME = "{}.lease"
+LEASE_DURATION = 120                            # [s], renewed while Flux runs
+LEASE_POLL_INTERVAL = 10                        # [s], waiting for the rows claimed by the other nodes
+SUMMARY_LEASE_ID = "Summary"                    # the final pass (Summary.xlsx) is claimed like a row
+
+# Metrics store (the rows of the summary sheets, Summary.xlsx is generated from it):
+
+METRICS_STORE_FILE = "Metrics.sqlite"
+METRICS_STORE_BLOCK_SIZE = 500                  # rows read at once
+METRICS_STORE_TIMEOUT = 60                      # [s] waiting for the other connection (export & appending)
+
+# Summary file checkpoints (Summary.xlsx is generated in the background after some rows or after some time):
+
+SUMMARY_CHECKPOINT_ROWS = 20
+SUMMARY_CHECKPOINT_TIME = 600                   # [s]
+
+# Run journal (state changes of the rows, inside the Results folder):
+
+RUN_JOURNAL_FILE = "Run_Journal.jsonl"
+JOURNAL_BLOCK_SIZE = 4096                       # [byte], the end of the journal is read in blocks
+
+# Simulation cache (raw result files shared across projects, one folder for each simulation key):
+
+SIMULATION_CACHE_DIRECTORY = "WorkingDirectory/Cache"
+CACHE_COMPLETE_FILE = "complete"
+
+# Progress reporting of the execution engine (minimum time between two updates of the same widget) [s]:
+
+PROGRESS_REPORT_INTERVAL = 0.5
+
+# Waiting for the execution engine when the application is closed (the running simulations are killed) [ms]:
+
+ENGINE_SHUTDOWN_TIMEOUT = 10000
+
+# Parameter table designs (Sets.xlsx):
+
+DESIGN_CARTESIAN = "Full grid"
+DESIGN_LATIN_HYPERCUBE = "Latin hypercube"
+DESIGN_SOBOL = "Sobol"
+DESIGN_HALTON = "Halton"
+DESIGN_FRACTIONAL_FACTORIAL = "Fractional factorial"
+
+DESIGN_TYPES = [DESIGN_CARTESIAN, DESIGN_LATIN_HYPERCUBE, DESIGN_SOBOL, DESIGN_HALTON, DESIGN_FRACTIONAL_FACTORIAL]
+DESIGN_MAX_SAMPLING_ROUNDS = 20                 # resampling, if the quantized samples give identical rows
+PARAMETER_TABLE_CHUNK_SIZE = 100000             # rows of the full grid decoded (or checked by the constraints) at once
+ROW_COUNT_EXACT_LIMIT = 1000000                 # larger grids with constraints: the valid rows are estimated (GUI)
+ROW_COUNT_SAMPLE_SIZE = 100000                  # random rows of the grid checked by the constraints for the estimate
+ROW_COUNT_UPDATE_DELAY = 300                    # [ms] the row number is counted after the inputs stop changing
+
+PARAMETER_RANGE_SHEET = "Ranges"                # sheet of the parameter ranges in Sets.xlsx (type, name, desc, range)
+
+# Constraints of the parameter table (expressions over the parameter names, infeasible rows are dropped):
+
+CONSTRAINT_SHEET = "Constraints"                # sheet of the expressions in Sets.xlsx
+CONSTRAINT_SLOT_NUMBER = "SLOTS"                # names of the motor data in the expressions
+CONSTRAINT_POLE_NUMBER = "POLES"
+
+# Adaptive grid refinement (metric: header of the column in the summary file):
+
+REFINE_GRADIENT = "gradient"                    # cells where the metric changes fastest
+REFINE_MINIMUM = "minimum"                      # cells around the minimum (or maximum) of the metric
+REFINE_BOTH = "both"
+
+REFINE_METRICS = {"cogging_p2p": "Cogging\np2p\n[Ncm]",
+                  "t_mean": "T_mean\n[Nm]",
+                  "ripple_p2p": "Ripple\np2p\n[Ncm]",
+                  "ripple_p2p_percent": "Ripple\np2p [%]",
+                  "bemf_rms": "BackEMF\nph RMS\n[V]"}
+
+# Surrogate model (the rows predicted outside the region of interest aren't simulated):
+
+SURROGATE_CONFIDENCE = 3.0                      # [standard deviation] distance of the prediction from the bounds
+SURROGATE_MIN_ROWS = 10                         # no prediction before this number of simulated rows
+SURROGATE_MAX_ROWS = 1000                       # training rows at most (the older half is dropped at the limit)
+SURROGATE_NOISE = 1e-4                          # relative noise of the metrics (numerical error of Flux)
+SURROGATE_LENGTH_SCALES = [0.05, 0.1, 0.2, 0.35, 0.5, 1.0, 2.0]   # kernel length scales on the normalized grid
+SURROGATE_SKIPPED = "Skipped (surrogate)"       # in the summary file instead of the results
+
+# Closed-loop optimization (Bayesian optimization of a summary metric):
+
+OPTIMIZER_INITIAL_ROWS = 5                      # minimal number of space-filling rows before the model is used
+OPTIMIZER_CANDIDATE_NUMBER = 2000               # rows of the grid evaluated by the acquisition function per batch
 
 RAW_COGGING_FILE_START_INDEX = 17
 RAW_RIPPLE_FILE_START_INDEX = 18
@@ -16,12 +150,18 @@ RAW_RIPPLE_FILE_START_INDEX = 18
 EXECUTION_DONE = "Execution is complete!"
 EXECUTION_STOP = "Execution is halted!"
 EXECUTION_ERROR = "Unknown error occurred during execution!"
+FLUX_TIMEOUT_ERROR = "The Flux simulation exceeded the time limit! (see Results/Simulation_Records.csv)"
+FLUX_SIMULATION_ERROR = "The Flux simulation didn't create the raw result files! (see Results/Logs)"
+FLUX_EXIT_CODE_ERROR = "The Flux simulation exited with an error! (see Results/Logs & Results/Simulation_Records.csv)"
 
 RAW_COGGING_FILE_ERROR = "Something went wrong during the processing of the raw cogging file!"
 RAW_RIPPLE_FILE_ERROR = "Something went wrong during the processing of the raw ripple file!"
 
 MISSING_RAW_FILES = "No raw result files were found for the summary creator session!"
 RESULT_FILE_IO_ERROR = "Something went wrong during the updating and saving of the result files!"
+SETS_FILE_IO_ERROR = "Something went wrong during saving the parameter sets file. Close the 'Sets.xlsx' file if " \
+                     "its open!"
+SETS_TABLE_ERROR = "Something went wrong during the creation of the parameter table: "
 
 # Excel file styling:
 
@@ -42,3 +182,30 @@ BOTTOM_BORDER = Border(
     left=Side(border_style=BORDER_THIN, color='00000000'),
     right=Side(border_style=BORDER_THIN, color='00000000'),
     bottom=Side(border_style=BORDER_THIN, color='00000000'))
+
+# Named styles of Sets.xlsx (registered once in the workbook, the cells only refer to them):
+
+SETS_STYLE_HEADER_ID = "Sets header ID"         # first column of the header rows
+SETS_STYLE_HEADER = "Sets header"               # parameter types & names
+SETS_STYLE_DESCRIPTION = "Sets description"     # parameter descriptions
+SETS_STYLE_ID = "Sets ID"                       # parameter set IDs
+SETS_STYLE_VALUE = "Sets value"                 # parameter values
+SETS_STYLE_LAST_ID = "Sets last ID"             # the last row is closed by the bottom border
+SETS_STYLE_LAST_VALUE = "Sets last value"
+SETS_STYLE_TITLE = "Sets title"                 # header of the range & constraint sheets
+
+SETS_STYLES = {
+    SETS_STYLE_HEADER_ID: dict(font=Font(bold=True, color="FFFFFF"), fill=THYSSEN_FILL, border=DEFAULT_BORDER),
+    SETS_STYLE_HEADER: dict(font=Font(bold=True, color="FFFFFF"), fill=THYSSEN_FILL, border=DEFAULT_BORDER,
+                            alignment=Alignment(horizontal='center')),
+    SETS_STYLE_DESCRIPTION: dict(font=Font(color="FFFFFF"), fill=THYSSEN_FILL, border=DEFAULT_BORDER,
+                                 alignment=Alignment(horizontal='center')),
+    SETS_STYLE_ID: dict(font=Font(bold=True, color="FFFFFF"), fill=THYSSEN_FILL, border=VERTICAL_BORDER,
+                        alignment=Alignment(horizontal='center')),
+    SETS_STYLE_VALUE: dict(font=DEFAULT_FONT, border=VERTICAL_BORDER, alignment=Alignment(horizontal='center')),
+    SETS_STYLE_LAST_ID: dict(font=Font(bold=True, color="FFFFFF"), fill=THYSSEN_FILL, border=BOTTOM_BORDER,
+                             alignment=Alignment(horizontal='center')),
+    SETS_STYLE_LAST_VALUE: dict(font=DEFAULT_FONT, border=BOTTOM_BORDER, alignment=Alignment(horizontal='center')),
+    SETS_STYLE_TITLE: dict(font=Font(bold=True, color="FFFFFF"), fill=THYSSEN_FILL)}
+
+SETS_PROGRESS_ROWS = 1000                       # rows of Sets.xlsx written between two progress reports
@@ -0,0 +1,110 @@
+import ast
+import operator
+import numpy as np
+
+from fluxminator.Constants import *
+
+
+# Elements of the constraint expressions (evaluated on numpy arrays, a column for every parameter):
+
+_OPERATORS = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv,
+              ast.Pow: operator.pow, ast.Mod: operator.mod, ast.USub: operator.neg, ast.UAdd: operator.pos,
+              ast.Lt: operator.lt, ast.LtE: operator.le, ast.Gt: operator.gt, ast.GtE: operator.ge,
+              ast.Eq: np.isclose, ast.NotEq: lambda a, b: ~np.isclose(a, b),
+              ast.And: np.logical_and, ast.Or: np.logical_or, ast.Not: np.logical_not}
+
+_FUNCTIONS = {"abs": np.abs, "sqrt": np.sqrt, "sin": np.sin, "cos": np.cos, "tan": np.tan,
+              "radians": np.radians, "degrees": np.degrees, "min": np.minimum, "max": np.maximum}
+
+
+def split_constraints(text):
+    """ Return the list of the constraint expressions of the text (separated by ';' or new lines) """
+    return [expression.strip() for expression in text.replace("\n", ";").split(";") if expression.strip() != ""]
+
+
+def check_constraint(expression, variable_names):
+    """ Return an error message if the expression isn't a valid constraint over the given names, otherwise None """
+
+    try:
+        tree = ast.parse(expression, mode='eval')
+    except SyntaxError:
+        return "Invalid constraint: " + expression
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and node.id not in variable_names and node.id not in _FUNCTIONS:
+            return "Unknown name in the constraint: " + node.id
+
+        if isinstance(node, ast.Call) and (not isinstance(node.func, ast.Name) or node.func.id not in _FUNCTIONS):
+            return "Unknown function in the constraint: " + expression
+
+        if not isinstance(node, (ast.Expression, ast.Name, ast.Constant, ast.Load, ast.Call, ast.BinOp, ast.UnaryOp,
+                                 ast.BoolOp, ast.Compare)) and type(node) not in _OPERATORS:
+            return "Invalid constraint: " + expression
+
+    if not isinstance(tree.body, (ast.Compare, ast.BoolOp)) \
+            and not (isinstance(tree.body, ast.UnaryOp) and isinstance(tree.body.op, ast.Not)):
+        return "The constraint has to be a comparison: " + expression
+
+    return None
+
+
+def feasible_rows(constraints, parameter_names, parameter_table, constants=None):
+    """ Evaluate the constraints on every row of the parameter table at once; return the boolean mask of the rows
+    satisfying all of them (constants: other names of the expressions, e.g. the slot & pole number) """
+
+    table = np.asarray(parameter_table, dtype=float).reshape(-1, len(parameter_names))
+    mask = np.ones(len(table), dtype=bool)
+
+    variables = {"pi": np.pi}
+    variables.update(constants or {})
+    variables.update({name: table[:, i] for i, name in enumerate(parameter_names)})
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for expression in constraints:
+            mask &= np.broadcast_to(_evaluate(ast.parse(expression, mode='eval').body, variables), mask.shape)
+
+    return mask
+
+
+def read_constraints(wb):
+    """ Return the constraints stored in the parameter set file (empty list if there are none) """
+
+    if CONSTRAINT_SHEET not in wb.sheetnames:
+        return []
+
+    return [row[0] for row in wb[CONSTRAINT_SHEET].iter_rows(min_row=2, values_only=True) if row[0]]
+
+
+def _evaluate(node, variables):
+
+    if isinstance(node, ast.Constant):
+        return node.value
+
+    if isinstance(node, ast.Name):
+        return variables[node.id]
+
+    if isinstance(node, ast.BinOp):
+        return _OPERATORS[type(node.op)](_evaluate(node.left, variables), _evaluate(node.right, variables))
+
+    if isinstance(node, ast.UnaryOp):
+        return _OPERATORS[type(node.op)](_evaluate(node.operand, variables))
+
+    if isinstance(node, ast.BoolOp):
+        result = _evaluate(node.values[0], variables)
+        for value in node.values[1:]:
+            result = _OPERATORS[type(node.op)](result, _evaluate(value, variables))
+        return result
+
+    if isinstance(node, ast.Compare):                   # chained comparison: a < b < c
+        result = True
+        left = _evaluate(node.left, variables)
+        for comparison, comparator in zip(node.ops, node.comparators):
+            right = _evaluate(comparator, variables)
+            result = np.logical_and(result, _OPERATORS[type(comparison)](left, right))
+            left = right
+        return result
+
+    if isinstance(node, ast.Call):
+        return _FUNCTIONS[node.func.id](*[_evaluate(argument, variables) for argument in node.args])
+
+    raise ValueError("Invalid constraint element: " + ast.dump(node))
@@ -0,0 +1,100 @@
+import math
+import warnings
+import itertools
+import numpy as np
+
+from scipy.stats import qmc
+
+from fluxminator.Constants import *
+
+
+def create_design_table(value_lists, design, row_number, seed=None, feasible=None):
+    """ Generate a parameter table instead of the full Cartesian product: (at most) row_number rows with the sampling
+    designs; the fractional factorial design has the smallest power of 2 rows with at least row_number rows (and
+    enough rows for its generators), so it can have more rows than requested (e.g. 50 rows: 64 rows).
+    value_lists: the quantized values of every parameter (Range.get_all_values()); every generated value is one of
+    them, so the min/max/step settings of the ranges are respected.
+    feasible: function returning the boolean mask of the valid rows of a table (constraints), None: every row """
+
+    if design == DESIGN_FRACTIONAL_FACTORIAL:
+        parameter_table = _fractional_factorial(value_lists, row_number)
+        if feasible is not None and len(parameter_table) > 0:
+            parameter_table = [row for row, valid in zip(parameter_table, feasible(parameter_table)) if valid]
+        return parameter_table
+
+    parameter_number = len(value_lists)
+
+    if design == DESIGN_LATIN_HYPERCUBE:
+        sampler = qmc.LatinHypercube(d=parameter_number, seed=seed)
+    elif design == DESIGN_SOBOL:
+        sampler = qmc.Sobol(d=parameter_number, seed=seed)
+    elif design == DESIGN_HALTON:
+        sampler = qmc.Halton(d=parameter_number, seed=seed)
+    else:
+        raise ValueError("Unknown design: " + str(design))
+
+    # Different samples can be quantized to the same row -> sample again until there are enough unique rows:
+    max_row_number = min(row_number, math.prod(len(values) for values in value_lists))
+
+    parameter_table = []
+    unique_rows = set()
+
+    for _ in range(DESIGN_MAX_SAMPLING_ROUNDS):
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")                     # Sobol: the balance needs 2^n samples
+            samples = sampler.random(row_number)
+
+        sample_indices = [tuple(min(int(u * len(values)), len(values) - 1) for u, values in zip(sample, value_lists))
+                          for sample in samples]
+
+        # Samples violating the constraints are dropped (and replaced in the next round):
+        if feasible is not None:
+            mask = feasible([[values[i] for i, values in zip(indices, value_lists)] for indices in sample_indices])
+            sample_indices = [indices for indices, valid in zip(sample_indices, mask) if valid]
+
+        for indices in sample_indices:
+
+            if indices not in unique_rows:
+                unique_rows.add(indices)
+                parameter_table.append([values[i] for i, values in zip(indices, value_lists)])
+
+                if len(parameter_table) == max_row_number:
+                    return parameter_table
+
+    return parameter_table
+
+
+def _fractional_factorial(value_lists, row_number):
+    """ Two-level fractional factorial design (2^(k-p) rows) with the min & max values of the parameters:
+    the base columns form a full factorial design, the other columns are generated by the interactions of the base
+    columns (resolution III or higher, the main effects aren't aliased with each other) """
+
+    parameter_number = len(value_lists)
+
+    # Number of base columns: enough for the requested rows, and for a distinct generator for every other column:
+    base_number = min(parameter_number, max(0, math.ceil(math.log2(max(row_number, 1)))))
+    while 2 ** base_number - 1 - base_number < parameter_number - base_number:
+        base_number += 1
+
+    base_columns = np.array(list(itertools.product([-1, 1], repeat=base_number)))[:, ::-1]
+
+    generators = [combination for size in range(2, base_number + 1)
+                  for combination in itertools.combinations(range(base_number), size)]
+
+    columns = [base_columns[:, i] for i in range(base_number)]
+    columns += [np.prod(base_columns[:, list(generators[i])], axis=1) for i in range(parameter_number - base_number)]
+
+    parameter_table = []
+    for levels in zip(*columns):
+        parameter_table.append([values[0] if level < 0 else values[-1] for level, values in zip(levels, value_lists)])
+
+    # Parameters with only one value give identical rows:
+    unique_table = []
+    unique_rows = set()
+    for row in parameter_table:
+        if tuple(row) not in unique_rows:
+            unique_rows.add(tuple(row))
+            unique_table.append(row)
+
+    return unique_table
@@ -0,0 +1,138 @@
+import threading
+import time
+
+from PyQt5.QtCore import QThread, QTimer, pyqtSignal
+
+from fluxminator.Constants import *
+
+
+class ExecutionEngine(QThread):
+    """ Background thread for the execution (simulations or summary file creation). The Runner only reports the
+    progress through the engine; the signals are delivered to the widgets of the view in the GUI thread. """
+
+    progressChanged = pyqtSignal(int)                   # number of the executed simulations
+    progressMaximumChanged = pyqtSignal(int)            # number of all simulations
+    estimatedTimeChanged = pyqtSignal(str)              # text for the progress label
+    executionFinished = pyqtSignal(str)                 # execution result (see Constants)
+    flushScheduled = pyqtSignal(int)                    # [ms] until the pending values are emitted
+
+    def __init__(self, presenter):
+
+        super().__init__()
+
+        self.presenter = presenter
+
+        # Throttling: each signal is emitted at most once in every PROGRESS_REPORT_INTERVAL seconds
+        self.lastReportTimes = {self.progressChanged: 0, self.estimatedTimeChanged: 0}
+        self.pendingValues = {}                         # key=signal; value=last reported but not emitted value
+        self.pendingLock = threading.Lock()             # the flush timer runs in the GUI thread
+
+        # Trailing flush: the last value of a burst is emitted at the end of the interval, even if nothing else is
+        # reported (the timer is created in the GUI thread, it's started through the queued signal)
+        self.flushTimer = QTimer()
+        self.flushTimer.setSingleShot(True)
+        self.flushTimer.timeout.connect(self.flush)
+        self.flushScheduled.connect(self.flushTimer.start)
+
+    def run(self):
+        """ Called by QThread.start() in the new thread """
+
+        execution_result = self.presenter._run(self.presenter)         # defined by the Runner object
+
+        self.flush()
+        self.executionFinished.emit(execution_result)
+
+    def report_progress(self, value, maximum=None):
+        """ Report the number of the executed simulations (and the number of all simulations, if it's known) """
+
+        if maximum is not None:
+            self.progressMaximumChanged.emit(maximum)
+
+        self._emit_throttled(self.progressChanged, value)
+
+    def report_estimated_time(self, index, sets_number, finish_time):
+        """ Report the index of the actual simulation and the estimated finish time of the execution """
+
+        if finish_time is None:
+            finish_time_string = "-"
+        else:
+            finish_time_string = finish_time.strftime("%b. %d (%A) %H:%M")
+
+        self._emit_throttled(self.estimatedTimeChanged, "Calculation: {0}/{1}, estimated finish time: {2}".format(
+            index, sets_number, finish_time_string))
+
+    def flush(self):
+        """ Emit the last reported values even if the throttling interval hasn't elapsed yet """
+
+        with self.pendingLock:
+            pending_values, self.pendingValues = self.pendingValues, {}
+            for signal in pending_values:
+                self.lastReportTimes[signal] = time.time()
+
+        for signal, value in pending_values.items():
+            signal.emit(value)
+
+    def _emit_throttled(self, signal, value):
+
+        with self.pendingLock:
+            elapsed_time = time.time() - self.lastReportTimes[signal]
+
+            if elapsed_time < PROGRESS_REPORT_INTERVAL:
+                if signal not in self.pendingValues:
+                    self.flushScheduled.emit(int((PROGRESS_REPORT_INTERVAL - elapsed_time) * 1000) + 1)
+                self.pendingValues[signal] = value
+                return
+
+            self.pendingValues.pop(signal, None)
+            self.lastReportTimes[signal] = time.time()
+
+        signal.emit(value)
+
+
+class ParameterTableEngine(QThread):
+    """ Background thread of the parameter set creator: generating the parameter table of the design and writing
+    Sets.xlsx, so the widget isn't frozen by the large tables. The result is delivered by the signals. """
+
+    progressChanged = pyqtSignal(int)                   # number of the written rows
+    progressMaximumChanged = pyqtSignal(int)            # number of all rows
+    tableFinished = pyqtSignal(str)                     # error message, "" if Sets.xlsx was created
+
+    def __init__(self):
+
+        super().__init__()
+
+        self.motor = None
+        self.design = None
+        self.rowNumber = 0
+        self.modelPath = None
+
+    def set_up(self, motor, design, row_number, model_path):
+        """ Parameters of the next run (the Motor object mustn't be changed until the thread has finished) """
+
+        self.motor = motor
+        self.design = design
+        self.rowNumber = row_number
+        self.modelPath = model_path
+
+    def run(self):
+        """ Called by QThread.start() in the new thread """
+
+        # The signal is always emitted, otherwise the parameter set creator (and the main window) stays locked:
+        try:
+            # Parameter table (lists in list) with the parameter combinations of the design, including special sets:
+            parameter_table = self.motor.create_design_parameter_set(self.design, self.rowNumber)
+            self.progressMaximumChanged.emit(len(parameter_table))
+
+            self.motor.create_parameter_table_excel(parameter_table, self.modelPath, self.report_progress)
+        except IOError:
+            self.tableFinished.emit(SETS_FILE_IO_ERROR)
+            return
+        except Exception as exception:
+            self.tableFinished.emit(SETS_TABLE_ERROR + (str(exception) or type(exception).__name__))
+            return
+
+        self.tableFinished.emit("")
+
+    def report_progress(self, value, maximum):
+
+        self.progressChanged.emit(value)
@@ -0,0 +1,153 @@
+import os
+import json
+import time
+
+from fluxminator.Constants import *
+
+
+class RunJournal:
+    """ Append-only journal of the execution in the Results folder: one JSON line for every state change of a row of
+    Sets.xlsx (claimed -> simulated -> parsed -> summarized). The next row to continue with is read from the end of
+    the file, the states of the rows are loaded only if they are needed. """
+
+    CLAIMED = "claimed"                 # handed over to Flux
+    SIMULATED = "simulated"             # the raw result files are ready
+    PARSED = "parsed"                   # the raw result files have been processed
+    SUMMARIZED = "summarized"           # the metrics store has every summary row up to this one
+
+    STATES = [CLAIMED, SIMULATED, PARSED, SUMMARIZED]
+
+    SKIPPED = "skipped"                 # not simulated, the surrogate model predicted it outside the region of interest
+
+    def __init__(self, results_path):
+
+        self.path = os.path.join(results_path, RUN_JOURNAL_FILE)
+        self.rowStates = None           # key=parameter set ID; value=index of the last state (loaded on demand)
+        self.skippedRows = set()
+
+        self._terminate_torn_line()
+
+    def get_path(self): return self.path
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def clear(self):
+        """ Start a new journal (new session from the first row) """
+
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.rowStates = {}
+        self.skippedRows = set()
+
+    def record(self, parameter_values_id, simulation_index, state):
+        """ Append the new state of the row (simulation_index: row number in Sets.xlsx without the header) """
+
+        line = json.dumps({"id": parameter_values_id, "index": simulation_index, "state": state,
+                           "time": round(time.time(), 1)})
+
+        with open(self.path, 'a') as journal_file:
+            journal_file.write(line + "\n")
+
+        if self.rowStates is not None:
+            self._update_state(parameter_values_id, state)
+
+    def is_simulated(self, parameter_values_id):
+        """ Check whether the raw result files of the row have already been created """
+
+        if self.rowStates is None:
+            self._load()
+
+        return self.rowStates.get(parameter_values_id, -1) >= RunJournal.STATES.index(RunJournal.SIMULATED)
+
+    def is_interrupted(self, parameter_values_id):
+        """ Check whether the row was handed over to Flux, but its simulation didn't finish successfully (stopped,
+        crashed or failed: the raw result files can be partial) """
+
+        if self.rowStates is None:
+            self._load()
+
+        return self.rowStates.get(parameter_values_id, -1) == RunJournal.STATES.index(RunJournal.CLAIMED)
+
+    def is_skipped(self, parameter_values_id):
+        """ Check whether the simulation of the row has been skipped by the surrogate model """
+
+        if self.rowStates is None:
+            self._load()
+
+        return parameter_values_id in self.skippedRows
+
+    def get_resumeIndex(self):
+        """ Return the index of the first row not in the metrics store yet, or None if nothing has been summarized;
+        only the end of the journal is read """
+
+        if not os.path.exists(self.path):
+            return None
+
+        with open(self.path, 'rb') as journal_file:
+            journal_file.seek(0, os.SEEK_END)
+            file_size = journal_file.tell()
+
+            block_size = JOURNAL_BLOCK_SIZE
+            while True:
+                start = max(0, file_size - block_size)
+                journal_file.seek(start)
+                lines = journal_file.read(file_size - start).split(b"\n")
+                if start > 0:
+                    lines = lines[1:]                   # the first line of the block can be incomplete
+
+                for line in reversed(lines):
+                    entry = RunJournal._parse(line)
+                    if entry is not None and entry["state"] == RunJournal.SUMMARIZED:
+                        return entry["index"] + 1
+
+                if start == 0:
+                    return None
+                block_size *= 2
+
+    def _terminate_torn_line(self):
+        """ After an interrupted writing, the next entry has to start in a new line """
+
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return
+
+        with open(self.path, 'rb+') as journal_file:
+            journal_file.seek(-1, os.SEEK_END)
+            if journal_file.read(1) != b"\n":
+                journal_file.write(b"\n")
+
+    def _load(self):
+
+        self.rowStates = {}
+        self.skippedRows = set()
+
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, 'rb') as journal_file:
+            for line in journal_file:
+                entry = RunJournal._parse(line)
+                if entry is not None:
+                    self._update_state(entry["id"], entry["state"])
+
+    def _update_state(self, parameter_values_id, state):
+
+        if state == RunJournal.SKIPPED:
+            self.skippedRows.add(parameter_values_id)
+            return
+
+        if state == RunJournal.SIMULATED:               # simulated after all (e.g. another region of interest)
+            self.skippedRows.discard(parameter_values_id)
+
+        state_index = RunJournal.STATES.index(state)
+        if state_index > self.rowStates.get(parameter_values_id, -1):
+            self.rowStates[parameter_values_id] = state_index
+
+    @staticmethod
+    def _parse(line):
+        """ Return the entry of the journal line, or None for an empty or torn line (interrupted writing) """
+
+        try:
+            return json.loads(line)
+        except ValueError:
+            return None
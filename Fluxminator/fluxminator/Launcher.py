@@ -0,0 +1,304 @@
+import os
+import sys
+import csv
+import signal
+import threading
+import subprocess
+
+import time
+from datetime import datetime
+
+from fluxminator.Constants import *
+
+if os.name == 'nt':
+    import ctypes
+    from ctypes import wintypes
+
+
+class SimulationRecord:
+    """ Resource accounting of one Flux simulation (one row of Sets.xlsx) """
+
+    def __init__(self, parameter_values_id, worker_index=0):
+
+        self.parameterValuesID = parameter_values_id
+        self.workerIndex = worker_index                 # 0: sequential execution
+
+        self.startTime = datetime.now()
+        self.wallTime = 0                               # [s]
+        self.cpuTime = None                             # [s] (user + system)
+        self.peakMemory = None                          # [MB]
+
+        self.exitCode = None
+        self.timedOut = False
+
+    def get_parameterValuesID(self): return self.parameterValuesID
+    def get_wallTime(self): return self.wallTime
+    def get_cpuTime(self): return self.cpuTime
+    def get_peakMemory(self): return self.peakMemory
+    def get_exitCode(self): return self.exitCode
+    def is_timedOut(self): return self.timedOut
+
+    def is_failed(self):
+        """ Flux was killed after the time limit or it exited with an error (the raw files can be partial) """
+        return self.timedOut or self.exitCode != 0
+
+    def to_row(self):
+        """ Return the record as a row of the simulation records file """
+
+        cpu_time = "" if self.cpuTime is None else "%.1f" % self.cpuTime
+        peak_memory = "" if self.peakMemory is None else "%.1f" % self.peakMemory
+
+        return [self.parameterValuesID, self.workerIndex, self.startTime.strftime("%Y-%m-%d %H:%M:%S"),
+                "%.1f" % self.wallTime, cpu_time, peak_memory, self.exitCode, self.timedOut]
+
+
+class FluxLauncher:
+    """ Launch Flux simulations as subprocesses with a time limit; the stdout/stderr of every simulation is captured
+    into log files, the exit status, the CPU time and the peak memory are stored next to the results """
+
+    RECORDS_HEADER = ["ID", "Worker", "Start", "Wall time [s]", "CPU time [s]", "Peak memory [MB]", "Exit code",
+                      "Timed out"]
+
+    recordsLock = threading.Lock()                      # the workers of the pool share the records file
+
+    # The workers of the pool run Flux at the same time; a process is only killed under the lock, while it hasn't
+    # been reaped yet (its PID can't belong to another process)
+    processLock = threading.Lock()
+
+    def __init__(self, flux_path, results_path, model_name, timeout=0):
+
+        self.fluxPath = flux_path
+        self.resultsPath = results_path                 # Results folder of the project
+        self.modelName = model_name                     # name of the .FLU model (with extension)
+        self.timeout = timeout                          # [s], 0: no time limit
+
+        # Running simulations (under the process lock): key=process; value=job object (Windows) or None
+        self.runningProcesses = {}
+        self.terminated = False                         # the simulations started after terminate() are killed, too
+
+        self.logPath = os.path.join(results_path, LOG_DIRECTORY)
+        if not os.path.exists(self.logPath):
+            os.makedirs(self.logPath)
+
+    def launch(self, parameter_values_id, working_directory, script_path, worker_index=0):
+        """ Run one simulation in the working directory (where Flux looks for the channel file) """
+
+        record = SimulationRecord(parameter_values_id, worker_index)
+
+        command = [self.fluxPath, '-runPy', script_path, '-application', 'Flux2D', '-batch']
+        if self.fluxPath.endswith(".py"):                               # stand-in of Flux (flux_standin.py)
+            command = [sys.executable] + command
+        log_name = os.path.join(self.logPath, self.modelName[:-4] + "_" + parameter_values_id)
+
+        with open(log_name + "_stdout.log", 'w') as stdout_file, open(log_name + "_stderr.log", 'w') as stderr_file:
+
+            start_time = time.time()
+            # POSIX: Flux and its child processes get their own process group, so the whole group can be killed
+            process = subprocess.Popen(command, cwd=working_directory, stdout=stdout_file, stderr=stderr_file,
+                                       start_new_session=(os.name != 'nt'))
+
+            if os.name == 'nt':
+                self._wait_windows(process, record)
+            else:
+                self._wait_posix(process, record)
+
+            record.wallTime = time.time() - start_time
+
+        self._save_record(record)
+
+        return record
+
+    def _wait_windows(self, process, record):
+        """ Wait for the process in a job object: the time limit kills the whole process tree (Flux starts its
+        solver as child processes), the CPU time and the peak memory are accounted for the whole tree """
+
+        job = _JobObject(process.pid)
+        with FluxLauncher.processLock:
+            self.runningProcesses[process] = job
+            if self.terminated:
+                job.terminate()
+                process.kill()
+
+        try:
+            process.wait(timeout=self.timeout if self.timeout > 0 else None)
+        except subprocess.TimeoutExpired:
+            record.timedOut = True
+            job.terminate()
+            process.kill()                                  # if the process couldn't be assigned to the job
+            process.wait()
+
+        record.exitCode = process.returncode
+        record.cpuTime, record.peakMemory = job.get_resourceUsage()
+
+        with FluxLauncher.processLock:
+            self.runningProcesses.pop(process, None)
+        job.close()
+
+    def _wait_posix(self, process, record):
+        """ Wait for the process without reaping it, then reap it with wait4() to get its resource usage; a timer
+        kills it after the time limit """
+
+        with FluxLauncher.processLock:
+            self.runningProcesses[process] = None
+            if self.terminated:
+                FluxLauncher._kill_process_group(process)
+
+        timer = None
+        if self.timeout > 0:
+            timer = threading.Timer(self.timeout, FluxLauncher._kill, [process, record])
+            timer.start()
+
+        os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOWAIT)     # the process is a zombie from here
+
+        with FluxLauncher.processLock:
+            _, status, resource_usage = os.wait4(process.pid, 0)
+            process.returncode = os.waitstatus_to_exitcode(status)  # the process was reaped outside of Popen
+            del self.runningProcesses[process]
+
+        if timer is not None:
+            timer.cancel()
+
+        record.exitCode = process.returncode
+        record.cpuTime = resource_usage.ru_utime + resource_usage.ru_stime
+        record.peakMemory = resource_usage.ru_maxrss / 1024         # [kB] on Linux
+
+    def _save_record(self, record):
+        """ Append the record to the simulation records file in the Results folder """
+
+        path = os.path.join(self.resultsPath, SIMULATION_RECORDS_FILE)
+
+        with FluxLauncher.recordsLock:
+            new_file = not os.path.exists(path)
+            with open(path, 'a', newline='') as records_file:
+                writer = csv.writer(records_file)
+                if new_file:
+                    writer.writerow(FluxLauncher.RECORDS_HEADER)
+                writer.writerow(record.to_row())
+
+    def terminate(self):
+        """ Kill the running simulations with their child processes (closing the application); the killed
+        simulations are failed, so their rows are simulated again after continuing """
+
+        with FluxLauncher.processLock:
+            self.terminated = True
+            for process, job in self.runningProcesses.items():
+                if job is not None:
+                    job.terminate()
+                    process.kill()                          # if the process couldn't be assigned to the job
+                elif process.returncode is None:
+                    FluxLauncher._kill_process_group(process)
+
+    @staticmethod
+    def _kill(process, record):
+        """ Kill the process group after the time limit (POSIX), unless the process has already been reaped (the
+        group ID of the process can't be reused until then) """
+
+        with FluxLauncher.processLock:
+            if process.returncode is None:
+                record.timedOut = True
+                FluxLauncher._kill_process_group(process)
+
+    @staticmethod
+    def _kill_process_group(process):
+
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+if os.name == 'nt':
+
+    class _JobObject:
+        """ Windows job object of a Flux process and of the processes started by it """
+
+        JOB_OBJECT_BASIC_ACCOUNTING_INFORMATION = 1
+        JOB_OBJECT_EXTENDED_LIMIT_INFORMATION = 9
+        PROCESS_SET_QUOTA = 0x0100
+        PROCESS_TERMINATE = 0x0001
+
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+
+        # The handles are pointer sized (the default int return type would truncate them):
+        kernel32.CreateJobObjectW.restype = wintypes.HANDLE
+        kernel32.CreateJobObjectW.argtypes = [ctypes.c_void_p, wintypes.LPCWSTR]
+        kernel32.OpenProcess.restype = wintypes.HANDLE
+        kernel32.OpenProcess.argtypes = [wintypes.DWORD, wintypes.BOOL, wintypes.DWORD]
+        kernel32.AssignProcessToJobObject.argtypes = [wintypes.HANDLE, wintypes.HANDLE]
+        kernel32.TerminateJobObject.argtypes = [wintypes.HANDLE, wintypes.UINT]
+        kernel32.QueryInformationJobObject.argtypes = [wintypes.HANDLE, ctypes.c_int, ctypes.c_void_p,
+                                                       wintypes.DWORD, ctypes.c_void_p]
+        kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+
+        def __init__(self, process_id):
+
+            self.handle = _JobObject.kernel32.CreateJobObjectW(None, None)
+
+            process_handle = _JobObject.kernel32.OpenProcess(
+                _JobObject.PROCESS_SET_QUOTA | _JobObject.PROCESS_TERMINATE, False, process_id)
+            if process_handle:
+                _JobObject.kernel32.AssignProcessToJobObject(self.handle, process_handle)
+                _JobObject.kernel32.CloseHandle(process_handle)
+
+        def terminate(self):
+            """ Kill every process of the job """
+            _JobObject.kernel32.TerminateJobObject(self.handle, 1)
+
+        def get_resourceUsage(self):
+            """ Return the CPU time (user + kernel) [s] and the peak committed memory [MB] of the job (None: not
+            available) """
+
+            cpu_time, peak_memory = None, None
+
+            accounting = _JobBasicAccountingInformation()
+            if _JobObject.kernel32.QueryInformationJobObject(
+                    self.handle, _JobObject.JOB_OBJECT_BASIC_ACCOUNTING_INFORMATION, ctypes.byref(accounting),
+                    ctypes.sizeof(accounting), None):
+                cpu_time = (accounting.TotalUserTime + accounting.TotalKernelTime) / 1e7      # 100 ns units
+
+            limits = _JobExtendedLimitInformation()
+            if _JobObject.kernel32.QueryInformationJobObject(
+                    self.handle, _JobObject.JOB_OBJECT_EXTENDED_LIMIT_INFORMATION, ctypes.byref(limits),
+                    ctypes.sizeof(limits), None):
+                peak_memory = limits.PeakJobMemoryUsed / 1024 ** 2
+
+            return cpu_time, peak_memory
+
+        def close(self):
+            _JobObject.kernel32.CloseHandle(self.handle)
+
+    class _JobBasicAccountingInformation(ctypes.Structure):
+        """ JOBOBJECT_BASIC_ACCOUNTING_INFORMATION structure of the Windows API """
+
+        _fields_ = [("TotalUserTime", ctypes.c_int64),
+                    ("TotalKernelTime", ctypes.c_int64),
+                    ("ThisPeriodTotalUserTime", ctypes.c_int64),
+                    ("ThisPeriodTotalKernelTime", ctypes.c_int64),
+                    ("TotalPageFaultCount", wintypes.DWORD),
+                    ("TotalProcesses", wintypes.DWORD),
+                    ("ActiveProcesses", wintypes.DWORD),
+                    ("TotalTerminatedProcesses", wintypes.DWORD)]
+
+    class _JobExtendedLimitInformation(ctypes.Structure):
+        """ JOBOBJECT_EXTENDED_LIMIT_INFORMATION structure of the Windows API (with the basic limits and the IO
+        counters) """
+
+        _fields_ = [("PerProcessUserTimeLimit", ctypes.c_int64),
+                    ("PerJobUserTimeLimit", ctypes.c_int64),
+                    ("LimitFlags", wintypes.DWORD),
+                    ("MinimumWorkingSetSize", ctypes.c_size_t),
+                    ("MaximumWorkingSetSize", ctypes.c_size_t),
+                    ("ActiveProcessLimit", wintypes.DWORD),
+                    ("Affinity", ctypes.c_size_t),
+                    ("PriorityClass", wintypes.DWORD),
+                    ("SchedulingClass", wintypes.DWORD),
+                    ("ReadOperationCount", ctypes.c_uint64),
+                    ("WriteOperationCount", ctypes.c_uint64),
+                    ("OtherOperationCount", ctypes.c_uint64),
+                    ("ReadTransferCount", ctypes.c_uint64),
+                    ("WriteTransferCount", ctypes.c_uint64),
+                    ("OtherTransferCount", ctypes.c_uint64),
+                    ("ProcessMemoryLimit", ctypes.c_size_t),
+                    ("JobMemoryLimit", ctypes.c_size_t),
+                    ("PeakProcessMemoryUsed", ctypes.c_size_t),
+                    ("PeakJobMemoryUsed", ctypes.c_size_t)]
@@ -0,0 +1,170 @@
+import os
+import json
+import time
+import threading
+
+from fluxminator.Constants import *
+
+
+class RowLeases:
+    """ Leases of the Sets.xlsx rows in the shared Results folder (multi-node execution mode).
+    A lease is a small file created atomically (O_CREAT | O_EXCL) by the node claiming the row; the node renews it
+    while Flux runs. A lease which isn't renewed within LEASE_DURATION seconds (the node crashed or lost the share)
+    expires, and the row goes back to the pool. The clocks of the nodes are expected to be synchronized. """
+
+    def __init__(self, results_path, node_name, duration=LEASE_DURATION):
+
+        self.leasePath = os.path.join(results_path, LEASE_DIRECTORY)
+        self.nodeName = node_name
+        self.duration = duration                        # [s]
+
+        self.heldLeases = set()                         # IDs of the rows claimed by this node
+        self.lock = threading.Lock()
+
+        self.renewalStop = threading.Event()
+        self.renewalThread = None
+
+        if not os.path.exists(self.leasePath):
+            os.makedirs(self.leasePath)
+
+    def get_nodeName(self): return self.nodeName
+
+    def is_held(self, row_id):
+        """ Check whether the row has been claimed by this node """
+        return row_id in self.heldLeases
+
+    def get_leasedIds(self):
+        """ IDs of the rows with a lease file (held by any node, maybe expired), by one listing of the folder """
+
+        prefix, suffix = LEASE_FILE_NAME.split("{}")
+
+        return {name[len(prefix):len(name) - len(suffix)] for name in os.listdir(self.leasePath)
+                if name.startswith(prefix) and name.endswith(suffix)}
+
+    def claim(self, row_id):
+        """ Try to claim the row; return False if another node holds a valid lease on it """
+
+        lease_file = self._lease_file(row_id)
+
+        if os.path.exists(lease_file) and self._is_expired(lease_file):
+            self._break(lease_file)
+
+        try:
+            file_descriptor = os.open(lease_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+
+        with os.fdopen(file_descriptor, 'w') as file:
+            file.write(self._lease_data())
+
+        with self.lock:
+            self.heldLeases.add(row_id)
+
+        return True
+
+    def release(self, row_id):
+        """ Give the row back (after the simulation, or if it couldn't be finished); a lease lost to another node
+        is left alone """
+
+        with self.lock:
+            self.heldLeases.discard(row_id)
+
+        lease_file = self._lease_file(row_id)
+
+        try:
+            if self._is_own(lease_file):
+                os.remove(lease_file)
+        except FileNotFoundError:
+            pass
+
+    def renew(self):
+        """ Extend the expiry time of every lease held by this node. A lease which has expired in the meantime (e.g.
+        the renewal stalled on the share) and was claimed by another node is lost: it isn't held any more and the
+        file of the other node is left alone. """
+
+        with self.lock:
+            for row_id in list(self.heldLeases):
+                lease_file = self._lease_file(row_id)
+
+                try:
+                    if not self._is_own(lease_file):
+                        self.heldLeases.discard(row_id)
+                        continue
+
+                    with open(lease_file + "." + self.nodeName, 'w') as file:
+                        file.write(self._lease_data())
+                    os.replace(lease_file + "." + self.nodeName, lease_file)
+                except OSError:
+                    pass                                # the share isn't available, renewed at the next time
+
+    def start_renewal(self):
+        """ Renew the leases in a background thread (several times within the lease duration) """
+
+        self.renewalStop.clear()
+        self.renewalThread = threading.Thread(target=self._renewal_loop, daemon=True)
+        self.renewalThread.start()
+
+    def stop_renewal(self):
+        """ Stop the renewal thread and release every lease still held by this node """
+
+        if self.renewalThread is not None:
+            self.renewalStop.set()
+            self.renewalThread.join()
+            self.renewalThread = None
+
+        for row_id in list(self.heldLeases):
+            self.release(row_id)
+
+    def _renewal_loop(self):
+
+        while not self.renewalStop.wait(self.duration / 3):
+            self.renew()
+
+    def _lease_file(self, row_id):
+        return os.path.join(self.leasePath, LEASE_FILE_NAME.format(row_id))
+
+    def _lease_data(self):
+        return json.dumps({"node": self.nodeName, "expires": time.time() + self.duration})
+
+    def _is_own(self, lease_file):
+        """ Check whether the lease file belongs to this node (False if it doesn't exist, or if it is a new lease of
+        another node being written right now) """
+
+        try:
+            with open(lease_file, 'r') as file:
+                return json.load(file)["node"] == self.nodeName
+        except (FileNotFoundError, ValueError, KeyError):
+            return False
+
+    def _is_expired(self, lease_file):
+
+        try:
+            with open(lease_file, 'r') as file:
+                try:
+                    expiry_time = json.load(file)["expires"]
+                except (ValueError, KeyError):
+                    # The lease is being written right now -> a new lease, unless it's an old broken file:
+                    expiry_time = os.path.getmtime(lease_file) + self.duration
+        except FileNotFoundError:
+            return False                                # released in the meantime
+
+        return time.time() > expiry_time
+
+    def _break(self, lease_file):
+        """ Remove an expired lease. Only one of the nodes can rename the file; if a new lease was created in the
+        meantime (the renamed file isn't expired), it is put back. """
+
+        expired_file = lease_file + "." + self.nodeName + ".expired"
+
+        try:
+            os.rename(lease_file, expired_file)
+        except FileNotFoundError:
+            return
+
+        if not self._is_expired(expired_file):
+            try:
+                os.link(expired_file, lease_file)       # fails if yet another lease exists
+            except OSError:
+                pass
+
+        os.remove(expired_file)
@@ -0,0 +1,162 @@
+import os
+import json
+import sqlite3
+from openpyxl import Workbook, load_workbook
+
+from fluxminator.Constants import *
+
+
+class MetricsStore:
+    """ Sidecar store of the summary rows inside the Results folder (SQLite): the rows of the summary sheets are
+    appended as the simulations are processed, the rows of a simulation are committed together. Summary.xlsx is
+    generated from the store in one streaming pass (write-only workbook), so the rows are never serialized again
+    and again, and the continued executions don't have to load the workbook. """
+
+    def __init__(self, results_path):
+
+        self.path = os.path.join(results_path, METRICS_STORE_FILE)
+        self.connection = None
+
+        self.sheetNames = []                # in the order of the workbook
+        self.rowNumbers = {}                # key=sheet name; value=number of the rows (with the header rows)
+
+    def get_path(self): return self.path
+    def get_sheetNames(self): return self.sheetNames
+    def get_rowNumber(self, sheet_name): return self.rowNumbers.get(sheet_name, 0)
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def open(self):
+        """ Open (or create) the store and read its sheets """
+
+        self.connection = MetricsStore._connect(self.path)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS sheets (sheet INTEGER PRIMARY KEY, name TEXT)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS rows (sheet INTEGER, row INTEGER, data TEXT, "
+                                "PRIMARY KEY (sheet, row))")
+        self.connection.commit()
+
+        self.sheetNames = [name for name, in self.connection.execute("SELECT name FROM sheets ORDER BY sheet")]
+        self.rowNumbers = {name: 0 for name in self.sheetNames}
+
+        for sheet, row_number in self.connection.execute("SELECT sheet, MAX(row) FROM rows GROUP BY sheet"):
+            self.rowNumbers[self.sheetNames[sheet]] = row_number
+
+    def close(self):
+        """ The rows which weren't committed are dropped """
+
+        if self.connection is not None:
+            self.connection.rollback()
+            self.connection.close()
+            self.connection = None
+
+    def create(self, sheet_names, header_rows):
+        """ Start the store again with the sheets, every sheet begins with the header rows (committed with the first
+        row of values) """
+
+        self.connection.execute("DELETE FROM rows")
+        self.connection.execute("DELETE FROM sheets")
+
+        self.sheetNames = list(sheet_names)
+        self.rowNumbers = {}
+
+        for sheet, name in enumerate(self.sheetNames):
+            self.connection.execute("INSERT INTO sheets VALUES (?, ?)", (sheet, name))
+            self.rowNumbers[name] = 0
+
+            for header_row in header_rows:
+                self.append(name, header_row)
+
+    def append(self, sheet_name, values):
+        """ Append a row to the sheet (not committed yet) """
+
+        self.rowNumbers[sheet_name] += 1
+        self.connection.execute("INSERT INTO rows VALUES (?, ?, ?)",
+                                (self.sheetNames.index(sheet_name), self.rowNumbers[sheet_name],
+                                 json.dumps(list(values), default=MetricsStore._json_value)))
+
+    def commit(self):
+        self.connection.commit()
+
+    def truncate(self, row_number):
+        """ Keep the first row_number rows of every sheet (e.g. the rows after the last summarized one of the journal)"""
+
+        self.connection.execute("DELETE FROM rows WHERE row > ?", (row_number,))
+        self.connection.commit()
+
+        self.rowNumbers = {name: min(number, row_number) for name, number in self.rowNumbers.items()}
+
+    def get_row(self, sheet_name, row):
+        """ Values of a row of the sheet (from 1, like in Excel), None if there is no such row """
+
+        data = self.connection.execute("SELECT data FROM rows WHERE sheet = ? AND row = ?",
+                                       (self.sheetNames.index(sheet_name), row)).fetchone()
+
+        return json.loads(data[0]) if data is not None else None
+
+    def iter_rows(self, sheet_name, min_row=1):
+        """ Values of the rows of the sheet from min_row (read in blocks) """
+
+        return MetricsStore._iter_rows(self.connection, self.sheetNames.index(sheet_name), min_row,
+                                       self.get_rowNumber(sheet_name))
+
+    def import_workbook(self, summary_path):
+        """ Fill the store from an existing Summary.xlsx (projects created before the store) """
+
+        wb_summary = load_workbook(summary_path, read_only=True)
+
+        self.create(wb_summary.sheetnames, [])
+        for ws_summary in wb_summary.worksheets:
+            for row in ws_summary.iter_rows(values_only=True):
+                self.append(ws_summary.title, row)
+
+        self.commit()
+        wb_summary.close()
+
+    def export(self, summary_path):
+        """ Write the committed rows into Summary.xlsx in one streaming pass; it uses its own connection, so it can run
+        in another thread while the rows are appended. The file is replaced at the end (a crash doesn't leave a broken
+        file). """
+
+        connection = MetricsStore._connect(self.path)
+
+        try:
+            # The rows committed until now (the rows are only appended):
+            sheets = connection.execute("SELECT sheets.sheet, sheets.name, MAX(rows.row) FROM sheets "
+                                        "LEFT JOIN rows ON rows.sheet = sheets.sheet "
+                                        "GROUP BY sheets.sheet ORDER BY sheets.sheet").fetchall()
+
+            wb_summary = Workbook(write_only=True)
+            for sheet, name, row_number in sheets:
+                ws_summary = wb_summary.create_sheet(name)
+
+                for values in MetricsStore._iter_rows(connection, sheet, 1, row_number or 0):
+                    ws_summary.append(values)
+        finally:
+            connection.close()
+
+        wb_summary.save(summary_path + ".tmp")
+        os.replace(summary_path + ".tmp", summary_path)
+
+    @staticmethod
+    def _connect(path):
+        """ The other connection waits for the commit or for the reading of a block instead of failing """
+
+        return sqlite3.connect(path, timeout=METRICS_STORE_TIMEOUT)
+
+    @staticmethod
+    def _iter_rows(connection, sheet, min_row, max_row):
+        """ Read the rows in blocks, so the database isn't locked for the whole reading """
+
+        for first_row in range(min_row, max_row + 1, METRICS_STORE_BLOCK_SIZE):
+            last_row = min(first_row + METRICS_STORE_BLOCK_SIZE - 1, max_row)
+
+            for data, in connection.execute("SELECT data FROM rows WHERE sheet = ? AND row BETWEEN ? AND ? "
+                                            "ORDER BY row", (sheet, first_row, last_row)).fetchall():
+                yield json.loads(data)
+
+    @staticmethod
+    def _json_value(value):
+        """ NumPy scalars of the metrics """
+
+        return value.item()
@@ -3,7 +3,16 @@ import math
 import numpy as np
 import xlrd
 
+from openpyxl import Workbook, load_workbook
+from openpyxl.styles import NamedStyle
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.formatting.rule import ColorScaleRule
+from openpyxl.utils import get_column_letter
+
 from fluxminator.Constants import *
+from fluxminator.Design import create_design_table
+from fluxminator.ParameterTable import ParameterTable
+from fluxminator.Constraint import feasible_rows, read_constraints
 
 
 class Range:
@@ -115,15 +124,17 @@ class Parameter:
 
 class Motor:
 
-    def __init__(self, slot=0, pole=0, params=[]):
+    def __init__(self, slot=0, pole=0, params=None):
 
         self.numberSlot = slot
         self.numberPole = pole
 
-        self.parameters = params                    # list of Parameter objects
+        self.parameters = params if params is not None else []      # list of Parameter objects
         self.specialParameterCombinations = {}              # key=parameter_name; value=[values...]
         self.specialRowNumber = 0
 
+        self.constraints = []                               # expressions over the parameter names (see Constraint)
+
         self.parameterSetExcelPath = ""
 
     ''' Getters & Setters: '''
@@ -149,6 +160,12 @@ class Motor:
     def get_specialRowNumber(self) -> int:
         return self.specialRowNumber
 
+    def get_constraints(self) -> list:
+        return self.constraints
+
+    def set_constraints(self, c) -> None:
+        self.constraints = c
+
     def get_parameterSetExcelPath(self) -> str:
         return self.parameterSetExcelPath
 
@@ -220,92 +237,161 @@ class Motor:
         self.parameters = []
         self.specialParameterCombinations = {}
         self.specialRowNumber = 0
+        self.constraints = []
 
         self.parameterSetExcelPath = ""
 
     ''' Functions for creating the parameter table and the excel file for the simulations '''
 
-    def create_final_parameter_set(self) -> list:
-        """ Generate the parameter table with all parameter combinations, including special sets """
+    def create_final_parameter_set(self) -> ParameterTable:
+        """ Generate the parameter table with all parameter combinations, including special sets. The table is lazy
+        (see ParameterTable): the rows are decoded from their index, so the size of the grid isn't limited by the
+        memory. """
 
-        row_number = 1                                      # initialization - number of rows in the parameter table
-        list_of_parameter_sets = []                         # lists in list (EXAMPLE: [[A1, A2], [B1], [C1, C2, C3]])
+        value_lists = [parameter.range.get_all_values() for parameter in self.parameters]
 
-        for parameter in self.parameters:
+        # Geometrically impossible combinations are dropped (the special sets are always simulated):
+        parameter_table = ParameterTable(value_lists, self.feasible_rows if len(self.constraints) > 0 else None)
 
-            parameter_set = parameter.range.get_all_values()
-            list_of_parameter_sets.append(parameter_set)
+        self._add_special_parameter_sets(parameter_table)
 
-            row_number *= len(parameter_set)                # refresh row number - without special combinations!
+        return parameter_table
 
-        # PARAMETER TABLE: Descartes-product of the parameter values (at this point: without special combinations)
+    def create_design_parameter_set(self, design, row_number, seed=None) -> list:
+        """ Generate the parameter table with a space-filling (Latin hypercube, Sobol, Halton) or a fractional
+        factorial design of the parameter ranges instead of all the combinations, including special sets """
 
-        parameter_table = [[] for _ in range(row_number)]
+        if design == DESIGN_CARTESIAN:
+            return self.create_final_parameter_set()
 
-        iteration_size = 1                                  # number of consecutive identical values in the table column
+        value_lists = [parameter.range.get_all_values() for parameter in self.parameters]
 
-        ''' EXAMPLE '''
-        # Parameter       Iteration size
-        # A[1,2]          IT_A = 1 (default)
-        # B[1]            IT_B = IT_A * len(A) = 2
-        # C[1,2,3]        IT_C = IT_B * len(B) = 2
-
-        #################
-        #   A   B   C   #
-        #   1   1   1   #
-        #   2   1   1   #
-        #   1   1   2   #
-        #   2   1   2   #
-        #   1   1   3   #
-        #   2   1   3   #
-        #################
-
-        for p_set in list_of_parameter_sets:
-
-            row_index = 0                                               # start from 0 for all columns in the table
-            for big_step in range(int(row_number/iteration_size)):      # steps between iterations
-                for small_step in range(iteration_size):                # steps within an iteration
-                    p_index = big_step % len(p_set)
-                    parameter_table[row_index].append(p_set[p_index])   # add the upcoming value in the column
-                    row_index += 1
-
-            iteration_size *= len(p_set)                                # set next iteration size (see EXAMPLE above)
-
-        # ADD THE CUSTOMIZED COMBINATIONS TO THE PARAMETER TABLE (only if they are unique!):
+        feasible = self.feasible_rows if len(self.constraints) > 0 else None
+        parameter_table = create_design_table(value_lists, design, row_number, seed, feasible)
+
+        self._add_special_parameter_sets(parameter_table)
+
+        return parameter_table
+
+    def read_parameter_table_excel(self, path) -> None:
+        """ Load the parameters (with their ranges) and the constraints of an existing parameter set file; the ranges
+        of the files without a Ranges sheet are derived from the values of the table """
+
+        wb = load_workbook(path)
+        ws = wb.worksheets[0]
+
+        self.parameters = []
+
+        if PARAMETER_RANGE_SHEET in wb.sheetnames:
+            for row in wb[PARAMETER_RANGE_SHEET].iter_rows(min_row=2, values_only=True):
+                self.parameters.append(Parameter(type_=row[0], name=row[1], desc=row[2],
+                                                 range_=Range(min_=row[3], max_=row[4], step=row[5])))
+        else:
+            header_rows = list(ws.iter_rows(min_row=1, max_row=3, values_only=True))
+            columns = list(zip(*ws.iter_rows(min_row=4, values_only=True)))
+
+            for col in range(1, ws.max_column):
+                values = sorted(set(columns[col])) if len(columns) > 0 else [0.0]
+                step = round(float(np.min(np.diff(values))), 2) if len(values) > 1 else 0
+                self.parameters.append(Parameter(type_=header_rows[0][col], name=header_rows[1][col],
+                                                 desc=header_rows[2][col],
+                                                 range_=Range(min_=values[0], max_=values[-1], step=step)))
+
+        self.constraints = read_constraints(wb)
+        self.parameterSetExcelPath = path
+
+        wb.close()
+
+    def count_parameter_sets(self, design=DESIGN_CARTESIAN, row_number=0) -> int:
+        """ Return the number of rows of the parameter table without creating it (the constraints are evaluated on
+        the grid of the parameter values), including the special sets """
+
+        return self.estimate_parameter_sets(design, row_number, exact=True)[0]
+
+    def estimate_parameter_sets(self, design=DESIGN_CARTESIAN, row_number=0, exact=False):
+        """ Return the number of rows of the parameter table (including the special sets) and whether it is an
+        estimate: the valid rows of a grid larger than ROW_COUNT_EXACT_LIMIT are estimated from a random sample of
+        the grid, unless the exact number is requested """
+
+        if len(self.parameters) == 0:
+            return 0, False
+
+        value_lists = [parameter.range.get_all_values() for parameter in self.parameters]
+        feasible = self.feasible_rows if len(self.constraints) > 0 else None
+        estimated = False
+
+        # Fractional factorial: the rows of the 2^(k-p) design (a power of 2, can be more than the given number)
+        if design == DESIGN_FRACTIONAL_FACTORIAL:
+            return len(create_design_table(value_lists, design, row_number, feasible=feasible)) \
+                + self.specialRowNumber, False
+
+        grid_table = ParameterTable(value_lists)
+        grid_row_number = grid_table.get_gridRowNumber()
+
+        if feasible is not None:
+            if exact or grid_row_number <= ROW_COUNT_EXACT_LIMIT:
+                # The constraints are evaluated chunk by chunk on the lazy table of the grid (the rows aren't kept):
+                grid_row_number = sum(int(np.count_nonzero(feasible(chunk))) for chunk in grid_table.iter_chunks())
+            else:
+                grid_row_number = self._estimate_feasible_row_number(value_lists, grid_row_number)
+                estimated = True
+
+        # Sampling designs: the given number of rows
+        if design != DESIGN_CARTESIAN:
+            grid_row_number = min(grid_row_number, row_number)
+
+        return grid_row_number + self.specialRowNumber, estimated
+
+    def _estimate_feasible_row_number(self, value_lists, grid_row_number) -> int:
+        """ Estimate the number of the valid rows of the grid from random rows (drawn value by value, so the rank of
+        the rows isn't needed, even if the grid is larger than the int64 range) """
+
+        random = np.random.default_rng(0)
+        sample = np.stack([np.asarray(values, dtype=np.float64)[random.integers(0, len(values), ROW_COUNT_SAMPLE_SIZE)]
+                           for values in value_lists], axis=1)
+
+        return round(grid_row_number * int(np.count_nonzero(self.feasible_rows(sample))) / ROW_COUNT_SAMPLE_SIZE)
+
+    def feasible_rows(self, parameter_table):
+        """ Return the boolean mask of the rows of the parameter table satisfying every constraint """
+
+        return feasible_rows(self.constraints, [parameter.get_name() for parameter in self.parameters],
+                             parameter_table, {CONSTRAINT_SLOT_NUMBER: self.numberSlot,
+                                               CONSTRAINT_POLE_NUMBER: self.numberPole})
+
+    def _add_special_parameter_sets(self, parameter_table) -> None:
+        """ Add the customized combinations to the parameter table (only if they are unique!); the lazy table of the
+        full grid finds a row by its values without searching the rows """
 
         ''' EXAMPLE '''
         # specialParameterSets dictionary (specialRowNumber = 3):
         # specialParameterSets[A] = [1, 10, 100]
         # specialParameterSets[B] = [1, 5, 1]
         # specialParameterSets[C] = [1, 0.5, 0.1]
-        # The custom combination A[0], B[0], C[0] is not unique; it already exists in the table (see EXAMPLE above).
+        # The custom combination A[0], B[0], C[0] is not unique; it already exists in the table (see the EXAMPLE of
+        # ParameterTable).
 
         for spec_row_index in range(self.specialRowNumber):             # check all the custom combinations
 
-            unique = False                                  # ensure that the custom combination (row) is unique
-            spec_param_combination = []                     # list for the custom combination (row)
-
-            for parameter in self.parameters:               # access the custom values based on the parameter names
+            # The custom combination (row), the values are accessed based on the parameter names:
+            spec_param_combination = [self.specialParameterCombinations[parameter.get_name()][spec_row_index]
+                                      for parameter in self.parameters]
 
-                parameter_name = parameter.get_name()
-                spec_parameter_value = self.specialParameterCombinations[parameter_name][spec_row_index]
-
-                if not unique:                              # one unique value is enough for a unique combination (row)
-                    unique = not parameter.range.is_value_in_range(spec_parameter_value)
-
-                spec_param_combination.append(spec_parameter_value)
-
-            if unique:
+            if spec_param_combination not in parameter_table:
                 parameter_table.append(spec_param_combination)
 
-        # self.create_parameter_set_excel_file(parameter_table)
-        return parameter_table
+    def create_parameter_table_excel(self, parameter_table, model_path, report_progress=None):
+        """ Create excel file (Sets.xlsx) for the simulations with the parameter combinations. The rows are streamed
+        into a write-only workbook (the memory use doesn't grow with the rows), the cells refer to the named styles of
+        SETS_STYLES registered once in the workbook. report_progress(written rows, all rows) is called after every
+        SETS_PROGRESS_ROWS rows (e.g. by the thread of the parameter set creator). """
 
-    def create_parameter_table_excel(self, parameter_table, model_path):
-        """ Create excel file (Sets.xlsx) for the simulations with the parameter combinations """
+        wb = Workbook(write_only=True)                  # excel file, the rows are written out as they are appended
+        for name, style in SETS_STYLES.items():
+            wb.add_named_style(NamedStyle(name=name, **style))
 
-        wb = Workbook()                 # excel file
-        ws = wb.active                  # active sheet
+        ws = wb.create_sheet()
+        ws.column_dimensions['A'].width = 25            # the format of the columns has to precede the rows
 
         # HEADER:
 
@@ -318,43 +404,33 @@ class Motor:
             name_row.append(parameter.get_name())
             desc_row.append(parameter.get_desc())
 
-        ws.append(type_row)
-        ws.append(name_row)
-        ws.append(desc_row)
+        for header_row, style in zip([type_row, name_row, desc_row],
+                                     [SETS_STYLE_HEADER, SETS_STYLE_HEADER, SETS_STYLE_DESCRIPTION]):
+            ws.append([Motor._styled_cell(ws, header_row[0], SETS_STYLE_HEADER_ID)] +
+                      [Motor._styled_cell(ws, value, style) for value in header_row[1:]])
 
         # DATA:
 
         row_number = len(parameter_table)
         parameter_number = len(self.parameters)
 
-        for i in range(row_number):
-            new_row = ["No-%04d" % (i + 1)]
-            new_row.extend(parameter_table[i])
-            ws.append(new_row)
-
-        # FORMAT:
+        # The styled cells are created once and reused for every row (an appended row is written out immediately):
+        row_cells = [Motor._styled_cell(ws, None, SETS_STYLE_ID)] + \
+                    [Motor._styled_cell(ws, None, SETS_STYLE_VALUE) for _ in range(parameter_number)]
+        last_row_cells = [Motor._styled_cell(ws, None, SETS_STYLE_LAST_ID)] + \
+                         [Motor._styled_cell(ws, None, SETS_STYLE_LAST_VALUE) for _ in range(parameter_number)]
 
-        ws.column_dimensions['A'].width = 25
+        for i, parameter_values in enumerate(parameter_table):
+            cells = last_row_cells if i == row_number - 1 else row_cells              # last row in the sheet
 
-        for row in range(1, row_number + 4):                            # header rows + data rows
-            for col in range(1, parameter_number + 2):
+            cells[0].value = "No-%04d" % (i + 1)
+            for cell, value in zip(cells[1:], parameter_values):
+                cell.value = value
 
-                if col == 1 or row < 4:                                 # parameter combination (simulation) ID / header
-                    if col != 1 and row == 3:
-                        ws.cell(row=row, column=col).font = Font(color="FFFFFF")
-                    else:
-                        ws.cell(row=row, column=col).font = Font(bold=True, color="FFFFFF")
-                    ws.cell(row=row, column=col).fill = THYSSEN_FILL
+            ws.append(cells)
 
-                if row < 4:                                                     # header
-                    ws.cell(row=row, column=col).border = DEFAULT_BORDER
-                elif row == row_number + 3:                                     # last row in the sheet
-                    ws.cell(row=row, column=col).border = BOTTOM_BORDER
-                else:
-                    ws.cell(row=row, column=col).border = VERTICAL_BORDER
-
-                if col > 1 or row > 3:
-                    ws.cell(row=row, column=col).alignment = Alignment(horizontal='center')
+            if report_progress is not None and ((i + 1) % SETS_PROGRESS_ROWS == 0 or i == row_number - 1):
+                report_progress(i + 1, row_number)
 
         rule = ColorScaleRule(start_type='percentile', start_value=10,          # color scale for data
                               start_color='DAEEF3', end_type='percentile',
@@ -365,6 +441,26 @@ class Motor:
             rule_range = '{0}4:{0}{1}'.format(col_letter, row_number + 4)
             ws.conditional_formatting.add(rule_range, rule)
 
+        # PARAMETER RANGES (the search space of the rows added later):
+
+        ws_ranges = wb.create_sheet(PARAMETER_RANGE_SHEET)
+        ws_ranges.append([Motor._styled_cell(ws_ranges, title, SETS_STYLE_TITLE)
+                          for title in ["Type", "Name", "Description", "Min", "Max", "Step"]])
+
+        for parameter in self.parameters:
+            ws_ranges.append([parameter.get_type(), parameter.get_name(), parameter.get_desc(),
+                              parameter.range.get_min(), parameter.range.get_max(), parameter.range.get_step()])
+
+        # CONSTRAINTS (the rows added later, e.g. by the grid refinement, have to satisfy them too):
+
+        if len(self.constraints) > 0:
+            ws_constraints = wb.create_sheet(CONSTRAINT_SHEET)
+            ws_constraints.column_dimensions['A'].width = 60
+            ws_constraints.append([Motor._styled_cell(ws_constraints, "Constraints", SETS_STYLE_TITLE)])
+
+            for expression in self.constraints:
+                ws_constraints.append([expression])
+
         # SAVE:
 
         path = model_path + "/Results"
@@ -378,6 +474,15 @@ class Motor:
         except IOError:
             raise
 
+    @staticmethod
+    def _styled_cell(ws, value, style):
+        """ Cell of a write-only sheet with a named style of the workbook """
+
+        cell = WriteOnlyCell(ws, value)
+        cell.style = style
+
+        return cell
+
 
 class FluxModel:
 
@@ -477,6 +582,21 @@ class Model:
         self.deleteScenarioSolutions = True
         self.priceCalculation = False   # future development
 
+        self.workerNumber = 1           # number of Flux processes running in parallel
+        self.pipelinedExecution = False # Flux computes the next row during the processing of the actual one
+        self.simulationTimeout = 0      # time limit of one simulation [min], 0: no limit
+        self.parserProcessNumber = 1    # processes parsing the ripple result files in parallel, 1: no extra process
+        self.fluxExecutable = ""        # executable instead of the one of the Flux installation (e.g. the stand-in)
+        self.distributedExecution = False   # several nodes share the rows through the Results folder
+        self.nodeName = ""              # name of this node in the multi-node execution mode
+        self.simulationCache = False    # reuse the raw result files of identical simulations (from any project)
+        self.waveformStore = False      # keep the waveforms of every row in the memory-mapped store (Results folder)
+        self.checkpointRows = SUMMARY_CHECKPOINT_ROWS       # Summary.xlsx is saved after this many rows, 0: never
+        self.checkpointTime = SUMMARY_CHECKPOINT_TIME       # [s] or after this much time, 0: never
+        self.cacheDirectory = SIMULATION_CACHE_DIRECTORY
+        self.surrogateBounds = {}       # region of interest of the metrics (key=metric; value=[min, max]), {}: no skip
+        self.surrogateConfidence = SURROGATE_CONFIDENCE
+
         self.scenarioCogging = True
         self.scenarioRipple = True
         self.depLoad = False           # multi I
@@ -497,6 +617,8 @@ class Model:
         self.progressState = 0
         self.simulationTimes = []
 
+        self.completedSimulations = set()   # IDs simulated by the workers, but not processed yet (after STOP)
+
         self.summarySavingProblem = False
 
     ''' Getters & Setters: '''
@@ -514,6 +636,50 @@ class Model:
     def get_deleteScenarioSolutions(self): return self.deleteScenarioSolutions
     def set_deleteScenarioSolutions(self, b): self.deleteScenarioSolutions = b
 
+    def get_workerNumber(self): return self.workerNumber
+    def set_workerNumber(self, n): self.workerNumber = n
+
+    def is_pipelinedExecution(self): return self.pipelinedExecution
+    def set_pipelinedExecution(self, b): self.pipelinedExecution = b
+
+    def get_simulationTimeout(self): return self.simulationTimeout
+    def set_simulationTimeout(self, t): self.simulationTimeout = t
+
+    def get_parserProcessNumber(self): return self.parserProcessNumber
+    def set_parserProcessNumber(self, n): self.parserProcessNumber = n
+
+    def get_fluxExecutable(self): return self.fluxExecutable
+    def set_fluxExecutable(self, p): self.fluxExecutable = p
+
+    def is_distributedExecution(self): return self.distributedExecution
+    def set_distributedExecution(self, b): self.distributedExecution = b
+
+    def get_nodeName(self): return self.nodeName
+    def set_nodeName(self, n): self.nodeName = n
+
+    def is_simulationCache(self): return self.simulationCache
+    def set_simulationCache(self, b): self.simulationCache = b
+
+    def is_waveformStore(self): return self.waveformStore
+    def set_waveformStore(self, b): self.waveformStore = b
+
+    def get_checkpointRows(self): return self.checkpointRows
+    def set_checkpointRows(self, n): self.checkpointRows = n
+
+    def get_checkpointTime(self): return self.checkpointTime
+    def set_checkpointTime(self, t): self.checkpointTime = t
+
+    def get_cacheDirectory(self): return self.cacheDirectory
+    def set_cacheDirectory(self, d): self.cacheDirectory = d
+
+    def is_surrogateModel(self): return len(self.surrogateBounds) > 0
+
+    def get_surrogateBounds(self): return self.surrogateBounds
+    def set_surrogateBounds(self, b): self.surrogateBounds = b
+
+    def get_surrogateConfidence(self): return self.surrogateConfidence
+    def set_surrogateConfidence(self, c): self.surrogateConfidence = c
+
     # Scenario parameters:
     def is_scenarioCogging(self): return self.scenarioCogging
 
@@ -555,6 +721,11 @@ class Model:
     def set_simulationTimes(self, t): self.simulationTimes = t
     def extend_simulationTimes(self, t): self.simulationTimes.append(t)
 
+    def is_completedSimulation(self, i): return i in self.completedSimulations
+    def add_completedSimulation(self, i): self.completedSimulations.add(i)
+    def remove_completedSimulation(self, i): self.completedSimulations.discard(i)
+    def clear_completedSimulations(self): self.completedSimulations = set()
+
     def get_summarySavingProblem(self): return self.summarySavingProblem
     def set_summarySavingProblem(self, b): self.summarySavingProblem = b
 
@@ -567,49 +738,21 @@ class Model:
         # Cogging related data:
         if self.scenarioCogging:
             project_info_cogging_data = self.fluxModel.positionCogging.print_range()
-            channel_data_cogging = project_info_cogging_data + "\n"
         else:
             project_info_cogging_data = '-'
-            channel_data_cogging = "0.0 0.0 0.0\n"
 
         # Ripple related data:
         if self.scenarioRipple:
             project_info_ripple_data = self.fluxModel.positionRipple.print_range()
-            channel_data_ripple = project_info_ripple_data + "\n"
-
             project_info_current_data = self.fluxModel.rangeCurrent.print_range()
-            channel_data_current = self.fluxModel.get_nameCurrent() + " " + project_info_current_data + "\n"
-
             project_info_gamma_data = self.fluxModel.rangeGamma.print_range()
-            channel_data_gamma = self.fluxModel.get_nameGamma() + " " + project_info_gamma_data + "\n"
-
-            if self.fluxModel.rangeCurrent.get_numberOfSteps() == 1:
-                project_info_ripple_type = "MONO_I_"
-                channel_data_ripple_type = "MONO_I_"
-            else:
-                project_info_ripple_type = "MULTI_I_"
-                channel_data_ripple_type = "MULTI_I_"
-            if self.fluxModel.rangeGamma.get_numberOfSteps() == 1:
-                project_info_ripple_type += "MONO_G"
-                channel_data_ripple_type += "MONO_G"
-            else:
-                project_info_ripple_type += "MULTI_G"
-                channel_data_ripple_type += "MULTI_G"
-
+            project_info_ripple_type = self._ripple_type()
         else:
             project_info_ripple_type = "-"
             project_info_ripple_data = "-"
             project_info_gamma_data = "-"
             project_info_current_data = "-"
 
-            channel_data_ripple_type = "None"
-            channel_data_ripple = "0.0 0.0 0.0\n"
-            channel_data_current = self.fluxModel.get_nameCurrent() + " 0.0 0.0 0.0\n"
-            channel_data_gamma = self.fluxModel.get_nameGamma() + " 0.0 0.0 0.0\n"
-
-        # Price calculation dependent data: TODO FUTURE DEVELOPMENT
-        data_for_price_calculation = "Tooth\nRotor\nMagnet\nNone\n"
-
         # CREATE PROJECT_INFO.XLSX
         wb = Workbook()
         ws = wb.active
@@ -630,6 +773,94 @@ class Model:
         ws.append(["Current source name", self.fluxModel.get_nameCurrentSource()])
         ws.append(["Delete results", self.deleteScenarioSolutions])
 
+        self.create_channel_data()
+
+        path = self.fluxModel.get_modelPath() + "/Results"
+
+        if not os.path.exists(path):
+            os.makedirs(path)
+        try:
+            wb.save(path + "/Project_Info.xlsx")
+            self.projectInfoFilePath = path + "/Project_Info.xlsx"
+        except IOError:
+            raise
+
+    def read_project_info_file(self):
+        """ In the event of continuing a simulation already in progress or creating only a summary file, load the
+        scenario settings from the project info file (Results/Project_Info.xlsx) and create the channel data template
+        (the parameter set file is Results/Sets.xlsx) """
+
+        path = self.fluxModel.get_modelPath() + "/Results"
+
+        self.fluxModel.motor.set_parameterSetExcelPath(path + "/Sets.xlsx")
+
+        wb = load_workbook(path + "/Project_Info.xlsx")
+        ws = wb.worksheets[0]
+
+        # MOTOR:
+        self.fluxModel.motor.set_numberSlot(ws.cell(row=2, column=2).value)
+        self.fluxModel.motor.set_numberPole(ws.cell(row=3, column=2).value)
+
+        # SCENARIO:
+        scenario_id = ws.cell(row=4, column=2).value
+
+        self.set_scenarioCogging(scenario_id != "2")
+        self.set_scenarioRipple(scenario_id != "1")
+
+        # COGGING & RIPPLE (min max step):
+        ranges = [[5, self.fluxModel.positionCogging, self.scenarioCogging],
+                  [6, self.fluxModel.positionRipple, self.scenarioRipple],
+                  [8, self.fluxModel.rangeCurrent, self.scenarioRipple],
+                  [9, self.fluxModel.rangeGamma, self.scenarioRipple]]
+
+        for row, range_, in_scenario in ranges:
+            values = ws.cell(row=row, column=2).value.split(" ") if in_scenario else [0, 0, 0]
+
+            range_.set_min(float(values[0]))
+            range_.set_max(float(values[1]))
+            range_.set_step(float(values[2]))
+
+        # GAMMA & CURRENT:
+        self.depGamma = ws.cell(row=10, column=2).value
+        self.depLoad = ws.cell(row=11, column=2).value
+
+        self.fluxModel.set_nameGamma(ws.cell(row=12, column=2).value)
+        self.fluxModel.set_nameCurrent(ws.cell(row=13, column=2).value)
+        self.fluxModel.set_nameCurrentSource(ws.cell(row=14, column=2).value)
+
+        self.deleteScenarioSolutions = ws.cell(row=15, column=2).value
+
+        wb.close()
+
+        self.projectInfoFilePath = path + "/Project_Info.xlsx"
+
+        self.create_channel_data()
+
+    def create_channel_data(self):
+        """ Create the channel data template for the Flux script from the scenario settings """
+
+        # Cogging related data:
+        if self.scenarioCogging:
+            channel_data_cogging = self.fluxModel.positionCogging.print_range() + "\n"
+        else:
+            channel_data_cogging = "0.0 0.0 0.0\n"
+
+        # Ripple related data:
+        if self.scenarioRipple:
+            channel_data_ripple_type = self._ripple_type()
+            channel_data_ripple = self.fluxModel.positionRipple.print_range() + "\n"
+            channel_data_current = self.fluxModel.get_nameCurrent() + " " \
+                + self.fluxModel.rangeCurrent.print_range() + "\n"
+            channel_data_gamma = self.fluxModel.get_nameGamma() + " " + self.fluxModel.rangeGamma.print_range() + "\n"
+        else:
+            channel_data_ripple_type = "None"
+            channel_data_ripple = "0.0 0.0 0.0\n"
+            channel_data_current = self.fluxModel.get_nameCurrent() + " 0.0 0.0 0.0\n"
+            channel_data_gamma = self.fluxModel.get_nameGamma() + " 0.0 0.0 0.0\n"
+
+        # Price calculation dependent data: TODO FUTURE DEVELOPMENT
+        data_for_price_calculation = "Tooth\nRotor\nMagnet\nNone\n"
+
         # MAIN DATA FOR CHANNEL.TXT
         # placeholders: {id} -> No-000X; {params} -> values for current No-000X
 
@@ -652,16 +883,6 @@ class Model:
             + data_parameters + data_delete_results + data_current_source \
             + data_for_price_calculation
 
-        path = self.fluxModel.get_modelPath() + "/Results"
-
-        if not os.path.exists(path):
-            os.makedirs(path)
-        try:
-            wb.save(path + "/Project_Info.xlsx")
-            self.projectInfoFilePath = path + "/Project_Info.xlsx"
-        except IOError:
-            raise
-
     # Private functions:
 
     def _set_scenario_id(self):
@@ -675,3 +896,17 @@ class Model:
         else:
             self.scenarioID = "0"
 
+    def _ripple_type(self):
+        """ Ripple type for the project info file and the channel data (single or multiple current / gamma values) """
+
+        if self.fluxModel.rangeCurrent.get_numberOfSteps() == 1:
+            ripple_type = "MONO_I_"
+        else:
+            ripple_type = "MULTI_I_"
+        if self.fluxModel.rangeGamma.get_numberOfSteps() == 1:
+            ripple_type += "MONO_G"
+        else:
+            ripple_type += "MULTI_G"
+
+        return ripple_type
+
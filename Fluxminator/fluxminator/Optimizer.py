@@ -0,0 +1,148 @@
+import copy
+import numpy as np
+
+from scipy.stats import norm
+from openpyxl import load_workbook
+
+from fluxminator.Constants import *
+from fluxminator.Design import create_design_table
+from fluxminator.Surrogate import SurrogateModel
+
+
+class BayesianOptimizer:
+    """ Closed-loop optimization of a summary metric over the parameter ranges instead of the full grid. The metrics
+    of the simulated rows are modelled by a Gaussian process (SurrogateModel); the next rows are the candidates of the
+    parameter grid with the largest expected improvement of the objective, weighted by the probability of satisfying
+    the bounds of the other metrics (e.g. minimal ripple p2p % subject to T_mean >= X). """
+
+    def __init__(self, parameters, objective, bounds=None, maximize=False, load_index=1, feasible=None, seed=None):
+
+        self.parameters = parameters        # Parameter objects: the ranges are the search space
+        self.objective = objective          # metric to optimize (REFINE_METRICS)
+        self.maximize = maximize
+        self.loadIndex = load_index         # load group of the load dependent metrics (e.g. the rated current)
+        self.feasible = feasible            # function returning the boolean mask of the valid rows (constraints)
+        self.seed = seed
+
+        # Bounds of the metrics (key=metric; value=[min, max], None: not limited), the objective is always modelled:
+        self.bounds = dict(bounds or {})
+        self.bounds.setdefault(objective, [None, None])
+
+        self.surrogateModel = None
+
+    def get_surrogateModel(self): return self.surrogateModel
+
+    def train(self, summary_path):
+        """ Train the Gaussian process on every completed row of the summary file """
+
+        self.surrogateModel = SurrogateModel(self.bounds, min_rows=self._initial_row_number(), load_index=self.loadIndex)
+
+        wb_summary = load_workbook(summary_path)
+        self.surrogateModel.train_from_summary(wb_summary.worksheets[0])
+        wb_summary.close()
+
+    def ask(self, row_number, existing_rows):
+        """ Propose the next rows (a batch is chosen by adding the prediction of every chosen row to the model as if it
+        had been simulated); existing_rows: the rows of the parameter set file, they aren't proposed again """
+
+        existing_rows = {tuple(row) for row in existing_rows}
+        value_lists = [parameter.range.get_all_values() for parameter in self.parameters]
+
+        # Initial design (too few results for the model): space-filling rows
+        if self.surrogateModel is None or self.surrogateModel.get_trainingNumber() < self._initial_row_number():
+            design_rows = create_design_table(value_lists, DESIGN_LATIN_HYPERCUBE, row_number + len(existing_rows),
+                                              self.seed, self.feasible)
+            return [[float(value) for value in row] for row in design_rows if tuple(row) not in existing_rows][:row_number]
+
+        candidates = self._candidates(value_lists, existing_rows)
+        surrogate_model = copy.deepcopy(self.surrogateModel)
+
+        new_rows = []
+        for _ in range(min(row_number, len(candidates))):
+
+            means, stds = surrogate_model.predict_table(candidates)
+            best_index = int(np.argmax(self._acquisition(means, stds)))
+
+            new_rows.append([float(value) for value in candidates[best_index]])
+            surrogate_model.add(candidates[best_index], means[best_index])
+
+            del candidates[best_index]
+
+        return new_rows
+
+    def best(self):
+        """ Return the best simulated row satisfying the bounds and its objective, or (None, None) """
+
+        if self.surrogateModel is None or self.surrogateModel.get_trainingNumber() == 0:
+            return None, None
+
+        metrics = self.surrogateModel.metrics
+        objective_index = metrics.index(self.objective)
+        sign = -1 if self.maximize else 1
+
+        best_point, best_value = None, None
+        for point, values in zip(self.surrogateModel.points, self.surrogateModel.values):
+
+            if not all(BayesianOptimizer._is_in_bounds(value, self.bounds[metric])
+                       for metric, value in zip(metrics, values)):
+                continue
+
+            if best_value is None or sign * values[objective_index] < sign * best_value:
+                best_point, best_value = point, values[objective_index]
+
+        return best_point, best_value
+
+    def _candidates(self, value_lists, existing_rows):
+        """ Candidate rows: a space-filling sample of the grid (global search) and the grid neighbours of the best row
+        (local search); the rows violating the constraints and the existing rows are left out """
+
+        candidates = [tuple(row) for row in create_design_table(value_lists, DESIGN_LATIN_HYPERCUBE,
+                                                                OPTIMIZER_CANDIDATE_NUMBER, self.seed, self.feasible)]
+
+        best_point = self.best()[0]
+        for axis, values in enumerate(value_lists if best_point is not None else []):
+            position = int(np.argmin(np.abs(np.array(values) - best_point[axis])))
+
+            for neighbour_position in [position - 1, position + 1]:
+                if 0 <= neighbour_position < len(values):
+                    neighbour = list(best_point)
+                    neighbour[axis] = values[neighbour_position]
+                    if self.feasible is None or self.feasible([neighbour])[0]:
+                        candidates.append(tuple(neighbour))
+
+        return [list(row) for row in dict.fromkeys(candidates) if row not in existing_rows]
+
+    def _acquisition(self, means, stds):
+        """ Expected improvement of the objective times the probability of satisfying the bounds of the metrics """
+
+        metrics = self.surrogateModel.metrics
+        objective_index = metrics.index(self.objective)
+
+        probability = np.ones(len(means))
+        for i, metric in enumerate(metrics):
+            lower, upper = self.bounds[metric]
+            std = np.maximum(stds[:, i], 1e-12)
+
+            upper_probability = norm.cdf((upper - means[:, i]) / std) if upper is not None else 1.0
+            lower_probability = norm.cdf((lower - means[:, i]) / std) if lower is not None else 0.0
+            probability *= upper_probability - lower_probability
+
+        best_value = self.best()[1]
+        if best_value is None:                          # no feasible row yet: find one
+            return probability
+
+        sign = -1 if self.maximize else 1
+        std = np.maximum(stds[:, objective_index], 1e-12)
+        improvement = sign * (best_value - means[:, objective_index])
+
+        z = improvement / std
+        expected_improvement = improvement * norm.cdf(z) + std * norm.pdf(z)
+
+        return expected_improvement * probability
+
+    def _initial_row_number(self):
+        return max(OPTIMIZER_INITIAL_ROWS, len(self.parameters) + 1)
+
+    @staticmethod
+    def _is_in_bounds(value, bounds):
+        return (bounds[0] is None or value >= bounds[0]) and (bounds[1] is None or value <= bounds[1])
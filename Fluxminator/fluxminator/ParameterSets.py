@@ -0,0 +1,148 @@
+import os
+import glob
+import numpy as np
+from openpyxl import load_workbook
+
+from fluxminator.Constants import *
+
+
+class ParameterSets:
+    """ Read-only view of Sets.xlsx for the execution: the 3 header rows, the parameter set IDs and the parameter values
+    as a float64 matrix [row, parameter]. Sets.xlsx is converted once, in one streaming pass of a read-only workbook
+    (the styled workbook is never loaded): the rows are written block by block into .npy sidecar files in the Parsed
+    folder, which are memory-mapped, so large tables don't have to fit into the memory. The sidecar files are used
+    again while Sets.xlsx is unchanged (same size & modification time). """
+
+    def __init__(self, sets_path):
+
+        self.setsPath = sets_path
+
+        # Header rows (without the ID column):
+        self.parameterTypes = []
+        self.parameterNames = []
+        self.parameterDescriptions = []
+
+        self.ids = None                         # IDs of the parameter sets
+        self.values = None                      # float64 matrix [row, parameter], memory-mapped if possible
+
+    def get_parameterTypes(self): return self.parameterTypes
+    def get_parameterNames(self): return self.parameterNames
+    def get_parameterDescriptions(self): return self.parameterDescriptions
+    def get_values(self): return self.values
+
+    def get_setNumber(self): return len(self.ids)
+    def get_ids(self): return self.ids.tolist()
+
+    def get_id(self, index):
+        """ ID of the parameter set (index: row number without the header rows, from 1 like the simulation index) """
+        return str(self.ids[index - 1])
+
+    def get_parameterValues(self, index):
+        """ Parameter values of the parameter set (index from 1) """
+        return self.values[index - 1].tolist()
+
+    def read(self):
+        """ Read the header rows, then the parameter sets from the sidecar files or from Sets.xlsx """
+
+        wb_sets = load_workbook(self.setsPath, read_only=True)
+
+        try:
+            ws_sets = wb_sets.worksheets[0]
+
+            self.parameterTypes, self.parameterNames, self.parameterDescriptions = \
+                [list(row)[1:] for row in ws_sets.iter_rows(max_row=3, values_only=True)]
+
+            file_stat = os.stat(self.setsPath)
+            sidecar_files = [os.path.join(os.path.dirname(self.setsPath), PARSED_DIRECTORY, PARSED_SETS_FILE_NAME.format(
+                os.path.basename(self.setsPath), file_stat.st_size, file_stat.st_mtime_ns, part))
+                for part in ["IDs", "Values"]]
+
+            if not self._load_sidecar_files(sidecar_files):
+                if ws_sets.max_row is None:                         # no dimension in the file: one more pass
+                    ws_sets.calculate_dimension(force=True)
+
+                self._convert(ws_sets.iter_rows(min_row=4, values_only=True), ws_sets.max_row - 3, sidecar_files)
+        finally:
+            wb_sets.close()
+
+    def close(self):
+        """ Release the memory-mapped file """
+
+        self.values = None
+
+    def _convert(self, rows, set_number, sidecar_files):
+        """ Write the IDs & the parameter values of the rows into the sidecar files (block by block); if the sidecar
+        files can't be written, the matrix is kept in the memory """
+
+        parsed_path = os.path.dirname(sidecar_files[0])
+        temporary_files = [file + ".{}.tmp".format(os.getpid()) for file in sidecar_files]
+        shape = (set_number, len(self.parameterNames))
+
+        try:
+            for old_file in glob.glob(os.path.join(glob.escape(parsed_path),
+                                                   glob.escape(os.path.basename(self.setsPath)) + ".*.npy")):
+                os.remove(old_file)
+
+            os.makedirs(parsed_path, exist_ok=True)
+            values = np.lib.format.open_memmap(temporary_files[1], mode='w+', dtype=np.float64, shape=shape)
+        except OSError:
+            values = np.empty(shape, dtype=np.float64)
+
+        ids = []
+        block = []
+        for row in rows:
+            ids.append(row[0])
+            block.append(row[1:shape[1] + 1])
+
+            if len(block) == PARAMETER_SETS_BLOCK_SIZE:
+                values[len(ids) - len(block):len(ids)] = np.array(block, dtype=np.float64)
+                block = []
+
+            if len(ids) == set_number:
+                break
+
+        if len(block) > 0:
+            values[len(ids) - len(block):len(ids)] = np.array(block, dtype=np.float64)
+
+        self.ids = np.array(ids, dtype=str)
+
+        if not isinstance(values, np.memmap):
+            self.values = values[:len(ids)]
+            return
+
+        values.flush()
+        del values
+
+        try:
+            with open(temporary_files[0], 'wb') as npy_file:
+                np.save(npy_file, self.ids)
+
+            for temporary_file, sidecar_file in zip(reversed(temporary_files), reversed(sidecar_files)):
+                os.replace(temporary_file, sidecar_file)
+
+            self.values = np.load(sidecar_files[1], mmap_mode='r')[:len(ids)]
+
+        except OSError:                                         # incomplete sidecar files: the matrix is in the memory
+            self.values = np.load(temporary_files[1] if os.path.exists(temporary_files[1]) else sidecar_files[1])
+            self.values = self.values[:len(ids)]
+
+            for temporary_file in temporary_files:
+                if os.path.exists(temporary_file):
+                    os.remove(temporary_file)
+
+    def _load_sidecar_files(self, sidecar_files):
+        """ Load the IDs & memory-map the parameter values of the sidecar files; return False if they aren't valid """
+
+        try:
+            ids = np.load(sidecar_files[0])
+            values = np.load(sidecar_files[1], mmap_mode='r')
+        except (IOError, ValueError):                           # missing or incomplete file
+            return False
+
+        if values.ndim != 2 or values.shape != (len(ids), len(self.parameterNames)):
+            return False
+
+        self.ids = ids
+        self.values = values
+
+        return True
@@ -0,0 +1,141 @@
+import math
+import numpy as np
+
+from fluxminator.Constants import *
+
+
+class ParameterTable:
+    """ Lazy parameter table of the full grid design: the Cartesian product of the parameter values is never
+    materialized, row k is decoded from its index (mixed radix: the digits are the indices of the values, the first
+    parameter changes fastest), and the index of a row is encoded from its values. The rows can be streamed in chunks
+    as NumPy arrays.
+
+    With constraints, only the grid indices (ranks) of the valid rows are kept, evaluated chunk by chunk. The special
+    combinations are appended after the rows of the grid.
+
+    EXAMPLE (A[1,2], B[1], C[1,2,3]; radices: 2, 1, 3; strides: 1, 2, 2):
+        row 0: A1 B1 C1     row 2: A1 B1 C2     row 4: A1 B1 C3
+        row 1: A2 B1 C1     row 3: A2 B1 C2     row 5: A2 B1 C3 """
+
+    def __init__(self, value_lists, feasible=None):
+
+        self.valueLists = [list(values) for values in value_lists]                  # values of every parameter
+        self.valueArrays = [np.asarray(values, dtype=np.float64) for values in self.valueLists]
+        self.valueIndices = [{value: index for index, value in enumerate(values)} for values in self.valueLists]
+
+        self.radices = [len(values) for values in self.valueLists]
+        self.strides = [math.prod(self.radices[:i]) for i in range(len(self.radices))]
+        self.gridRowNumber = math.prod(self.radices)                                # without the constraints
+
+        self.feasibleRanks = None           # sorted ranks of the rows satisfying the constraints, None: every row
+        self.specialRows = []               # customized combinations after the rows of the grid
+
+        if feasible is not None and self.gridRowNumber > 0:
+            self.feasibleRanks = np.concatenate([
+                first_rank + np.flatnonzero(feasible(self._decode(np.arange(first_rank, last_rank))))
+                for first_rank, last_rank in self._rank_chunks(0, self.gridRowNumber, PARAMETER_TABLE_CHUNK_SIZE)])
+
+    def get_parameterNumber(self): return len(self.valueLists)
+    def get_specialRows(self): return self.specialRows
+
+    def get_gridRowNumber(self):
+        """ Number of the rows of the grid satisfying the constraints (without the special combinations) """
+        return self.gridRowNumber if self.feasibleRanks is None else len(self.feasibleRanks)
+
+    def __len__(self):
+        return self.get_gridRowNumber() + len(self.specialRows)
+
+    def __getitem__(self, index):
+        """ Values of the row (list, like a row of the materialized table) """
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Parameter table index out of range: " + str(index))
+
+        if index >= self.get_gridRowNumber():
+            return list(self.specialRows[index - self.get_gridRowNumber()])
+
+        rank = index if self.feasibleRanks is None else int(self.feasibleRanks[index])
+
+        return [values[(rank // stride) % radix]
+                for values, stride, radix in zip(self.valueLists, self.strides, self.radices)]
+
+    def __iter__(self):
+
+        for chunk in self.iter_chunks():
+            yield from chunk.tolist()
+
+    def __contains__(self, values):
+
+        try:
+            self.index(values)
+        except ValueError:
+            return False
+
+        return True
+
+    def rank(self, values):
+        """ Index of the values on the grid without the constraints (None if a value isn't in its value list) """
+
+        if len(values) != len(self.valueLists):
+            return None
+
+        rank = 0
+        for value, value_indices, stride in zip(values, self.valueIndices, self.strides):
+            if value not in value_indices:
+                return None
+            rank += value_indices[value] * stride
+
+        return rank
+
+    def index(self, values):
+        """ Row index of the values (like list.index: ValueError if the row isn't in the table) """
+
+        rank = self.rank(values)
+
+        if rank is not None:
+            if self.feasibleRanks is None:
+                return rank
+
+            index = int(np.searchsorted(self.feasibleRanks, rank))
+            if index < len(self.feasibleRanks) and self.feasibleRanks[index] == rank:
+                return index
+
+        for special_index, special_row in enumerate(self.specialRows):
+            if list(special_row) == list(values):
+                return self.get_gridRowNumber() + special_index
+
+        raise ValueError("The row isn't in the parameter table: " + str(list(values)))
+
+    def append(self, values):
+        """ Append a special combination (the uniqueness is checked by the caller) """
+        self.specialRows.append(list(values))
+
+    def iter_chunks(self, chunk_size=PARAMETER_TABLE_CHUNK_SIZE):
+        """ Stream the rows as float64 arrays [row, parameter] of (at most) chunk_size rows, the special combinations
+        are in the last chunk """
+
+        for first_index, last_index in self._rank_chunks(0, self.get_gridRowNumber(), chunk_size):
+            if self.feasibleRanks is None:
+                yield self._decode(np.arange(first_index, last_index))
+            else:
+                yield self._decode(self.feasibleRanks[first_index:last_index])
+
+        if len(self.specialRows) > 0:
+            yield np.array(self.specialRows, dtype=np.float64).reshape(-1, len(self.valueLists))
+
+    def _decode(self, ranks):
+        """ Values of the rows of the ranks (mixed radix decoding of every parameter at once) """
+
+        if len(self.valueLists) == 0:
+            return np.empty((len(ranks), 0), dtype=np.float64)
+
+        return np.stack([values[(ranks // stride) % radix]
+                         for values, stride, radix in zip(self.valueArrays, self.strides, self.radices)], axis=1)
+
+    @staticmethod
+    def _rank_chunks(first_rank, last_rank, chunk_size):
+
+        for first in range(first_rank, last_rank, chunk_size):
+            yield first, min(first + chunk_size, last_rank)
@@ -0,0 +1,51 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from fluxminator.Result import Result
+
+
+class ResultParser:
+    """ Process pool parsing the ripple result files of Flux and computing their FFT in parallel (the Ripple objects,
+    i.e. the arrays & metrics, are sent back). The files of the upcoming rows can be submitted in advance, so the
+    processes stay busy while the runner writes the summary of the actual row. """
+
+    def __init__(self, process_number):
+
+        self.processNumber = process_number
+        self.executor = ProcessPoolExecutor(max_workers=process_number)
+
+        self.futures = {}                   # key=file name template of the row; value=[[futures of the gammas]...]
+
+    def get_processNumber(self): return self.processNumber
+
+    def prefetch(self, file, flux_model):
+        """ Submit the ripple files of a row (file: name template with {0} current & {1} gamma index) """
+
+        if file in self.futures:
+            return
+
+        step_number = flux_model.positionRipple.get_numberOfSteps() - 1         # first step is not in the result file
+
+        self.futures[file] = [[self.executor.submit(Result.create_ripple, gamma_value, current_value,
+                                                    file.format(current_index + 1, gamma_index + 1), step_number)
+                               for gamma_index, gamma_value in enumerate(flux_model.rangeGamma.get_all_values())]
+                              for current_index, current_value in enumerate(flux_model.rangeCurrent.get_all_values())]
+
+    def parse_ripples(self, file, flux_model):
+        """ Return the Ripple objects of a row (list for every current of the list for every gamma); the errors of the
+        parsing (e.g. IOError of a missing file) are raised here """
+
+        self.prefetch(file, flux_model)
+
+        futures = self.futures.pop(file)
+        return [[future.result() for future in gamma_futures] for gamma_futures in futures]
+
+    def shutdown(self):
+        """ Drop the prefetched rows which weren't used and stop the processes """
+
+        for futures in self.futures.values():
+            for gamma_futures in futures:
+                for future in gamma_futures:
+                    future.cancel()
+
+        self.futures = {}
+        self.executor.shutdown(wait=True)
@@ -1,17 +1,16 @@
 import os
 from os import path
 import itertools
-import threading
 
-import openpyxl
-
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtWidgets import QFileDialog
 from PyQt5.QtGui import QPixmap
 
 from fluxminator.Model import Range, Parameter
 from fluxminator.View import ParameterSetCreator
 from fluxminator.Runner import Runner
+from fluxminator.Engine import ExecutionEngine, ParameterTableEngine
+from fluxminator.Constraint import split_constraints, check_constraint
 from fluxminator.Constants import *
 
 import fluxminator.support_functions as sup_fun
@@ -28,6 +27,19 @@ class Presenter(Runner):
 
         self.flux_application_path = None
 
+        # Background thread for the execution, the progress is displayed via signals:
+        self.engine = ExecutionEngine(self)
+        self._interactor_execution_engine()
+
+        # Background thread for writing Sets.xlsx, the progress is displayed on the parameter set creator:
+        self.tableEngine = ParameterTableEngine()
+
+        # The row number of the parameter set creator is counted once the inputs stop changing:
+        self.rowNumberTimer = QTimer()
+        self.rowNumberTimer.setSingleShot(True)
+        self.rowNumberTimer.setInterval(ROW_COUNT_UPDATE_DELAY)
+        self.rowNumberTimer.timeout.connect(self._count_row_number)
+
         self._interactor()
         self._interactor_parameter_set_creator()
 
@@ -109,7 +121,44 @@ class Presenter(Runner):
         """ Extra settings """
         self.view.deleteCheckBox.setChecked(True)
         self.view.deleteCheckBox.stateChanged.connect(self._set_delete_solutions)
+
+        self.view.workerNumberSpinBox.setRange(1, MAX_WORKER_NUMBER)
+        self.view.workerNumberSpinBox.valueChanged.connect(lambda: self._set_worker_number(reset=False))
+
+        self.view.parserProcessSpinBox.setRange(1, MAX_PARSER_PROCESS_NUMBER)
+        self.view.parserProcessSpinBox.valueChanged.connect(lambda: self._set_parser_process_number(reset=False))
+
+        self.view.pipelineCheckBox.stateChanged.connect(lambda: self._set_pipelined_execution(reset=False))
+
+        self.view.cacheCheckBox.stateChanged.connect(lambda: self._set_simulation_cache(reset=False))
+
+        self.view.waveformStoreCheckBox.stateChanged.connect(lambda: self._set_waveform_store(reset=False))
+
+        self.view.timeoutSpinBox.valueChanged.connect(lambda: self._set_simulation_timeout(reset=False))
         
+    def _interactor_execution_engine(self):
+        """ Bindings for displaying the progress reported by the execution engine (running in another thread) """
+
+        self.engine.progressChanged.connect(self.view.progressBar.setValue)
+        self.engine.progressMaximumChanged.connect(self.view.progressBar.setMaximum)
+        self.engine.estimatedTimeChanged.connect(self.view.progressLabel.setText)
+
+        # The view re-emits the result in the GUI thread, where the cleanup can modify the widgets:
+        self.engine.executionFinished.connect(self.view.executionFinished)
+        self.view.executionFinished.connect(self._execution_finished)
+
+    def _interactor_parameter_table_engine(self):
+        """ Bindings for displaying the progress of the parameter table engine (running in another thread) """
+
+        widget = self.view.parameterSetCreatorWidget
+
+        self.tableEngine.progressChanged.connect(widget.create_progressBar.setValue)
+        self.tableEngine.progressMaximumChanged.connect(widget.create_progressBar.setMaximum)
+
+        # The widget re-emits the result in the GUI thread:
+        self.tableEngine.tableFinished.connect(widget.parameterTableFinished)
+        widget.parameterTableFinished.connect(self._parameter_table_finished)
+
     def _interactor_parameter_set_creator(self):
         """ Bindings for functions to refresh the model & view based on user input in the parameter set creator GUI """
 
@@ -123,7 +172,12 @@ class Presenter(Runner):
         self.view.parameterSetCreatorWidget.customRow_addButton.clicked.connect(self._show_special_set_creator)
 
         # Set estimated time of all simulations:
-        self.view.parameterSetCreatorWidget.create_runtimeSpinbox.valueChanged.connect(self._set_estimated_time)
+        self.view.parameterSetCreatorWidget.create_runtimeSpinbox.valueChanged.connect(self._update_row_number)
+
+        # Design of the parameter table (number of rows for the designs other than the full grid):
+        self.view.parameterSetCreatorWidget.create_designCombo.currentTextChanged.connect(self._set_design)
+        self.view.parameterSetCreatorWidget.create_designRowSpinbox.valueChanged.connect(self._update_row_number)
+        self.view.parameterSetCreatorWidget.create_constraintsLineEdit.editingFinished.connect(self._set_constraints)
 
         # Set final parameter set & create excel file:
         self.view.parameterSetCreatorWidget.create_excelCreatorButton.clicked.connect(self._create_parameter_table)
@@ -134,6 +188,9 @@ class Presenter(Runner):
         # Enable the main GUI (called after closing the parameter set creator widget):
         self.view.parameterSetCreatorWidget.signal.connect(self._enable_main_gui)
 
+        # Progress & result of writing Sets.xlsx (the widget is created again by the reset):
+        self._interactor_parameter_table_engine()
+
     def _interactor_special_parameter_set_creator(self):
         """ Bindings for functions to refresh the model data & view based on user input in the special parameter
         combination creator widget of the GUI """
@@ -210,116 +267,43 @@ class Presenter(Runner):
         combination ID and values, which are always filled out before the upcoming simulation starts """
 
         try:
-            model_path = self.model.fluxModel.get_modelPath()
-            model_name = self.model.fluxModel.get_modelName()
+            self.model.read_project_info_file()
 
-            self.model.fluxModel.motor.set_parameterSetExcelPath(model_path + "/Results/Sets.xlsx")
-
-            wb = openpyxl.load_workbook(model_path + "/Results/Project_Info.xlsx")
-            ws = wb.worksheets[0]
+            flux_model = self.model.fluxModel
 
             # MOTOR:
-            slot_number = ws.cell(row=2, column=2).value
-            pole_number = ws.cell(row=3, column=2).value
-
-            self._set_motor_slot_number(value=slot_number)
-            self._set_motor_pole_number(value=pole_number)
+            self._set_motor_slot_number(value=flux_model.motor.get_numberSlot())
+            self._set_motor_pole_number(value=flux_model.motor.get_numberPole())
 
             # SCENARIO:
-            scenario_id = ws.cell(row=4, column=2).value
+            self.view.deleteCheckBox.setChecked(self.model.deleteScenarioSolutions)
 
-            delete_results = ws.cell(row=15, column=2).value
-            self.view.deleteCheckBox.setChecked(delete_results)
+            self.view.coggingScenarioCheckBox.setChecked(self.model.is_scenarioCogging())
+            self.view.rippleScenarioCheckBox.setChecked(self.model.is_scenarioRipple())
 
-            # COGGING:
-            if scenario_id == "2":
-                cogging_scenario = False
-                c_min, c_max, c_step = 0, 0, 0
-            else:
-                cogging_scenario = True
-                c_values = ws.cell(row=5, column=2).value.split(" ")
-                c_min, c_max, c_step = float(c_values[0]), float(c_values[1]), float(c_values[2])
-
-            self.view.coggingScenarioCheckBox.setChecked(cogging_scenario)
-            self.view.coggingMin.setValue(c_min)
-            self.view.coggingMax.setValue(c_max)
-            self.view.coggingStep.setValue(c_step)
-
-            # RIPPLE:
-            if scenario_id == "1":
-                ripple_scenario = False
-                r_min, r_max, r_step = 0, 0, 0
-                cu_min, cu_max, cu_step = 0, 0, 0
-                g_min, g_max, g_step = 0, 0, 0
-            else:
-                ripple_scenario = True
-                r_values = ws.cell(row=6, column=2).value.split(" ")
-                cu_values = ws.cell(row=8, column=2).value.split(" ")
-                g_values = ws.cell(row=9, column=2).value.split(" ")
-
-                r_min, r_max, r_step = float(r_values[0]), float(r_values[1]), float(r_values[2])
-                cu_min, cu_max, cu_step = float(cu_values[0]), float(cu_values[1]), float(cu_values[2])
-                g_min, g_max, g_step = float(g_values[0]), float(g_values[1]), float(g_values[2])
+            # COGGING, RIPPLE, CURRENT & GAMMA (min max step):
+            ranges = [[flux_model.positionCogging, self.view.coggingMin, self.view.coggingMax, self.view.coggingStep],
+                      [flux_model.positionRipple, self.view.rippleMin, self.view.rippleMax, self.view.rippleStep],
+                      [flux_model.rangeCurrent, self.view.currentMin, self.view.currentMax, self.view.currentStep],
+                      [flux_model.rangeGamma, self.view.gammaMin, self.view.gammaMax, self.view.gammaStep]]
 
-            self.view.rippleScenarioCheckBox.setChecked(ripple_scenario)
-            self.view.rippleMin.setValue(r_min)
-            self.view.rippleMax.setValue(r_max)
-            self.view.rippleStep.setValue(r_step)
+            for range_, min_spin_box, max_spin_box, step_spin_box in ranges:
+                min_value, max_value, step_value = range_.get_min(), range_.get_max(), range_.get_step()
 
-            self.view.currentMin.setValue(cu_min)
-            self.view.currentMax.setValue(cu_max)
-            self.view.currentStep.setValue(cu_step)
-
-            self.view.gammaMin.setValue(g_min)
-            self.view.gammaMax.setValue(g_max)
-            self.view.gammaStep.setValue(g_step)
+                min_spin_box.setValue(min_value)
+                max_spin_box.setValue(max_value)
+                step_spin_box.setValue(step_value)
 
             # GAMMA & CURRENT:
-            ripple_type = ws.cell(row=7, column=2).value
-            gamma_dependency = ws.cell(row=10, column=2).value
-            current_dependency = ws.cell(row=11, column=2).value
-
-            gamma_name = ws.cell(row=12, column=2).value
-            current_name = ws.cell(row=13, column=2).value
-            current_source_name = ws.cell(row=14, column=2).value
-
-            self.view.loadDepCheckBox.setChecked(gamma_dependency)
-            self.view.gammaDepCheckBox.setChecked(current_dependency)
+            self.view.loadDepCheckBox.setChecked(self.model.is_dependencyLoad())
+            self.view.gammaDepCheckBox.setChecked(self.model.is_dependencyGamma())
 
-            self.view.gammaNameLineEdit.setText(gamma_name)
-            self.view.currentNameLineEdit.setText(current_name)
-            self.view.currentSourceNameLineEdit.setText(current_source_name)
-
-            wb.close()
+            self.view.gammaNameLineEdit.setText(flux_model.get_nameGamma())
+            self.view.currentNameLineEdit.setText(flux_model.get_nameCurrent())
+            self.view.currentSourceNameLineEdit.setText(flux_model.get_nameCurrentSource())
 
             self._disable()
 
-            # CHANNEL DATA:
-            # placeholders: {id} -> No-000X; {params} -> values for current No-000X
-
-            data_model_path = model_path.replace('/', '\\\\') + "\n"
-            data_model_name = model_name[:-4] + "\n"
-            data_simulation_id = "{id}\n"               # exact value later for every simulation
-            data_scenario = scenario_id + "\n"
-            data_ripple_type = ripple_type + "\n"
-            data_cogging = str(c_min) + " " + str(c_max) + " " + str(c_step) + "\n"
-            data_ripple = str(r_min) + " " + str(r_max) + " " + str(r_step) + "\n"
-            data_current = current_name + " " + str(cu_min) + " " + str(cu_max) + " " + str(cu_step) + "\n"
-            data_gamma = gamma_name + " " + str(g_min) + " " + str(g_max) + " " + str(g_step) + "\n"
-            data_parameters = "{params}\n"              # exact values later for every simulation
-            data_delete_results = str(delete_results) + "\n"
-            data_current_source = current_source_name + "\n"
-
-            # Price calculation dependent data - TODO FUTURE DEVELOPMENT
-            data_for_price_calculation = "Tooth\nRotor\nMagnet\nNone\n"
-
-            channel_data_string = data_model_path + data_model_name + data_simulation_id \
-                                  + data_scenario + data_ripple_type + data_cogging + data_ripple \
-                                  + data_current + data_gamma + data_parameters + data_delete_results \
-                                  + data_current_source + data_for_price_calculation
-
-            self.model.set_channelData(channel_data_string)
-
         except IOError:
             sup_fun.popup_message(self.view, "Problem with Results/Project_Info.xlsx file!")
             self._reset()
@@ -524,6 +508,61 @@ class Presenter(Runner):
         else:
             self.model.set_deleteScenarioSolutions(self.view.deleteCheckBox.isChecked())
 
+    def _set_worker_number(self, reset=False):
+        """ Set the number of Flux simulations running in parallel (each one in its own working directory) """
+        if reset:
+            self.model.set_workerNumber(1)
+            self.view.workerNumberSpinBox.setDisabled(False)
+            self.view.workerNumberSpinBox.setValue(1)
+        else:
+            self.model.set_workerNumber(self.view.workerNumberSpinBox.value())
+
+    def _set_parser_process_number(self, reset=False):
+        """ Set the number of processes reading the ripple result files in parallel (1: in the execution thread) """
+        if reset:
+            self.model.set_parserProcessNumber(1)
+            self.view.parserProcessSpinBox.setDisabled(False)
+            self.view.parserProcessSpinBox.setValue(1)
+        else:
+            self.model.set_parserProcessNumber(self.view.parserProcessSpinBox.value())
+
+    def _set_pipelined_execution(self, reset=False):
+        """ Set whether Flux should already compute the next parameter combination while the results of the actual
+        one are processed """
+        if reset:
+            self.model.set_pipelinedExecution(False)
+            self.view.pipelineCheckBox.setDisabled(False)
+            self.view.pipelineCheckBox.setChecked(False)
+        else:
+            self.model.set_pipelinedExecution(self.view.pipelineCheckBox.isChecked())
+
+    def _set_simulation_cache(self, reset=False):
+        """ Set whether the raw result files of identical simulations should be reused from the simulation cache """
+        if reset:
+            self.model.set_simulationCache(False)
+            self.view.cacheCheckBox.setDisabled(False)
+            self.view.cacheCheckBox.setChecked(False)
+        else:
+            self.model.set_simulationCache(self.view.cacheCheckBox.isChecked())
+
+    def _set_waveform_store(self, reset=False):
+        """ Set whether the waveforms of every row should be kept in the memory-mapped waveform store """
+        if reset:
+            self.model.set_waveformStore(False)
+            self.view.waveformStoreCheckBox.setDisabled(False)
+            self.view.waveformStoreCheckBox.setChecked(False)
+        else:
+            self.model.set_waveformStore(self.view.waveformStoreCheckBox.isChecked())
+
+    def _set_simulation_timeout(self, reset=False):
+        """ Set the time limit of one Flux simulation [min] (0: no limit) """
+        if reset:
+            self.model.set_simulationTimeout(0)
+            self.view.timeoutSpinBox.setDisabled(False)
+            self.view.timeoutSpinBox.setValue(0)
+        else:
+            self.model.set_simulationTimeout(self.view.timeoutSpinBox.value())
+
     # FUNCTIONS FOR THE PARAMETER SETS FILE CREATOR:
 
     def _show_parameter_set_creator(self):
@@ -634,18 +673,25 @@ class Presenter(Runner):
             self._update_row_number()
 
     def _update_row_number(self):
-        """ Update the row number (number of parameter set combinations) displayed on the GUI """
-        parameters = self.model.fluxModel.motor.get_parameters()
+        """ Update the row number (number of parameter set combinations) displayed on the GUI; the rows are counted
+        after ROW_COUNT_UPDATE_DELAY ms without new changes (spinbox, design, constraints) """
+
+        self.rowNumberTimer.start()
+
+    def _count_row_number(self):
+        """ Count the rows of the parameter table (estimated for large grids with constraints) """
 
-        row_number = 0
-        if len(parameters) > 0:
-            row_number = 1
-            for p in parameters:
-                row_number *= p.range.get_numberOfSteps()
-            row_number += self.model.fluxModel.motor.get_specialRowNumber()
+        # Without the combinations violating the constraints (if every constraint is valid for the parameters):
+        if self._check_constraints() is not None:
+            self.model.fluxModel.motor.set_constraints([])
+
+        row_number, estimated = self.model.fluxModel.motor.estimate_parameter_sets(
+            self.view.parameterSetCreatorWidget.create_designCombo.currentText(),
+            self.view.parameterSetCreatorWidget.create_designRowSpinbox.value())
 
         # View update:
-        self.view.parameterSetCreatorWidget.create_rowNumberLabel.setText("Number of rows: %i" % row_number)
+        self.view.parameterSetCreatorWidget.create_rowNumberLabel.setText(
+            ("Number of rows: ~%i" if estimated else "Number of rows: %i") % row_number)
         self._set_estimated_time(row_number)
 
     def _set_estimated_time(self, row_number):
@@ -679,6 +725,39 @@ class Presenter(Runner):
                                                                             day_str, hour_str, min_str)
             self.view.parameterSetCreatorWidget.create_sumRuntimeLabel.setText(time_text)
 
+    def _set_design(self):
+        """ Choose the design of the parameter table (the number of rows is only needed for the other designs than
+        the full grid) """
+
+        design = self.view.parameterSetCreatorWidget.create_designCombo.currentText()
+        self.view.parameterSetCreatorWidget.create_designRowSpinbox.setDisabled(design == DESIGN_CARTESIAN)
+
+        self._update_row_number()
+
+    def _set_constraints(self):
+        """ Set the constraints of the parameter table (the expressions are checked against the parameter names) """
+
+        error = self._check_constraints()
+        if error is not None:
+            sup_fun.popup_message(self.view.parameterSetCreatorWidget, error)
+
+        self._update_row_number()
+
+    def _check_constraints(self):
+        """ Update the constraints of the Motor object from the GUI; return an error message or None """
+
+        constraints = split_constraints(self.view.parameterSetCreatorWidget.create_constraintsLineEdit.text())
+        names = [p.get_name() for p in self.model.fluxModel.motor.get_parameters()] + \
+                [CONSTRAINT_SLOT_NUMBER, CONSTRAINT_POLE_NUMBER, "pi"]
+
+        for expression in constraints:
+            error = check_constraint(expression, names)
+            if error is not None:
+                return error
+
+        self.model.fluxModel.motor.set_constraints(constraints)
+        return None
+
     def _create_parameter_table(self):
         """ Create parameter set file via the functions of the Motor object """
 
@@ -686,17 +765,40 @@ class Presenter(Runner):
             sup_fun.popup_message(self.view.parameterSetCreatorWidget, "No parameters yet.")
             return
 
-        # Parameter table (lists in list) with all parameter combinations, including special sets:
-        parameter_table = self.model.fluxModel.motor.create_final_parameter_set()
+        # The parameters could have been renamed or deleted since the constraints were given:
+        error = self._check_constraints()
+        if error is not None:
+            sup_fun.popup_message(self.view.parameterSetCreatorWidget, error)
+            return
 
-        try:
-            # Create the Sets.xlsx
-            self.model.fluxModel.motor.create_parameter_table_excel(parameter_table, self.model.fluxModel.get_modelPath())
+        # The parameter table & Sets.xlsx are created by the engine, the parameters are locked until it has finished:
+        self.tableEngine.set_up(self.model.fluxModel.motor,
+                                self.view.parameterSetCreatorWidget.create_designCombo.currentText(),
+                                self.view.parameterSetCreatorWidget.create_designRowSpinbox.value(),
+                                self.model.fluxModel.get_modelPath())
+
+        self.view.parameterSetCreatorWidget.create_progressBar.setValue(0)
+        self.view.parameterSetCreatorWidget.create_progressBar.setVisible(True)
+        self.view.parameterSetCreatorWidget.splitter.setEnabled(False)
+
+        self.tableEngine.start()
+
+    def _parameter_table_finished(self, error):
+        """ Unlock the parameter set creator after the parameter table engine has finished (in the GUI thread) """
+
+        self.tableEngine.wait()                                         # the thread is already about to end
+
+        self.view.parameterSetCreatorWidget.create_progressBar.setVisible(False)
+        self.view.parameterSetCreatorWidget.splitter.setEnabled(True)
+
+        if error != "":
+            sup_fun.popup_message(self.view.parameterSetCreatorWidget, error)
+        else:
             self.view.parameterSetCreatorWidget.create_excelCreatorButton.setText("Overwrite")
-        except IOError:
-            sup_fun.popup_message(self.view.parameterSetCreatorWidget, "Something went wrong during saving "
-                                                                       "the parameter sets file. Close the "
-                                                                       "'Sets.xlsx' file if its open!")
+
+        # The widget was closed in the meantime:
+        if not self.view.parameterSetCreatorWidget.isVisible():
+            self._enable_main_gui()
 
     def _clear_parameter_editor_widget(self):
         """ Clear the parameter set editor part of the GUI """
@@ -714,7 +816,12 @@ class Presenter(Runner):
         self.view.parameterSetCreatorWidget.newP_clearButton.setText("Clear")
 
     def _enable_main_gui(self):
-        """ Enable the main GUI (called after closing the parameter set creator widget) """
+        """ Enable the main GUI (called after closing the parameter set creator widget, or after Sets.xlsx is
+        written, if it was closed in the meantime) """
+
+        if self.tableEngine.isRunning():
+            return
+
         self.view.setEnabled(True)
 
     # FUNCTIONS FOR THE SPECIAL PARAMETER SET CREATOR:
@@ -805,9 +912,8 @@ class Presenter(Runner):
             self._disable()
             self.view.clearButton.setDisabled(True)
 
-            # STARTING A NEW THREAD FOR FLUX:
-            flux_thread = threading.Thread(target=self._execution(), args=())
-            flux_thread.start()
+            # STARTING THE EXECUTION ENGINE (NEW THREAD FOR FLUX):
+            self.engine.start()
 
         # STOP:
         else:
@@ -820,6 +926,15 @@ class Presenter(Runner):
                 self.view.runButton.setDisabled(True)
                 self.view.runButton.setToolTip("Waiting for the current calculation to finish.")
 
+    def shutdown(self):
+        """ Stop the execution, kill the running simulations and wait (at most ENGINE_SHUTDOWN_TIMEOUT) for the
+        execution engine to store the finished rows; then wait for the writing of Sets.xlsx """
+
+        self.model.set_executionInProgress(False)
+        Presenter._terminate_simulations()                              # defined by the Runner object
+        self.engine.wait(ENGINE_SHUTDOWN_TIMEOUT)
+        self.tableEngine.wait()
+
     def _check_flux_application(self):
         """ Check if the application path for the Flux software is valid in the 'flux_directory.txt' file """
 
@@ -925,11 +1040,12 @@ class Presenter(Runner):
 
         return True
 
-    def _execution(self):
-        """ Start the execution (simulations or summary file creation), and after that, perform cleanup based on
-        the result of the execution """
+    def _execution_finished(self, execution_result):
+        """ Perform cleanup based on the result of the execution (simulations or summary file creation), called in the
+        GUI thread after the execution engine has finished """
+
+        self.engine.wait()                                              # the thread is already about to end
 
-        execution_result = self._run(self)
         print("EXECUTION RESULT:", execution_result)
         print("NEXT SIMULATION ID:", self.model.get_simulationID())
 
@@ -975,6 +1091,12 @@ class Presenter(Runner):
         self.view.summarySessionButton.setDisabled(disable)
 
         self.view.deleteCheckBox.setDisabled(disable)
+        self.view.workerNumberSpinBox.setDisabled(disable)
+        self.view.parserProcessSpinBox.setDisabled(disable)
+        self.view.pipelineCheckBox.setDisabled(disable)
+        self.view.cacheCheckBox.setDisabled(disable)
+        self.view.waveformStoreCheckBox.setDisabled(disable)
+        self.view.timeoutSpinBox.setDisabled(disable)
 
         self.view.gammaNameLineEdit.setDisabled(disable)
         self.view.currentNameLineEdit.setDisabled(disable)
@@ -1011,6 +1133,7 @@ class Presenter(Runner):
         self.model.set_channelData("")
         self.model.set_summarySavingProblem(False)
         self.model.set_projectInfoFilePath("")
+        self.model.clear_completedSimulations()
 
         self.model.fluxModel.set_modelPath(None)
         self.model.fluxModel.set_modelName(None)
@@ -1040,6 +1163,12 @@ class Presenter(Runner):
         self._set_motor_pole_number(reset=True)
 
         self._set_delete_solutions(reset=True)
+        self._set_worker_number(reset=True)
+        self._set_parser_process_number(reset=True)
+        self._set_pipelined_execution(reset=True)
+        self._set_simulation_cache(reset=True)
+        self._set_waveform_store(reset=True)
+        self._set_simulation_timeout(reset=True)
 
         Presenter._set_progress(self, reset=True)                       # defined by the Runner object
 
@@ -0,0 +1,201 @@
+import math
+
+from openpyxl import load_workbook
+from openpyxl.styles import Font, Alignment
+
+from fluxminator.Constants import *
+from fluxminator.Constraint import feasible_rows, read_constraints
+
+
+def refine_parameter_table(summary_path, sets_path, metric, row_number, mode=REFINE_BOTH, load_index=1,
+                           maximize=False, constants=None):
+    """ Adaptive grid refinement: read the metric of the completed rows from the summary file, find the cells of the
+    parameter grid where the metric changes fastest (gradient) and the surroundings of its minimum (or maximum), and
+    append the midpoints there to the parameter set file as a new batch; return the new rows
+    (the midpoints have to satisfy the constraints of the parameter set file; constants: slot & pole number) """
+
+    results = read_summary_metric(summary_path, metric, load_index)
+
+    wb_sets = load_workbook(sets_path)
+    ws_sets = wb_sets.worksheets[0]
+
+    existing_rows = set()
+    ids = []
+    for row in ws_sets.iter_rows(min_row=4, values_only=True):
+        ids.append(row[0])
+        existing_rows.add(tuple(row[1:]))
+
+    parameter_number = ws_sets.max_column - 1
+
+    # Grid of the parameter values (every value of the parameter set file along each axis):
+    grid = [sorted(set(row[j] for row in existing_rows)) for j in range(parameter_number)]
+
+    # Constraints of the parameter table:
+    constraints = read_constraints(wb_sets)
+    parameter_names = [cell.value for cell in ws_sets[2]][1:]
+
+    def feasible(parameter_table):
+        return feasible_rows(constraints, parameter_names, parameter_table, constants)
+
+    new_rows = select_refined_rows(results, grid, existing_rows, row_number, mode, maximize,
+                                   feasible if len(constraints) > 0 else None)
+    if len(new_rows) == 0:
+        wb_sets.close()
+        return new_rows
+
+    _append_parameter_sets(ws_sets, new_rows, _next_id(ids))
+
+    try:
+        wb_sets.save(sets_path)
+    except IOError:
+        raise
+
+    return new_rows
+
+
+def read_parameter_sets(sets_path):
+    """ Return the rows of the parameter set file (parameter values without the ID) """
+
+    wb_sets = load_workbook(sets_path, read_only=True)
+    parameter_table = [list(row[1:]) for row in wb_sets.worksheets[0].iter_rows(min_row=4, values_only=True)]
+    wb_sets.close()
+
+    return parameter_table
+
+
+def add_parameter_sets(sets_path, new_rows):
+    """ Append the rows to the parameter set file with the next IDs (e.g. the rows proposed by the optimizer) """
+
+    wb_sets = load_workbook(sets_path)
+    ws_sets = wb_sets.worksheets[0]
+
+    ids = [row[0] for row in ws_sets.iter_rows(min_row=4, values_only=True)]
+    _append_parameter_sets(ws_sets, new_rows, _next_id(ids))
+
+    try:
+        wb_sets.save(sets_path)
+    except IOError:
+        raise
+
+
+def read_summary_metric(summary_path, metric, load_index=1):
+    """ Return the metric of the completed rows from the 1 Stack sheet of the summary file
+    (key=tuple of the parameter values; value=metric) """
+
+    wb_summary = load_workbook(summary_path, read_only=True)
+    ws_summary = wb_summary[wb_summary.sheetnames[0]]
+
+    header_rows = list(ws_summary.iter_rows(min_row=1, max_row=2, values_only=True))
+    parameter_number = list(header_rows[1]).index("No.")
+    metric_column = summary_metric_column(header_rows[1], metric, load_index)
+
+    results = {}
+    for row in ws_summary.iter_rows(min_row=3, values_only=True):
+        if isinstance(row[metric_column], (int, float)):
+            results[tuple(row[:parameter_number])] = float(row[metric_column])
+
+    wb_summary.close()
+
+    return results
+
+
+def summary_metric_column(header_row, metric, load_index=1):
+    """ Return the index of the metric column in the 2. header row of the summary sheet """
+
+    # Load dependent metrics are in every load group of the header -> choose the column of the given load:
+    metric_columns = [column for column, header in enumerate(header_row) if header == REFINE_METRICS[metric]]
+
+    return metric_columns[min(load_index, len(metric_columns)) - 1]
+
+
+def select_refined_rows(results, grid, existing_rows, row_number, mode=REFINE_BOTH, maximize=False, feasible=None):
+    """ Score the midpoints of the grid cells: the change of the normalized metric along the cell edge (gradient),
+    and the normalized metric of the points around which the cells are refined (minimum); return the best new rows
+    (feasible: function returning the boolean mask of the valid rows, see Motor.feasible_rows) """
+
+    if len(results) == 0:
+        return []
+
+    sign = -1 if maximize else 1
+    metric_min = min(sign * value for value in results.values())
+    metric_span = (max(sign * value for value in results.values()) - metric_min) or 1.0
+
+    candidates = {}                                 # key=new row; value=score (the larger, the more important)
+
+    for point, value in results.items():
+        for axis, axis_values in enumerate(grid):
+
+            position = axis_values.index(point[axis]) if point[axis] in axis_values else None
+            if position is None:
+                continue
+
+            for neighbour_position in [position - 1, position + 1]:
+                if not 0 <= neighbour_position < len(axis_values):
+                    continue
+
+                neighbour = point[:axis] + (axis_values[neighbour_position],) + point[axis + 1:]
+                midpoint = _midpoint(point, neighbour, axis)
+                if midpoint is None or midpoint in existing_rows:
+                    continue
+
+                scores = []
+                if mode in [REFINE_GRADIENT, REFINE_BOTH] and neighbour in results:
+                    scores.append(abs(results[neighbour] - value) / metric_span)
+                if mode in [REFINE_MINIMUM, REFINE_BOTH]:
+                    scores.append(1 - (sign * value - metric_min) / metric_span)
+
+                if len(scores) > 0:
+                    candidates[midpoint] = max(candidates.get(midpoint, 0), max(scores))
+
+    refined_rows = sorted(candidates, key=lambda row: (-candidates[row], row))          # same score: in grid order
+
+    if feasible is not None and len(refined_rows) > 0:
+        refined_rows = [row for row, valid in zip(refined_rows, feasible(refined_rows)) if valid]
+
+    return [list(row) for row in refined_rows[:row_number]]
+
+
+def _midpoint(point, neighbour, axis):
+    """ Midpoint of the cell edge along the axis, rounded like the values in the channel file ("%.2f"); None if the
+    edge can't be refined anymore """
+
+    value = round((point[axis] + neighbour[axis]) / 2, 2)
+
+    if math.isclose(value, point[axis]) or math.isclose(value, neighbour[axis]):
+        return None
+
+    return point[:axis] + (value,) + point[axis + 1:]
+
+
+def _next_id(ids):
+    """ Number of the next No-XXXX ID of the parameter set file """
+    return max([int(parameter_values_id[3:]) for parameter_values_id in ids], default=0) + 1
+
+
+def _append_parameter_sets(ws_sets, new_rows, first_id):
+    """ Append the new rows to the parameter set sheet (format of Motor.create_parameter_table_excel) """
+
+    last_row = ws_sets.max_row
+    column_number = ws_sets.max_column
+
+    for i, row in enumerate(new_rows):
+        ws_sets.append(["No-%04d" % (first_id + i)] + row)
+
+    for row in range(last_row, ws_sets.max_row + 1):
+        for col in range(1, column_number + 1):
+
+            if row == last_row:                                         # the previous last row
+                if row > 3:                                             # (not the header)
+                    ws_sets.cell(row=row, column=col).border = VERTICAL_BORDER
+                continue
+
+            if col == 1:
+                ws_sets.cell(row=row, column=col).font = Font(bold=True, color="FFFFFF")
+                ws_sets.cell(row=row, column=col).fill = THYSSEN_FILL
+
+            if row == ws_sets.max_row:
+                ws_sets.cell(row=row, column=col).border = BOTTOM_BORDER
+            else:
+                ws_sets.cell(row=row, column=col).border = VERTICAL_BORDER
+
+            ws_sets.cell(row=row, column=col).alignment = Alignment(horizontal='center')
@@ -1,4 +1,6 @@
 
+import os
+import glob
 import numpy as np
 import xlrd
 
@@ -12,18 +14,24 @@ class Cogging:
 
     def __init__(self, rot_pos, torque):
 
-        self.rotorPosition = np.array(rot_pos)
-        self.coggingValue = np.array(torque)
+        self.rotorPosition = np.asarray(rot_pos, dtype=np.float64)         # no copy of the raw data arrays
+        self.coggingValue = np.asarray(torque, dtype=np.float64)
 
-        self.peakToPeak = self.coggingValue.ptp() * 100     # [Ncm]
+        # Computed on the first access (None: not yet):
+        self.peakToPeak = None
+        self.fftValues = None                   # harmonics, amplitude, phase
 
-        # harmonics, amplitude, phase:
-        self.fftValues = [[], [], []]
-        self.fftValues[0], self.fftValues[1], self.fftValues[2] = sup_fun.fft_(rotor_position=self.rotorPosition,
-                                                                               values=self.coggingValue)
+    def get_coggingValue(self): return self.coggingValue
 
-    def get_p2p(self): return self.peakToPeak
-    def get_fftValues(self): return self.fftValues
+    def get_p2p(self):
+        if self.peakToPeak is None:
+            self.peakToPeak = np.ptp(self.coggingValue) * 100     # [Ncm]
+        return self.peakToPeak
+
+    def get_fftValues(self):
+        if self.fftValues is None:
+            self.fftValues = list(sup_fun.fft_(rotor_position=self.rotorPosition, values=self.coggingValue))
+        return self.fftValues
 
 
 class Ripple:
@@ -33,28 +41,35 @@ class Ripple:
         self.gamma = gamma
         self.iMax = i_max
 
-        self.rotorPositions = np.array(rot_pos)
-        self.rippleValues = np.array(torque)
-        self.voltageValues = np.array(voltage)
-        self.currentValues = np.array(current)
-
-        self.peakToPeak = self.rippleValues.ptp() * 100      # [Ncm]
-
-        self.torqueMean = self.rippleValues.mean()
+        self.rotorPositions = np.asarray(rot_pos, dtype=np.float64)        # no copy of the raw data arrays
+        self.rippleValues = np.asarray(torque, dtype=np.float64)
+        self.voltageValues = np.asarray(voltage, dtype=np.float64)
+        self.currentValues = np.asarray(current, dtype=np.float64)
 
-        # harmonics, amplitude, phase:
-        self.fftValues = [[], [], []]
-        self.fftValues[0], self.fftValues[1], self.fftValues[2] = sup_fun.fft_(rotor_position=self.rotorPositions,
-                                                                               values=self.rippleValues)
+        # Computed on the first access (None: not yet), most of the ripples are only used for the skewing:
+        self.peakToPeak = None
+        self.torqueMean = None
+        self.fftValues = None                   # harmonics, amplitude, phase
 
     def get_rotorPositions(self): return self.rotorPositions
     def get_rippleValues(self): return self.rippleValues
     def get_voltageValues(self): return self.voltageValues
     def get_currentValues(self): return self.currentValues
 
-    def get_p2p(self): return self.peakToPeak
-    def get_torqueMean(self): return self.torqueMean
-    def get_fftValues(self): return self.fftValues
+    def get_p2p(self):
+        if self.peakToPeak is None:
+            self.peakToPeak = np.ptp(self.rippleValues) * 100      # [Ncm]
+        return self.peakToPeak
+
+    def get_torqueMean(self):
+        if self.torqueMean is None:
+            self.torqueMean = self.rippleValues.mean()
+        return self.torqueMean
+
+    def get_fftValues(self):
+        if self.fftValues is None:
+            self.fftValues = list(sup_fun.fft_(rotor_position=self.rotorPositions, values=self.rippleValues))
+        return self.fftValues
 
 
 class BEMF:
@@ -65,21 +80,27 @@ class BEMF:
         self.period = None
         self.valid = None
 
-        self.rotorPosition = np.array(rot_pos)
-        self.voltageValue = np.array(voltage)
+        self.rotorPosition = np.asarray(rot_pos, dtype=np.float64)         # no copy of the raw data arrays
+        self.voltageValue = np.asarray(voltage, dtype=np.float64)
 
         self.period = self._period()
 
-        # harmonics, amplitude, phase:
-        self.fftValues = [[], [], []]
-        self.fftValues[0], self.fftValues[1], self.fftValues[2] = sup_fun.fft_(rotor_position=self.rotorPosition,
-                                                                               values=self.voltageValue,
-                                                                               period=self.period, multiplier=1)
+        # Computed on the first access (None: not yet):
+        self.fftValues = None                   # harmonics, amplitude, phase
+        self.rmsValue = None
 
-        self.rmsValue = self._rms()
+    def get_voltageValue(self): return self.voltageValue
 
-    def get_rmsValue(self): return self.rmsValue
-    def get_fftValues(self): return self.fftValues
+    def get_rmsValue(self):
+        if self.rmsValue is None:
+            self.rmsValue = self._rms()
+        return self.rmsValue
+
+    def get_fftValues(self):
+        if self.fftValues is None:
+            self.fftValues = list(sup_fun.fft_(rotor_position=self.rotorPosition, values=self.voltageValue,
+                                               period=self.period, multiplier=1))
+        return self.fftValues
 
     def is_valid_BEMF(self): return self.valid
 
@@ -100,7 +121,7 @@ class BEMF:
     def _rms(self):
 
         # effective value
-        amplitudes = self.fftValues[1]
+        amplitudes = self.get_fftValues()[1]
         return np.sqrt(np.sum(np.square(amplitudes)) / len(amplitudes))
 
 
@@ -197,8 +218,9 @@ class Result:
 
         return True
 
-    def setup_Ripple(self, file, flux_model):
-        """ Set up Ripple objects based on the raw results files from Flux """
+    def setup_Ripple(self, file, flux_model, result_parser=None):
+        """ Set up Ripple objects based on the raw results files from Flux (result_parser: the files are parsed in
+        parallel by its processes, see ResultParser) """
 
         step_number = flux_model.positionRipple.get_numberOfSteps() - 1         # first step is not in the result file
 
@@ -209,6 +231,12 @@ class Result:
         gammas_for2stack = flux_model.get_gammasFor2Stack()
         gammas_for3stack = flux_model.get_gammasFor3Stack()
 
+        if result_parser is not None:
+            try:
+                parsed_ripples = result_parser.parse_ripples(file, flux_model)
+            except IOError:
+                return False
+
         for current_index, current_value in enumerate(current_values):
 
             self.rippleModels[current_value] = []
@@ -218,13 +246,14 @@ class Result:
 
             for gamma_index, gamma_value in enumerate(gamma_values):
 
-                try:
-                    rotor_position, magnetic_torque, voltage, current = \
-                        Result._read_raw_data_files("Ripple", file.format(current_index+1, gamma_index+1), step_number)
-                except IOError:
-                    return False
-
-                ripple = Ripple(gamma_value, current_value, rotor_position, magnetic_torque, voltage, current)
+                if result_parser is not None:
+                    ripple = parsed_ripples[current_index][gamma_index]
+                else:
+                    try:
+                        ripple = Result.create_ripple(gamma_value, current_value,
+                                                      file.format(current_index+1, gamma_index+1), step_number)
+                    except IOError:
+                        return False
 
                 self.rippleModels[current_value].append(ripple)
 
@@ -243,14 +272,43 @@ class Result:
                                                                                 gammas_for3stack, pole_num, current_value)
         return True
 
+    @staticmethod
+    def create_ripple(gamma_value, current_value, file, step_number):
+        """ Read a ripple result file and create its Ripple object (also in the processes of the ResultParser); only
+        the spectrum of the 1 stack ripple (gamma = 0) is needed, the other ones are used for the skewing """
+
+        rotor_position, magnetic_torque, voltage, current = Result._read_raw_data_files("Ripple", file, step_number)
+
+        ripple = Ripple(gamma_value, current_value, rotor_position, magnetic_torque, voltage, current)
+        if gamma_value == 0:
+            ripple.get_fftValues()
+
+        return ripple
+
     @staticmethod
     def _read_raw_data_files(type_, file, step_number):
-        """ Read the raw data files provided by the Flux software after each simulation """
+        """ Read the raw data files provided by the Flux software after each simulation: the rotor position, torque,
+        voltage & current columns are returned as contiguous float64 arrays (the rows of one block). The parsed block
+        is kept in a .npy sidecar file, which is loaded instead of decoding the .xls file again while the raw file
+        is unchanged (same size & modification time). """
+
+        file_stat = os.stat(file)
+        sidecar_file = os.path.join(os.path.dirname(file), PARSED_DIRECTORY, PARSED_FILE_NAME.format(
+            os.path.basename(file), step_number, file_stat.st_size, file_stat.st_mtime_ns))
+
+        block = Result._load_sidecar_file(sidecar_file)
+
+        if block is None:
+            block = Result._parse_raw_data_file(type_, file, step_number)
+            Result._save_sidecar_file(sidecar_file, block, os.path.basename(file))
+
+        rotor_position, magnetic_torque, voltage, current = block
+
+        return rotor_position, magnetic_torque, voltage, current
 
-        rotor_position = []
-        magnetic_torque = []
-        voltage = []
-        current = []
+    @staticmethod
+    def _parse_raw_data_file(type_, file, step_number):
+        """ Decode the waveform block of the raw data file (rotor position, torque, voltage & current rows) """
 
         if type_ == "Cogging":
             start_index = RAW_COGGING_FILE_START_INDEX
@@ -260,17 +318,55 @@ class Result:
         wb = xlrd.open_workbook(file)
         ws = wb.sheet_by_index(0)
 
-        for i in range(start_index, start_index + step_number):
-            values = ws.row_values(rowx=i, start_colx=1, end_colx=5)
+        if ws.nrows < start_index + step_number:
+            raise IndexError("Missing rotor steps in the raw data file: " + file)
+
+        if ws.ncols < 5:
+            raise IndexError("Missing columns in the raw data file: " + file)
 
-            rotor_position.append(values[0])
-            magnetic_torque.append(values[1])
-            voltage.append(values[2])
-            current.append(values[3])
+        # Every quantity is read as a whole column, so it is a contiguous array instead of a list built row by row:
+        block = np.array([ws.col_values(col, start_index, start_index + step_number) for col in range(1, 5)],
+                         dtype=np.float64)
 
         wb.release_resources()
 
-        return rotor_position, magnetic_torque, voltage, current
+        return block
+
+    @staticmethod
+    def _load_sidecar_file(sidecar_file):
+        """ Return the parsed block of the sidecar file, or None if there is no valid one """
+
+        try:
+            block = np.load(sidecar_file)
+        except (IOError, ValueError):                   # missing or incomplete file
+            return None
+
+        if block.ndim != 2 or block.shape[0] != 4:
+            return None
+
+        return block
+
+    @staticmethod
+    def _save_sidecar_file(sidecar_file, block, file_name):
+        """ Write the parsed block into the sidecar file and remove the sidecar files of the previous versions of the
+        raw data file (the cache is only an accelerator: a failed writing is ignored) """
+
+        parsed_path = os.path.dirname(sidecar_file)
+        temporary_file = sidecar_file + ".{}.tmp".format(os.getpid())
+
+        try:
+            for old_file in glob.glob(os.path.join(glob.escape(parsed_path), glob.escape(file_name) + ".*.npy")):
+                os.remove(old_file)
+
+            os.makedirs(parsed_path, exist_ok=True)
+
+            with open(temporary_file, 'wb') as npy_file:
+                np.save(npy_file, block)
+            os.replace(temporary_file, sidecar_file)    # complete files only (several processes may read it)
+
+        except OSError:
+            if os.path.exists(temporary_file):
+                os.remove(temporary_file)
 
     @staticmethod
     def _create_skewed_ripple(flux_model, stack_number, ripples_for_skewing, gammas_for_skewing, pole_num, current_value):
@@ -1,6 +1,5 @@
 import os
-import openpyxl
-from openpyxl import load_workbook
+import sqlite3
 
 import time
 from datetime import datetime
@@ -8,6 +7,17 @@ from datetime import timedelta
 
 from fluxminator.Constants import *
 from fluxminator.Result import Result
+from fluxminator.WorkerPool import FluxWorkerPool
+from fluxminator.Launcher import FluxLauncher
+from fluxminator.Lease import RowLeases
+from fluxminator.Journal import RunJournal
+from fluxminator.Cache import SimulationCache
+from fluxminator.Surrogate import SurrogateModel
+from fluxminator.Parser import ResultParser
+from fluxminator.WaveformStore import WaveformStore
+from fluxminator.Checkpoint import SummaryCheckpointer
+from fluxminator.MetricsStore import MetricsStore
+from fluxminator.ParameterSets import ParameterSets
 
 
 class Runner:
@@ -16,8 +26,7 @@ class Runner:
 
     # Workbooks:
 
-    summary_wb = None
-    summary_worksheets = [[], [], []]                               # stack(s), gammaDep, loadDep
+    summary_sheets = [[], [], []]                                   # stack(s), gammaDep, loadDep (sheet names)
 
     cogging_wb = None
     cogging_fft_wb = None
@@ -32,47 +41,98 @@ class Runner:
     stack2 = False
     stack3 = False
 
+    # Run journal (state of the rows):
+    journal = None
+
+    # Launcher of the Flux simulations of the execution (None: no simulations have been launched):
+    flux_launcher = None
+
+    # Raw result files of the already executed simulations (None: the cache isn't used):
+    simulation_cache = None
+
+    # Prediction of the metrics from the already summarized rows (None: every row is simulated):
+    surrogate_model = None
+
+    # Process pool parsing the ripple result files (None: they are parsed in the runner thread):
+    result_parser = None
+
+    # Memory-mapped waveforms of every row (None: the waveforms aren't kept):
+    waveform_store = None
+
+    # Rows of the summary sheets (Summary.xlsx is generated from it):
+    metrics_store = None
+
+    # Background generation of Summary.xlsx at the checkpoints:
+    summary_checkpointer = None
+
     @staticmethod
     def _run(presenter):
 
-        time.sleep(5)
+        time.sleep(FLUX_START_DELAY)
+
+        # MULTI-NODE EXECUTION MODE: the simulations are shared with the other nodes, then merged in a final pass
+        if presenter.model.is_distributedExecution() and not presenter.model.is_sessionSummary():
+            return Runner._run_distributed(presenter)
+
+        Runner.journal = RunJournal(presenter.model.fluxModel.get_modelPath() + "/Results")
+        if presenter.model.is_sessionNew() and presenter.model.get_simulationID() == 1:
+            Runner.journal.clear()
+
+        Runner._open_metrics_store(presenter)
 
         # Try to load the already existing summary and detailed result files
         if presenter.model.is_sessionOld() or presenter.model.get_simulationID() > 1:
             if Runner._load_workbooks(presenter) == RESULT_FILE_IO_ERROR:
+                Runner._close_metrics_store()
                 return RESULT_FILE_IO_ERROR
 
         simulation_index = presenter.model.get_simulationID()
+        worker_pool = None
+        sets_table = None
 
         try:
-            wb_sets = openpyxl.load_workbook(presenter.model.fluxModel.motor.get_parameterSetExcelPath())
-            ws_sets = wb_sets.worksheets[0]
-            sets_row_number = ws_sets.max_row                       # 3 header rows + parameter set rows with id-s
-            sets_col_number = ws_sets.max_column
-            sets_number = sets_row_number - 3                       # first 3 rows -> param. type, name, description
+            # Sets.xlsx converted into the IDs & the parameter value matrix (3 header rows + parameter set rows):
+            sets_table = ParameterSets(presenter.model.fluxModel.motor.get_parameterSetExcelPath())
+            sets_table.read()
+            sets_number = sets_table.get_setNumber()
 
             # COMMON PARAMETER DATA FOR THE CHANNEL FILE (Types & Names):
 
-            parameter_types_row = ws_sets[1]
-            parameter_types_list = [p.value for p in parameter_types_row][1:]
-            parameter_types_string = " ".join(parameter_types_list)
+            parameter_names_list, parameter_desc_list, channel_data_string = \
+                Runner._read_parameter_header(presenter, sets_table)
 
-            parameter_names_row = ws_sets[2]
-            parameter_names_list = [p.value for p in parameter_names_row][1:]
-            parameter_names_string = " ".join(parameter_names_list)
+            # PROGRESS BAR INITIALIZATION FOR THE EXECUTION:
 
-            parameter_desc_row = ws_sets[3]                         # this one is only for result file creation
-            parameter_desc_list = [p.value for p in parameter_desc_row][1:]
+            Runner._set_progress(presenter=presenter, value=(presenter.model.get_simulationID() - 1),
+                                 maximum=sets_number)
 
-            parameter_string = parameter_types_string + "\n" + parameter_names_string + "\n{values}"
-            channel_data_string = presenter.model.get_channelData().format(id="{id}", params=parameter_string)
+            stop_the_summary_creator = False                        # stop when there are no more result files available
 
-            # PROGRESS BAR INITIALIZATION FOR THE EXECUTION:
+            # FLUX LAUNCHER: time limit, log files and resource accounting for every simulation
 
-            presenter.view.progressBar.setMaximum(sets_number)
-            Runner._set_progress(presenter=presenter, value=(presenter.model.get_simulationID() - 1))
+            if not presenter.model.is_sessionSummary():
+                flux_launcher = FluxLauncher(Runner._flux_executable(presenter),
+                                             presenter.model.fluxModel.get_modelPath() + "/Results",
+                                             presenter.model.fluxModel.get_modelName(),
+                                             presenter.model.get_simulationTimeout() * 60)
+                Runner.flux_launcher = flux_launcher
 
-            stop_the_summary_creator = False                        # stop when there are no more result files available
+                Runner._open_simulation_cache(presenter)
+
+            Runner._open_surrogate_model(presenter)
+            Runner._open_result_parser(presenter)
+            Runner._open_waveform_store(presenter, sets_table)
+            Runner._open_summary_checkpointer(presenter)
+
+            # N-WORKER EXECUTION MODE: the upcoming rows are simulated in parallel, in isolated working directories
+            # PIPELINED EXECUTION MODE: one more row is queued, so Flux computes it while the results are processed
+
+            if (presenter.model.get_workerNumber() > 1 or presenter.model.is_pipelinedExecution()) \
+                    and not presenter.model.is_sessionSummary():
+                worker_pool = FluxWorkerPool(presenter.model.get_workerNumber(),
+                                             presenter.model.fluxModel.get_modelPath(),
+                                             presenter.model.fluxModel.get_modelName(),
+                                             flux_launcher)
 
             # MAIN LOOP: one iteration for each parameter combination (simulation in Flux)
             while simulation_index < sets_number + 1:
@@ -86,81 +146,151 @@ class Runner:
 
                 Runner._update_estimated_time(presenter=presenter, index=simulation_index, sets_number=sets_number)
 
-                parameter_values_row = ws_sets[simulation_index + 3]            # 3 header rows in the Excel file
-                parameter_values_id = parameter_values_row[0].value
-                parameter_values_list = [p.value for p in parameter_values_row][1:]
+                parameter_values_id = sets_table.get_id(simulation_index)
+                parameter_values_list = sets_table.get_parameterValues(simulation_index)
+
+                row_is_skipped = False
+                row_is_simulated = False                                        # simulated in this execution
+
+                # Simulations finished by the worker pool before the last stop don't have to be repeated:
+                if presenter.model.is_completedSimulation(parameter_values_id):
+                    simulation_is_needed = False
 
                 # Search for already existing simulation result files from Flux:
-                if not presenter.model.is_sessionNew() or presenter.model.get_summarySavingProblem():
+                elif not presenter.model.is_sessionNew() or presenter.model.get_summarySavingProblem():
 
                     if presenter.model.get_summarySavingProblem():
                         presenter.model.set_summarySavingProblem(False)         # reset this variable, try to save again
 
-                    simulation_is_needed = not Runner._check_existing_result_files(presenter=presenter,
-                                                                                   row_id=parameter_values_id)
+                    simulation_is_needed = not Runner._is_simulated(presenter=presenter, row_id=parameter_values_id)
                     print("Simulation is needed:", simulation_is_needed)
 
+                    # Rows skipped by the surrogate model have no raw result files:
+                    if simulation_is_needed and presenter.model.is_sessionSummary() \
+                            and Runner.journal.is_skipped(parameter_values_id):
+                        simulation_is_needed = False
+                        row_is_skipped = True
+
                     # When simulation is required for summary creation in the summary session, we can't continue:
-                    if simulation_is_needed and presenter.model.is_sessionSummary():
+                    elif simulation_is_needed and presenter.model.is_sessionSummary():
                         if simulation_index == 1:
                             return MISSING_RAW_FILES                            # no raw results files at all
                         stop_the_summary_creator = True
                 else:
                     simulation_is_needed = True
 
+                # Same model, scenario & parameter values simulated before (in any project) -> copy the results:
+                if simulation_is_needed and not stop_the_summary_creator \
+                        and (worker_pool is None or not worker_pool.is_submitted(parameter_values_id)) \
+                        and Runner._fetch_from_cache(channel_data_string, parameter_values_list, parameter_values_id):
+                    Runner.journal.record(parameter_values_id, simulation_index, RunJournal.SIMULATED)
+                    simulation_is_needed = False
+
+                # The metrics of the row are predicted confidently outside the region of interest -> no simulation:
+                if simulation_is_needed and not stop_the_summary_creator \
+                        and (worker_pool is None or not worker_pool.is_submitted(parameter_values_id)) \
+                        and Runner._is_skipped_by_surrogate(parameter_values_list):
+                    print("Simulation is skipped by the surrogate model")
+                    Runner.journal.record(parameter_values_id, simulation_index, RunJournal.SKIPPED)
+                    simulation_is_needed = False
+                    row_is_skipped = True
+
                 # FINALLY - START A NEW SIMULATION IN  FLUX:
-                if simulation_is_needed and not stop_the_summary_creator:
-                    Runner._execute_flux_simulation(presenter, channel_data_string,
-                                                    parameter_values_list, parameter_values_id)
+                if worker_pool is not None:
+                    if simulation_is_needed and not worker_pool.is_submitted(parameter_values_id):
+                        worker_pool.submit(parameter_values_id, Runner._create_channel_data(
+                            channel_data_string, parameter_values_list, parameter_values_id))
+                        Runner.journal.record(parameter_values_id, simulation_index, RunJournal.CLAIMED)
+
+                    Runner._fill_worker_pool(presenter, worker_pool, sets_table, channel_data_string,
+                                             simulation_index, sets_number)
+
+                    if worker_pool.is_submitted(parameter_values_id):
+                        simulation_record = worker_pool.wait(parameter_values_id)
+                        presenter.model.extend_simulationTimes(int(simulation_record.get_wallTime()))
+
+                        simulation_error = Runner._check_simulation(presenter, simulation_record)
+                        if simulation_error is not None:
+                            presenter.model.set_simulationID(simulation_index)
+                            return simulation_error
+
+                        Runner.journal.record(parameter_values_id, simulation_index, RunJournal.SIMULATED)
+                        row_is_simulated = True
+
+                elif simulation_is_needed and not stop_the_summary_creator:
+                    Runner.journal.record(parameter_values_id, simulation_index, RunJournal.CLAIMED)
+                    simulation_record = Runner._execute_flux_simulation(presenter, flux_launcher, channel_data_string,
+                                                                        parameter_values_list, parameter_values_id)
+
+                    simulation_error = Runner._check_simulation(presenter, simulation_record)
+                    if simulation_error is not None:
+                        presenter.model.set_simulationID(simulation_index)
+                        return simulation_error
+
+                    Runner.journal.record(parameter_values_id, simulation_index, RunJournal.SIMULATED)
+                    row_is_simulated = True
 
                 # PROCESS RAW DATA FILES:
-                if not stop_the_summary_creator:
+                if not stop_the_summary_creator and not row_is_skipped:
 
-                    result = Result()
+                    # The parser processes already work on the files of the upcoming rows (all of them exist):
+                    if presenter.model.is_sessionSummary():
+                        Runner._prefetch_ripple_files(presenter, sets_table, simulation_index, sets_number)
 
-                    file_path = presenter.model.fluxModel.get_modelPath() + "/Results/"
-                    file_name = presenter.model.fluxModel.get_modelName()[:-4] + "_" + parameter_values_id
+                    result, parse_error = Runner._parse_raw_data_files(presenter, parameter_values_id)
+                    if parse_error is not None:
+                        return parse_error
 
-                    # Create Cogging & BEMF objects:
-                    if presenter.model.is_scenarioCogging():
-                        file = file_path + file_name + "_Cogging_BEMF.xls"
-                        if not result.setup_Cogging_BEMF(file, presenter.model.fluxModel, presenter.model.get_scenarioID):
-                            return RAW_COGGING_FILE_ERROR
+                    Runner.journal.record(parameter_values_id, simulation_index, RunJournal.PARSED)
 
-                    # Create Ripple objects:
-                    if presenter.model.is_scenarioRipple():
-                        file = file_path + file_name + "_LOAD_{0}_GAMMA_{1}.xls"
-                        if not result.setup_Ripple(file=file, flux_model=presenter.model.fluxModel):
-                            return RAW_RIPPLE_FILE_ERROR
+                    # Only raw result files which could be processed are shared with the other projects:
+                    if row_is_simulated:
+                        Runner._store_in_cache(channel_data_string, parameter_values_list, parameter_values_id)
+
+                    if Runner.waveform_store is not None:
+                        Runner.waveform_store.add(simulation_index - 1, result)
 
                 # CREATE PRETTY EXCEL FILES:
 
                 try:
                     if not stop_the_summary_creator:
-                        Runner._create_summary_file(presenter, result, simulation_index, parameter_values_id,
-                                                    parameter_desc_list, parameter_names_list, parameter_values_list)
-
-                        # TODO DETAILED FILES - FUTURE DEVELOPMENT
+                        if row_is_skipped:
+                            Runner._create_skipped_summary_row(parameter_values_id, parameter_values_list)
+                        else:
+                            Runner._create_summary_file(presenter, result, simulation_index, parameter_values_id,
+                                                        parameter_desc_list, parameter_names_list,
+                                                        parameter_values_list)
+                            Runner._train_surrogate_model()
 
-                    # Saving in summary mode: only at the end (stop_the_summary_creator = True)
-                    # Saving in normal mode:  after every simulation
-                    if stop_the_summary_creator or not presenter.model.is_sessionSummary() or \
-                            simulation_index == sets_number:
+                            # TODO DETAILED FILES - FUTURE DEVELOPMENT
 
-                        path = presenter.model.fluxModel.get_modelPath() + "/Results/{}.xlsx"
+                        # The rows of the simulation are committed together into the metrics store:
+                        Runner.metrics_store.commit()
+                        Runner.journal.record(parameter_values_id, simulation_index, RunJournal.SUMMARIZED)
 
-                        Runner.summary_wb.save(path.format("Summary"))
+                        # Summary.xlsx in summary mode: only at the end (stop_the_summary_creator = True)
+                        # Summary.xlsx in normal mode:  in the background, after some rows or some time, and at the end
+                        Runner.summary_checkpointer.finish_row()
 
-                except IOError:
+                except (IOError, sqlite3.Error):
                     presenter.model.set_simulationID(simulation_index)
                     return RESULT_FILE_IO_ERROR
 
+                presenter.model.remove_completedSimulation(parameter_values_id)
+
                 if not stop_the_summary_creator:
+                    Runner._set_progress(presenter=presenter)
                     simulation_index += 1
                 else:
                     break
 
-            wb_sets.close()
+            # Summary.xlsx with the rows since the last checkpoint (completion, stop, missing raw files of the summary
+            # session):
+            try:
+                Runner._close_summary_checkpointer()
+            except (IOError, sqlite3.Error):
+                presenter.model.set_simulationID(simulation_index)
+                return RESULT_FILE_IO_ERROR
 
             if simulation_index > sets_number:
                 presenter.model.set_simulationID(1)
@@ -178,20 +308,218 @@ class Runner:
             presenter.model.set_simulationID(simulation_index)
             return EXECUTION_ERROR
 
+        finally:
+            # Let the running simulations of the workers finish, their results are used after continuing:
+            if worker_pool is not None:
+                for simulation_record in worker_pool.shutdown():
+                    if Runner._check_simulation(presenter, simulation_record) is None:
+                        presenter.model.add_completedSimulation(simulation_record.get_parameterValuesID())
+                        Runner.journal.record(simulation_record.get_parameterValuesID(), None,
+                                              RunJournal.SIMULATED)
+
+            Runner._close_result_parser()
+            Runner._close_waveform_store()
+
+            if sets_table is not None:
+                sets_table.close()
+
+            # Errors: the finished rows are exported, the error of the execution is reported anyway
+            try:
+                Runner._close_summary_checkpointer()
+            except (IOError, sqlite3.Error):
+                pass
+
+            Runner._close_metrics_store()
+
+    @staticmethod
+    def _run_distributed(presenter):
+        """ Multi-node execution mode: every node claims the next unclaimed row of Sets.xlsx with a lease file in the
+        shared Results folder, and simulates it; the raw result files are the shared state (a row is done when its
+        files exist). When every row is done, one of the nodes merges the results into Summary.xlsx in a summary
+        session. """
+
+        model_path = presenter.model.fluxModel.get_modelPath()
+        model_name = presenter.model.fluxModel.get_modelName()
+
+        row_leases = RowLeases(model_path + "/Results", presenter.model.get_nodeName())
+        worker_pool = None
+
+        try:
+            sets_table = ParameterSets(presenter.model.fluxModel.motor.get_parameterSetExcelPath())
+            sets_table.read()
+
+            _, _, channel_data_string = Runner._read_parameter_header(presenter, sets_table)
+
+            parameter_sets = [[sets_table.get_id(index), sets_table.get_parameterValues(index)]
+                              for index in range(1, sets_table.get_setNumber() + 1)]
+            sets_number = len(parameter_sets)
+
+            sets_table.close()
+
+            # Every node has its own workers (own scratch directories), the sequential mode is a pool of 1 worker:
+            flux_launcher = FluxLauncher(Runner._flux_executable(presenter), model_path + "/Results",
+                                         model_name, presenter.model.get_simulationTimeout() * 60)
+            Runner.flux_launcher = flux_launcher
+            worker_pool = FluxWorkerPool(presenter.model.get_workerNumber(), model_path, model_name, flux_launcher,
+                                         presenter.model.get_nodeName())
+
+            Runner._open_simulation_cache(presenter)
+            submitted_ids = []                                          # in the order of the submission
+            done_ids = set()                                # rows with raw result files, they aren't checked again
+
+            row_leases.start_renewal()
+
+            # MAIN LOOP: claim rows for the free workers, wait for the oldest simulation
+            while True:
+
+                if not presenter.model.get_executionInProgress():               # the STOP button was pressed
+                    return EXECUTION_STOP
+
+                # The raw result files (on the shared folder) are only checked for the rows which aren't known to be
+                # done, until the workers are busy; the rows leased by another node are only claimed (an expired
+                # lease is broken), their files are checked after the lease is released
+                leased_ids = row_leases.get_leasedIds()
+
+                for parameter_values_id, parameter_values_list in parameter_sets:
+
+                    if worker_pool.get_submittedNumber() >= worker_pool.get_workerNumber():
+                        break
+
+                    if parameter_values_id in done_ids or worker_pool.is_submitted(parameter_values_id):
+                        continue
+
+                    if parameter_values_id not in leased_ids:
+                        if Runner._check_existing_result_files(presenter, parameter_values_id) \
+                                or Runner._fetch_from_cache(channel_data_string, parameter_values_list,
+                                                            parameter_values_id):
+                            done_ids.add(parameter_values_id)
+                            continue
+
+                    if not row_leases.claim(parameter_values_id):
+                        continue
+
+                    # Another node may have finished the row (and released its lease) since the listing -> check the
+                    # raw result files again while holding the lease
+                    if Runner._check_existing_result_files(presenter, parameter_values_id):
+                        row_leases.release(parameter_values_id)
+                        done_ids.add(parameter_values_id)
+                        continue
+
+                    worker_pool.submit(parameter_values_id, Runner._create_channel_data(
+                        channel_data_string, parameter_values_list, parameter_values_id))
+                    submitted_ids.append(parameter_values_id)
+
+                Runner._set_progress(presenter=presenter, value=len(done_ids), maximum=sets_number)
+                Runner._update_estimated_time(presenter=presenter, index=len(done_ids) + 1, sets_number=sets_number)
+
+                if len(done_ids) == sets_number and len(submitted_ids) == 0:
+                    break
+
+                # Every remaining row is simulated by another node -> wait for them (or for their leases to expire):
+                if len(submitted_ids) == 0:
+                    time.sleep(LEASE_POLL_INTERVAL)
+                    continue
+
+                parameter_values_id = submitted_ids.pop(0)
+                simulation_record = worker_pool.wait(parameter_values_id)
+                row_leases.release(parameter_values_id)
+
+                presenter.model.extend_simulationTimes(int(simulation_record.get_wallTime()))
+
+                # The row would be claimed again and again (by every node):
+                simulation_error = Runner._check_simulation(presenter, simulation_record)
+                if simulation_error is not None:
+                    return simulation_error
+                done_ids.add(parameter_values_id)
+
+                # The raw result files are processed before they are shared through the cache (the parsed blocks
+                # are kept in the sidecar files for the final pass):
+                if Runner.simulation_cache is not None:
+                    _, parse_error = Runner._parse_raw_data_files(presenter, parameter_values_id)
+                    if parse_error is not None:
+                        return parse_error
+
+                    Runner._store_in_cache(channel_data_string, dict(parameter_sets)[parameter_values_id],
+                                           parameter_values_id)
+
+            worker_pool.shutdown()
+            worker_pool = None
+
+            # FINAL PASS: only one node merges the raw result files into Summary.xlsx
+            if not row_leases.claim(SUMMARY_LEASE_ID):
+                return EXECUTION_DONE
+
+            session_new, session_old = presenter.model.is_sessionNew(), presenter.model.is_sessionOld()
+
+            # Summary.xlsx is always created from scratch; the raw result files are the state of the multi-node
+            # execution, so the merge starts a new run journal (the entries of a previous single-node execution are
+            # out of date):
+            RunJournal(model_path + "/Results").clear()
+
+            presenter.model.set_sessionNew(False)                       # only the existing raw files are processed
+            presenter.model.set_sessionOld(False)
+            presenter.model.set_sessionSummary(True)
+            presenter.model.set_simulationID(1)
+            try:
+                return Runner._run(presenter)
+            finally:
+                presenter.model.set_sessionSummary(False)
+                presenter.model.set_sessionOld(session_old)
+                presenter.model.set_sessionNew(session_new)
+
+        except:
+            return EXECUTION_ERROR
+
+        finally:
+            if worker_pool is not None:
+                worker_pool.shutdown()
+            row_leases.stop_renewal()
+
+    @staticmethod
+    def _terminate_simulations():
+        """ Kill the running Flux simulations (closing the application), the execution stops after them """
+
+        if Runner.flux_launcher is not None:
+            Runner.flux_launcher.terminate()
+
+    @staticmethod
+    def _read_parameter_header(presenter, sets_table):
+        """ Take the first 3 rows of Sets.xlsx (parameter types, names & descriptions); return the parameter names,
+        the descriptions and the channel data template with the types & names of the parameters """
+
+        parameter_types_list = sets_table.get_parameterTypes()
+        parameter_types_string = " ".join(parameter_types_list)
+
+        parameter_names_list = sets_table.get_parameterNames()
+        parameter_names_string = " ".join(parameter_names_list)
+
+        parameter_desc_list = sets_table.get_parameterDescriptions()    # this one is only for result file creation
+
+        parameter_string = parameter_types_string + "\n" + parameter_names_string + "\n{values}"
+        channel_data_string = presenter.model.get_channelData().format(id="{id}", params=parameter_string)
+
+        return parameter_names_list, parameter_desc_list, channel_data_string
+
     @staticmethod
     def _load_workbooks(presenter):
-        """ Try to load the already existing summary and detailed result files """
+        """ Try to load the already existing summary (metrics store) and detailed result files """
+
+        summary_path = presenter.model.fluxModel.get_modelPath() + "/Results/Summary.xlsx"
 
-        if not (os.path.exists(presenter.model.fluxModel.get_modelPath() + "/Results/Summary.xlsx")):
+        if len(Runner.metrics_store.get_sheetNames()) == 0 and not os.path.exists(summary_path):
             presenter.model.set_simulationID(1)
         else:
             try:
-                # SUMMARY FILE:
+                # SUMMARY FILE: the projects created before the metrics store have only Summary.xlsx
 
-                Runner.summary_wb = load_workbook(presenter.model.fluxModel.get_modelPath() + "/Results/Summary.xlsx")
-                sheets = Runner.summary_wb.sheetnames
+                if len(Runner.metrics_store.get_sheetNames()) == 0:
+                    Runner.metrics_store.import_workbook(summary_path)
 
-                # Search for valid sheets in the summary Excel:
+                sheets = Runner.metrics_store.get_sheetNames()
+
+                Runner.summary_sheets = [[], [], []]                        # sheets of the previous executions
+
+                # Search for valid sheets in the summary:
                 if not ("1 Stack" in sheets or "2 Stacks" in sheets or "3 Stacks" in sheets):
                     presenter.model.set_simulationID(1)
                 else:
@@ -199,35 +527,40 @@ class Runner:
                     next_simulation_id = []
                     if "1 Stack" in sheets:
                         Runner.stack1 = True
-                        ws_summary1 = Runner.summary_wb.get_sheet_by_name("1 Stack")
-                        next_simulation_id.append(ws_summary1.max_row - 1)
-                        Runner.summary_worksheets[0].append([0, ws_summary1])
+                        next_simulation_id.append(Runner.metrics_store.get_rowNumber("1 Stack") - 1)
+                        Runner.summary_sheets[0].append([0, "1 Stack"])
 
                     if "2 Stacks" in sheets:
                         Runner.stack2 = True
-                        ws_summary2 = Runner.summary_wb.get_sheet_by_name("2 Stacks")
-                        next_simulation_id.append(ws_summary2.max_row - 1)
-                        Runner.summary_worksheets[0].append([1, ws_summary2])
+                        next_simulation_id.append(Runner.metrics_store.get_rowNumber("2 Stacks") - 1)
+                        Runner.summary_sheets[0].append([1, "2 Stacks"])
 
                     if "3 Stacks" in sheets:
                         Runner.stack3 = True
-                        ws_summary3 = Runner.summary_wb.get_sheet_by_name("3 Stacks")
-                        next_simulation_id.append(ws_summary3.max_row - 1)
-                        Runner.summary_worksheets[0].append([2, ws_summary3])
+                        next_simulation_id.append(Runner.metrics_store.get_rowNumber("3 Stacks") - 1)
+                        Runner.summary_sheets[0].append([2, "3 Stacks"])
+
+                    # The run journal knows the last row committed into the metrics store, even if a sheet is longer:
+                    resume_index = Runner.journal.get_resumeIndex()
+                    if resume_index is not None:
+                        presenter.model.set_simulationID(resume_index)
+                    else:
+                        presenter.model.set_simulationID(min(next_simulation_id))
 
-                    presenter.model.set_simulationID(min(next_simulation_id))
+                    # 2 header rows, then the rows before the next ID:
+                    Runner.metrics_store.truncate(presenter.model.get_simulationID() + 1)
 
                 if presenter.model.is_dependencyGamma():
                     if "Gamma Dependency" not in sheets:
                         presenter.model.set_simulationID(1)
                     else:
-                        Runner.summary_worksheets[1] = Runner.summary_wb.get_sheet_by_name("Gamma Dependency")
+                        Runner.summary_sheets[1] = "Gamma Dependency"
 
                 if presenter.model.is_dependencyLoad():
                     if "Load Dependency" not in sheets:
                         presenter.model.set_simulationID(1)
                     else:
-                        Runner.summary_worksheets[2] = Runner.summary_wb.get_sheet_by_name("Load Dependency")
+                        Runner.summary_sheets[2] = "Load Dependency"
 
                 # DETAILED FILES: TODO
                 """
@@ -258,6 +591,37 @@ class Runner:
             except IOError:
                 return RESULT_FILE_IO_ERROR
 
+    @staticmethod
+    def _is_simulated(presenter, row_id):
+        """ Check whether the row has already been simulated: its raw result files exist, and the run journal doesn't
+        show an unfinished or failed simulation of the row (its files can be partial) """
+
+        return not Runner.journal.is_interrupted(row_id) and Runner._check_existing_result_files(presenter, row_id)
+
+    @staticmethod
+    def _parse_raw_data_files(presenter, parameter_values_id):
+        """ Process the raw result files of the row; return the Result object and None, or None and the error """
+
+        result = Result()
+
+        file_path = presenter.model.fluxModel.get_modelPath() + "/Results/"
+        file_name = presenter.model.fluxModel.get_modelName()[:-4] + "_" + parameter_values_id
+
+        # Create Cogging & BEMF objects:
+        if presenter.model.is_scenarioCogging():
+            file = file_path + file_name + "_Cogging_BEMF.xls"
+            if not result.setup_Cogging_BEMF(file, presenter.model.fluxModel, presenter.model.get_scenarioID):
+                return None, RAW_COGGING_FILE_ERROR
+
+        # Create Ripple objects:
+        if presenter.model.is_scenarioRipple():
+            file = file_path + file_name + "_LOAD_{0}_GAMMA_{1}.xls"
+            if not result.setup_Ripple(file=file, flux_model=presenter.model.fluxModel,
+                                       result_parser=Runner.result_parser):
+                return None, RAW_RIPPLE_FILE_ERROR
+
+        return result, None
+
     @staticmethod
     def _check_existing_result_files(presenter, row_id):
         """ Check if the raw data files for the current parameter value combination already exist """
@@ -287,59 +651,293 @@ class Runner:
         return True
 
     @staticmethod
-    def _execute_flux_simulation(presenter, channel_data_string, parameter_values_list, parameter_values_id):
+    def _fill_worker_pool(presenter, worker_pool, sets_table, channel_data_string, simulation_index, sets_number):
+        """ Hand over the upcoming parameter combinations to the worker pool, so that every worker has a job
+        (in pipelined mode, even while the results of the actual parameter combination are being processed) """
+
+        look_ahead = worker_pool.get_workerNumber() - 1
+        if presenter.model.is_pipelinedExecution():
+            look_ahead += 1
+
+        last_index = min(simulation_index + look_ahead, sets_number)
+
+        for index in range(simulation_index + 1, last_index + 1):
+
+            parameter_values_id = sets_table.get_id(index)
+            parameter_values_list = sets_table.get_parameterValues(index)
+
+            if worker_pool.is_submitted(parameter_values_id) \
+                    or presenter.model.is_completedSimulation(parameter_values_id):
+                continue
+
+            if not presenter.model.is_sessionNew() and Runner._is_simulated(presenter=presenter,
+                                                                             row_id=parameter_values_id):
+                continue
+
+            if Runner._fetch_from_cache(channel_data_string, parameter_values_list, parameter_values_id):
+                Runner.journal.record(parameter_values_id, index, RunJournal.SIMULATED)
+                presenter.model.add_completedSimulation(parameter_values_id)
+                continue
+
+            # Decided again in the main loop (with more training rows):
+            if Runner._is_skipped_by_surrogate(parameter_values_list):
+                continue
+
+            worker_pool.submit(parameter_values_id, Runner._create_channel_data(
+                channel_data_string, parameter_values_list, parameter_values_id))
+            Runner.journal.record(parameter_values_id, index, RunJournal.CLAIMED)
+
+    @staticmethod
+    def _create_channel_data(channel_data_string, parameter_values_list, parameter_values_id):
+        """ Fill out the channel data template with the ID and the values of the parameter combination """
 
-        # CHANNEL FILE:
         parameter_values_string = ""
         for value in parameter_values_list:
             parameter_values_string += "%.2f" % value + " "
 
-        upcoming_channel_data = channel_data_string.format(id=parameter_values_id,
-                                                           values=parameter_values_string)
+        return channel_data_string.format(id=parameter_values_id, values=parameter_values_string)
+
+    @staticmethod
+    def _open_simulation_cache(presenter):
+        """ Open the simulation cache if it is used (the model is hashed once for the whole execution) """
+
+        if presenter.model.is_simulationCache():
+            Runner.simulation_cache = SimulationCache(presenter.model.get_cacheDirectory(),
+                                                      presenter.model.fluxModel.get_modelPath(),
+                                                      presenter.model.fluxModel.get_modelName())
+        else:
+            Runner.simulation_cache = None
+
+    @staticmethod
+    def _fetch_from_cache(channel_data_string, parameter_values_list, parameter_values_id):
+        """ Copy the raw result files of an identical simulation from the cache; return False if there is none """
+
+        if Runner.simulation_cache is None:
+            return False
+
+        return Runner.simulation_cache.fetch(Runner._create_channel_data(
+            channel_data_string, parameter_values_list, parameter_values_id), parameter_values_id)
+
+    @staticmethod
+    def _store_in_cache(channel_data_string, parameter_values_list, parameter_values_id):
+        """ Add the raw result files of the simulation to the cache """
+
+        if Runner.simulation_cache is not None:
+            Runner.simulation_cache.store(Runner._create_channel_data(
+                channel_data_string, parameter_values_list, parameter_values_id), parameter_values_id)
+
+    @staticmethod
+    def _open_surrogate_model(presenter):
+        """ Create the surrogate model if it is used, and train it on the rows already in the summary file
+        (the summary session only collects the existing results) """
+
+        if not presenter.model.is_surrogateModel() or presenter.model.is_sessionSummary():
+            Runner.surrogate_model = None
+            return
+
+        Runner.surrogate_model = SurrogateModel(presenter.model.get_surrogateBounds(),
+                                                presenter.model.get_surrogateConfidence())
+
+        sheet_name = Runner._first_summary_sheet()
+        if presenter.model.get_simulationID() > 1 and sheet_name is not None:
+            Runner.surrogate_model.train_from_rows(Runner.metrics_store.get_row(sheet_name, 2),
+                                                   Runner.metrics_store.iter_rows(sheet_name, min_row=3))
+
+    @staticmethod
+    def _open_result_parser(presenter):
+        """ Start the processes parsing the ripple result files if more than one is used """
+
+        Runner._close_result_parser()
+
+        if presenter.model.is_scenarioRipple() and presenter.model.get_parserProcessNumber() > 1:
+            Runner.result_parser = ResultParser(presenter.model.get_parserProcessNumber())
+
+    @staticmethod
+    def _close_result_parser():
+
+        if Runner.result_parser is not None:
+            Runner.result_parser.shutdown()
+            Runner.result_parser = None
+
+    @staticmethod
+    def _open_waveform_store(presenter, sets_table):
+        """ Open the waveform store of the project for the rows of Sets.xlsx if it is used """
+
+        Runner._close_waveform_store()
+
+        if presenter.model.is_waveformStore():
+            Runner.waveform_store = WaveformStore(presenter.model.fluxModel.get_modelPath() + "/Results")
+            Runner.waveform_store.open(sets_table.get_ids(), presenter.model.fluxModel,
+                                       presenter.model.is_scenarioCogging(), presenter.model.is_scenarioRipple())
+
+    @staticmethod
+    def _close_waveform_store():
+
+        if Runner.waveform_store is not None:
+            Runner.waveform_store.close()
+            Runner.waveform_store = None
+
+    @staticmethod
+    def _open_metrics_store(presenter):
+
+        Runner._close_metrics_store()
+
+        Runner.metrics_store = MetricsStore(presenter.model.fluxModel.get_modelPath() + "/Results")
+        Runner.metrics_store.open()
+
+    @staticmethod
+    def _close_metrics_store():
+        """ The rows of an unfinished simulation (not committed) are dropped """
+
+        if Runner.metrics_store is not None:
+            Runner.metrics_store.close()
+            Runner.metrics_store = None
+
+    @staticmethod
+    def _open_summary_checkpointer(presenter):
+        """ Summary.xlsx is generated at the checkpoints in normal sessions, only at the end in the summary session """
+
+        Runner._close_summary_checkpointer(save=False)
+
+        row_interval, time_interval = presenter.model.get_checkpointRows(), presenter.model.get_checkpointTime()
+        if presenter.model.is_sessionSummary():
+            row_interval, time_interval = 0, 0
 
-        channel_file = open("Channel.txt", 'w')  # update Channel file for Flux
+        Runner.summary_checkpointer = SummaryCheckpointer(
+            Runner.metrics_store, presenter.model.fluxModel.get_modelPath() + "/Results/Summary.xlsx", row_interval,
+            time_interval)
+
+    @staticmethod
+    def _close_summary_checkpointer(save=True):
+        """ Generate Summary.xlsx with the rows since the last checkpoint; raise the IOError of the saving """
+
+        if Runner.summary_checkpointer is not None:
+            summary_checkpointer, Runner.summary_checkpointer = Runner.summary_checkpointer, None
+            summary_checkpointer.close(save)
+
+    @staticmethod
+    def _prefetch_ripple_files(presenter, sets_table, simulation_index, sets_number):
+        """ Submit the ripple files of the actual & the next rows to the parser processes (summary session) """
+
+        if Runner.result_parser is None or not presenter.model.is_scenarioRipple():
+            return
+
+        file_path = presenter.model.fluxModel.get_modelPath() + "/Results/"
+        last_index = min(simulation_index + Runner.result_parser.get_processNumber(), sets_number)
+
+        for index in range(simulation_index, last_index + 1):
+            parameter_values_id = sets_table.get_id(index)
+
+            if Runner.journal.is_skipped(parameter_values_id):                  # no raw result files
+                continue
+
+            file_name = presenter.model.fluxModel.get_modelName()[:-4] + "_" + parameter_values_id
+            Runner.result_parser.prefetch(file_path + file_name + "_LOAD_{0}_GAMMA_{1}.xls", presenter.model.fluxModel)
+
+    @staticmethod
+    def _is_skipped_by_surrogate(parameter_values_list):
+        """ Check whether the row is confidently outside the region of interest according to the surrogate model """
+
+        if Runner.surrogate_model is None:
+            return False
+
+        return Runner.surrogate_model.is_outside(parameter_values_list)
+
+    @staticmethod
+    def _train_surrogate_model():
+        """ Add the row just written into the (first) summary sheet to the training data of the surrogate model """
+
+        if Runner.surrogate_model is None:
+            return
+
+        sheet_name = Runner._first_summary_sheet()
+        Runner.surrogate_model.add_summary_row(
+            Runner.metrics_store.get_row(sheet_name, 2),
+            Runner.metrics_store.get_row(sheet_name, Runner.metrics_store.get_rowNumber(sheet_name)))
+
+    @staticmethod
+    def _first_summary_sheet():
+        """ Return the name of the first stack sheet of the metrics store (the list can contain sheets of earlier runs)
+        """
+
+        for _, sheet_name in Runner.summary_sheets[0]:
+            if sheet_name in Runner.metrics_store.get_sheetNames():
+                return sheet_name
+
+        return None
+
+    @staticmethod
+    def _flux_executable(presenter):
+        """ Path of the Flux executable: the one of the Flux installation, unless another one is set """
+
+        if presenter.model.get_fluxExecutable() != "":
+            return presenter.model.get_fluxExecutable()
+
+        return presenter.flux_application_path + FLUX_EXE_PATH
+
+    @staticmethod
+    def _execute_flux_simulation(presenter, flux_launcher, channel_data_string, parameter_values_list,
+                                 parameter_values_id):
+
+        # CHANNEL FILE:
+        upcoming_channel_data = Runner._create_channel_data(channel_data_string, parameter_values_list,
+                                                            parameter_values_id)
+
+        channel_file = open(CHANNEL_FILE_NAME, 'w')  # update Channel file for Flux
         channel_file.write(upcoming_channel_data)
         channel_file.close()
 
-        # RUN FLUX:
-        start_time = time.time()  # measure simulation time
-
+        # RUN FLUX (in the current working directory, where the channel file is):
         cwd = os.getcwd()
-        os.system('cd ' + presenter.model.fluxModel.get_modelPath())
-        flux_path = presenter.flux_application_path + FLUX_EXE_PATH
-        run_flux_command = '"' + flux_path + '" -runPy ' + \
-                           str(cwd) + '\\' + PYFLUX_SCRIPT_NAME + ' -application Flux2D -batch'
-        os.system(run_flux_command)     # os.system() method executes the command (a string) in a subshell
+        simulation_record = flux_launcher.launch(parameter_values_id, cwd, os.path.join(cwd, PYFLUX_SCRIPT_NAME))
+
+        presenter.model.extend_simulationTimes(int(simulation_record.get_wallTime()))
+
+        return simulation_record
+
+    @staticmethod
+    def _check_simulation(presenter, simulation_record):
+        """ Return the error of the finished Flux simulation (time limit, exit code, missing raw result files), or
+        None if the row can be recorded as simulated """
+
+        if simulation_record.is_timedOut():
+            return FLUX_TIMEOUT_ERROR
+
+        if simulation_record.is_failed():
+            return FLUX_EXIT_CODE_ERROR
+
+        if not Runner._check_existing_result_files(presenter, simulation_record.get_parameterValuesID()):
+            return FLUX_SIMULATION_ERROR
 
-        end_time = time.time()
-        presenter.model.extend_simulationTimes(int(end_time - start_time))
+        return None
 
     @staticmethod
-    def _set_progress(presenter, reset=False, value=None):
-        """ Set the progress state in the model and display it on the view (reset is called by the Presenter class) """
+    def _set_progress(presenter, reset=False, value=None, maximum=None):
+        """ Set the progress state in the model and report it through the execution engine of the presenter
+        (reset is called by the Presenter class) """
 
         if reset:
             presenter.model.set_progressState(0)
             presenter.model.simulationTimes = []
-            presenter.view.progressLabel.setText("Calculation: 0/0, estimated finish time: -")
-            presenter.view.progressBar.setValue(0)
+            presenter.engine.report_estimated_time(0, 0, None)
+            presenter.engine.report_progress(0)
+            presenter.engine.flush()
 
         elif value is not None:
             presenter.model.set_progressState(value + 1)            # the number of the next simulation
-            presenter.view.progressBar.setValue(value)              # the number of simulations already executed
+            presenter.engine.report_progress(value, maximum)        # the number of simulations already executed
 
         else:
             progress_value = presenter.model.get_progressState()
             presenter.model.set_progressState(progress_value + 1)
-            presenter.view.progressBar.setValue(progress_value)
+            presenter.engine.report_progress(progress_value)
 
     @staticmethod
     def _update_estimated_time(presenter, index, sets_number):
         """ Update the estimated finish time of the execution based on the data from previous simulation executions """
 
         if len(presenter.model.get_simulationTimes()) == 0:
-            presenter.view.progressLabel.setText("Calculation: {0}/{1}, "
-                                                 "estimated finish time: {2}".format(index, sets_number, "-"))
+            presenter.engine.report_estimated_time(index, sets_number, None)
             return
 
         time_in_sec = 0
@@ -347,12 +945,14 @@ class Runner:
             time_in_sec += time_data
         mean_time_in_sec = time_in_sec / len(presenter.model.get_simulationTimes())
 
+        if not presenter.model.is_sessionSummary():                 # the workers run the simulations in parallel
+            mean_time_in_sec /= presenter.model.get_workerNumber()
+
         remaining_time_in_sec = mean_time_in_sec * (sets_number - index + 1)
 
         current_date = datetime.now() + timedelta(seconds=remaining_time_in_sec)
 
-        presenter.view.progressLabel.setText("Calculation: {0}/{1}, estimated finish time: {2}".format(
-            index, sets_number, current_date.strftime("%b. %d (%A) %H:%M")))
+        presenter.engine.report_estimated_time(index, sets_number, current_date)
 
     @staticmethod
     def _create_summary_file(presenter, result, simulation_index, parameter_values_id, parameter_desc_list,
@@ -373,7 +973,7 @@ class Runner:
         main_parameters_data, ripple_amplitudes, ripple_phases = \
             Runner._get_current_dependent_data(presenter, result, cogging_p2p)
 
-        for ws_container in Runner.summary_worksheets[0]:   # ws_container = [index, worksheet]
+        for ws_container in Runner.summary_sheets[0]:       # ws_container = [index, sheet name]
 
             ws_index = ws_container[0]
 
@@ -381,7 +981,15 @@ class Runner:
                 [bemf_ph_rms[ws_index]] + cogging_amplitudes[ws_index] + ripple_amplitudes[ws_index] + \
                 bemf_amplitudes[ws_index] + cogging_phases[ws_index] + ripple_phases[ws_index] + bemf_phases[ws_index]
 
-            ws_container[1].append(actual_data)
+            Runner.metrics_store.append(ws_container[1], actual_data)
+
+    @staticmethod
+    def _create_skipped_summary_row(parameter_values_id, parameter_values_list):
+        """ Keep the row of the skipped simulation in the summary file (the rows follow the order of Sets.xlsx) """
+
+        for ws_container in Runner.summary_sheets[0]:
+            Runner.metrics_store.append(ws_container[1],
+                                        parameter_values_list + [parameter_values_id, SURROGATE_SKIPPED])
 
     @staticmethod
     def _initialize_summary_file(presenter, parameter_names_list, parameter_desc_list, result):
@@ -390,53 +998,23 @@ class Runner:
         # SET UP THE HEADER ROWS:
         header_row1, header_row2 = Runner._create_summary_file_header(presenter, parameter_names_list,
                                                                       parameter_desc_list, result)
-        initialized_workbook = False
+        Runner.summary_sheets = [[], [], []]                                # sheets of the previous executions
 
         # EXCEL SHEETS FOR 1/2/3 STACKS:
         if result.get_cogging1Stack() is not None or result.get_ripple1Stack() != {}:
             Runner.stack1 = True
-
-            Runner.summary_wb = Workbook()
-            initialized_workbook = True
-            ws_summary1 = Runner.summary_wb.active
-            ws_summary1.title = "1 Stack"
-
-            ws_summary1.append(header_row1)
-            ws_summary1.append(header_row2)
-
-            Runner.summary_worksheets[0].append([0, ws_summary1])   # worksheets in array -> easy to handle with loops
+            Runner.summary_sheets[0].append([0, "1 Stack"])         # sheets in array -> easy to handle with loops
 
         if result.get_cogging2Stack() is not None or result.get_ripple2Stack() != {}:
             Runner.stack2 = True
-
-            if not initialized_workbook:
-                Runner.summary_wb = Workbook()
-                initialized_workbook = True
-                ws_summary2 = Runner.summary_wb.active
-                ws_summary2.title = "2 Stacks"
-            else:
-                ws_summary2 = Runner.summary_wb.create_sheet("2 Stacks")
-
-            ws_summary2.append(header_row1)
-            ws_summary2.append(header_row2)
-
-            Runner.summary_worksheets[0].append([1, ws_summary2])
+            Runner.summary_sheets[0].append([1, "2 Stacks"])
 
         if result.get_cogging3Stack() is not None or result.get_ripple3Stack() != {}:
             Runner.stack3 = True
+            Runner.summary_sheets[0].append([2, "3 Stacks"])
 
-            if not initialized_workbook:
-                Runner.summary_wb = Workbook()
-                initialized_workbook = True
-                ws_summary3 = Runner.summary_wb.active
-                ws_summary3.title = "3 Stacks"
-            else:
-                ws_summary3 = Runner.summary_wb.create_sheet("3 Stacks")
-
-            ws_summary3.append(header_row1)
-            ws_summary3.append(header_row2)
-
-            Runner.summary_worksheets[0].append([2, ws_summary3])
+        Runner.metrics_store.create([sheet_name for _, sheet_name in Runner.summary_sheets[0]],
+                                    [header_row1, header_row2])
 
         # EXCEL SHEETS FOR GAMMA & LOAD DEPENDENCY: TODO FUTURE DEVELOPMENT
         """
@@ -555,7 +1133,7 @@ class Runner:
                     for _ in range(1, len(bemf.get_fftValues()[0])):
                         k += 1
                         header_row1.append("")
-                        header_row2.append("ph\nBackEMF\n{1}\n{0}".format(strings[2], int(bemf.fftValues[0][j])))
+                        header_row2.append("ph\nBackEMF\n{1}\n{0}".format(strings[2], int(bemf.get_fftValues()[0][j])))
 
                         if k == 20:
                             break
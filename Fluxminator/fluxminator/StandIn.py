@@ -0,0 +1,159 @@
+import os
+import time
+import zlib
+import numpy as np
+import xlwt
+
+from fluxminator.Constants import *
+from fluxminator.Model import Range
+
+
+class ChannelData:
+    """ Content of the channel file written for Flux (see Model.create_channel_data) """
+
+    def __init__(self, text):
+
+        lines = text.split("\n")
+
+        # The model path is written with escaped Windows separators:
+        self.modelPath = lines[0].replace('\\\\', '/').replace('\\', '/')
+        self.modelName = lines[1]
+        self.parameterValuesID = lines[2]
+        self.scenarioID = lines[3]
+
+        self.positionCogging = ChannelData._range(lines[5].split())
+        self.positionRipple = ChannelData._range(lines[6].split())
+        self.rangeCurrent = ChannelData._range(lines[7].split()[-3:])
+        self.rangeGamma = ChannelData._range(lines[8].split()[-3:])
+
+        # Parameter types, names & values (one line each):
+        self.parameterNames = lines[10].split()
+        self.parameterValues = [float(value) for value in lines[11].split()]
+
+    def get_modelPath(self): return self.modelPath
+    def get_modelName(self): return self.modelName
+    def get_parameterValuesID(self): return self.parameterValuesID
+    def get_parameterNames(self): return self.parameterNames
+    def get_parameterValues(self): return self.parameterValues
+
+    def is_scenarioCogging(self): return self.scenarioID in ["1", "3"]
+    def is_scenarioRipple(self): return self.scenarioID in ["2", "3"]
+
+    @staticmethod
+    def _range(values):
+        return Range(min_=float(values[0]), max_=float(values[1]), step=float(values[2]))
+
+
+class FluxStandIn:
+    """ Stand-in for the Flux solver (benchmarking & testing without a Flux installation): reads the channel file and
+    writes synthetic raw result files in the layout of the Flux script. The waveforms are smooth functions of the
+    parameter values (cogging & ripple harmonics, sinusoidal BackEMF and current), so the summary metrics, the
+    surrogate model and the optimizer behave like with real simulations. """
+
+    def __init__(self, latency=0.0, waveform_steps=0, failing_rows=()):
+
+        self.latency = latency                          # [s] simulated solving time of one scenario step
+        self.waveformSteps = waveform_steps             # minimal number of rotor positions, 0: from the channel file
+        self.failingRows = set(failing_rows)            # IDs of the rows crashing after their first raw result file
+
+    def run(self, channel_path):
+        """ Create the raw result files of the simulation described by the channel file; a failing row raises a
+        RuntimeError after its first file (a crash of Flux with partial results) """
+
+        with open(channel_path, 'r') as channel_file:
+            channel = ChannelData(channel_file.read())
+
+        coefficients = FluxStandIn._coefficients(channel)
+        file_prefix = os.path.join(channel.get_modelPath(), "Results",
+                                   channel.get_modelName() + "_" + channel.get_parameterValuesID())
+
+        if channel.is_scenarioCogging():
+            time.sleep(self.latency)
+
+            rotor_position = self._rotor_positions(channel.positionCogging)
+            torque = coefficients[0] * 0.05 * (np.sin(6 * self._angle(rotor_position, channel.positionCogging))
+                                               + 0.3 * np.sin(12 * self._angle(rotor_position, channel.positionCogging)))
+            voltage = coefficients[1] * 20 * np.sin(self._angle(rotor_position, channel.positionCogging)) \
+                + coefficients[2] * 2 * np.sin(5 * self._angle(rotor_position, channel.positionCogging))
+
+            FluxStandIn._write_raw_data_file(file_prefix + "_Cogging_BEMF.xls", RAW_COGGING_FILE_START_INDEX,
+                                             rotor_position, torque, voltage, np.zeros(len(rotor_position)))
+            self._check_failure(channel)
+
+        if channel.is_scenarioRipple():
+            rotor_position = self._rotor_positions(channel.positionRipple)
+            angle = self._angle(rotor_position, channel.positionRipple)
+
+            for current_index, current in enumerate(channel.rangeCurrent.get_all_values()):
+                for gamma_index, gamma in enumerate(channel.rangeGamma.get_all_values()):
+                    time.sleep(self.latency)
+
+                    gamma_angle = np.radians(gamma)
+                    torque = coefficients[3] * 0.8 * current * np.cos(gamma_angle) \
+                        + coefficients[0] * 0.05 * np.sin(6 * angle) \
+                        + coefficients[4] * 0.01 * current * np.sin(6 * angle + gamma_angle)
+                    voltage = coefficients[1] * 20 * np.sin(angle) + 0.5 * current * np.sin(angle + gamma_angle)
+                    phase_current = current * np.sin(angle + gamma_angle)
+
+                    FluxStandIn._write_raw_data_file(
+                        file_prefix + "_LOAD_{0}_GAMMA_{1}.xls".format(current_index + 1, gamma_index + 1),
+                        RAW_RIPPLE_FILE_START_INDEX, rotor_position, torque, voltage, phase_current)
+                    self._check_failure(channel)
+
+    def _check_failure(self, channel):
+
+        if channel.get_parameterValuesID() in self.failingRows:
+            raise RuntimeError("Flux stand-in crash: " + channel.get_parameterValuesID())
+
+    def _rotor_positions(self, position_range):
+        """ Rotor positions of the result file (the first step isn't written by Flux) """
+
+        rotor_position = np.array(position_range.get_all_values()[1:])
+
+        if len(rotor_position) < self.waveformSteps:                # continue the rotation with the same step
+            step = position_range.get_step() if position_range.get_step() != 0 else 1.0
+            rotor_position = position_range.get_min() + step * np.arange(1, self.waveformSteps + 1)
+
+        return rotor_position
+
+    @staticmethod
+    def _angle(rotor_position, position_range):
+        """ Electrical angle: one period over the rotor position range of the scenario """
+
+        period = position_range.get_max() - position_range.get_min()
+        return 2 * np.pi * (rotor_position - position_range.get_min()) / (period if period != 0 else 360.0)
+
+    @staticmethod
+    def _coefficients(channel):
+        """ Smooth functions of the parameter values (around 1) scaling the waveforms; the same parameter values give
+        the same results for the same model """
+
+        random = np.random.default_rng(zlib.crc32(channel.get_modelName().encode("utf-8")))
+        parameter_values = np.array(channel.get_parameterValues())
+
+        weights = random.normal(0, 0.2, (5, len(parameter_values)))
+        phases = random.uniform(0, 2 * np.pi, 5)
+
+        return 1 + 0.5 * np.sin(weights @ parameter_values + phases)
+
+    @staticmethod
+    def _write_raw_data_file(file, start_index, rotor_position, torque, voltage, current):
+        """ Write a result file in the layout of the Flux script (header rows, then step, position, torque, voltage,
+        current columns) """
+
+        wb = xlwt.Workbook()
+        ws = wb.add_sheet("Results")
+
+        ws.write(0, 0, "Flux stand-in")
+        ws.write(start_index - 1, 0, "Step")
+        for col, header in enumerate(["Rotor position [deg]", "Torque [N.m]", "Voltage [V]", "Current [A]"]):
+            ws.write(start_index - 1, col + 1, header)
+
+        for i in range(len(rotor_position)):
+            ws.write(start_index + i, 0, i + 1)
+            ws.write(start_index + i, 1, float(rotor_position[i]))
+            ws.write(start_index + i, 2, float(torque[i]))
+            ws.write(start_index + i, 3, float(voltage[i]))
+            ws.write(start_index + i, 4, float(current[i]))
+
+        wb.save(file)
@@ -0,0 +1,219 @@
+import math
+import numpy as np
+
+from scipy.linalg import cho_solve, solve_triangular
+
+from fluxminator.Constants import *
+from fluxminator.Refinement import summary_metric_column
+
+
+class SurrogateModel:
+    """ Gaussian process regression of the summary metrics over the parameter values, trained incrementally on the rows
+    written into Summary.xlsx. A row whose predicted metric is outside the region of interest (the bounds of the
+    metrics) by more than `confidence` standard deviations doesn't have to be simulated in Flux.
+
+    The exact model is O(n^2) memory and O(n^3) fitting, so the training data is limited to the max_rows most recent
+    rows: at the limit, the older half is dropped and the model is fitted again on the recent half (once in every
+    max_rows / 2 rows). """
+
+    def __init__(self, bounds, confidence=SURROGATE_CONFIDENCE, min_rows=SURROGATE_MIN_ROWS,
+                 max_rows=SURROGATE_MAX_ROWS, load_index=1):
+
+        self.bounds = bounds                # key=metric (REFINE_METRICS); value=[min, max], None: not limited
+        self.metrics = sorted(bounds)
+        self.confidence = confidence        # [standard deviation]
+        self.minRows = min_rows             # no prediction before this number of training rows
+        self.maxRows = max(max_rows, 2)     # training rows at most
+        self.loadIndex = load_index         # load group of the load dependent metrics
+
+        self.points = []                    # parameter values of the training rows
+        self.values = []                    # metrics of the training rows
+
+        self.columns = None                 # columns of the metrics in the summary sheet
+        self.parameterNumber = None
+
+        # Fitted model (the Cholesky factor is extended for every new row in its preallocated buffer, the
+        # hyperparameters are selected again when the number of training rows has doubled or reached the limit):
+        self.offset = None                  # normalization of the parameter values
+        self.scale = None
+        self.lengthScale = None
+        self.cholesky = None                # lower Cholesky factor of the kernel matrix of the training rows
+        self.choleskyBuffer = None          # the Cholesky factor is its upper left block (view)
+
+        self.alpha = None                   # K^-1 * normalized metrics (None: has to be updated)
+        self.valueMean = None
+        self.valueStd = None
+        self.signalVariance = None
+
+    def get_trainingNumber(self): return len(self.points)
+
+    def train_from_summary(self, ws_summary):
+        """ Add every completed row of the summary sheet to the training data """
+
+        self.train_from_rows([cell.value for cell in ws_summary[2]], ws_summary.iter_rows(min_row=3, values_only=True))
+
+    def train_from_rows(self, header_row, rows):
+        """ Add the summary rows (e.g. of the metrics store) to the training data; header_row: 2nd row of the sheet """
+
+        for row in rows:
+            self.add_summary_row(header_row, row)
+
+    def add_summary_row(self, header_row, row):
+        """ Add a row of the summary sheet to the training data (rows without the metrics are ignored) """
+
+        if self.columns is None:
+            self.parameterNumber = list(header_row).index("No.")
+            self.columns = [summary_metric_column(header_row, metric, self.loadIndex) for metric in self.metrics]
+
+        values = [row[column] for column in self.columns]
+        if not all(isinstance(value, (int, float)) for value in values):
+            return
+
+        self.add(row[:self.parameterNumber], values)
+
+    def add(self, point, values):
+        """ Add the metrics of a simulated parameter combination to the training data """
+
+        point = [float(value) for value in point]
+
+        if len(self.points) >= self.maxRows:                # the older half is dropped, the model is fitted again
+            del self.points[:len(self.points) - self.maxRows // 2]
+            del self.values[:len(self.values) - self.maxRows // 2]
+            self.cholesky = None
+
+        if self.cholesky is not None and len(self.points) < len(self.choleskyBuffer):
+            self._extend_cholesky(point)
+        else:
+            self.cholesky = None
+
+        self.points.append(point)
+        self.values.append([float(value) for value in values])
+        self.alpha = None
+
+    def predict(self, point):
+        """ Return the predicted mean & standard deviation of every metric, or None if there are too few rows """
+
+        prediction = self.predict_table([point])
+        if prediction is None:
+            return None
+
+        return prediction[0][0], prediction[1][0]
+
+    def predict_table(self, points):
+        """ Predict the metrics of several parameter combinations at once (one row for every combination) """
+
+        if len(self.points) < max(self.minRows, 2):
+            return None
+
+        if self.cholesky is None:
+            self._fit()
+        if self.alpha is None:
+            self._update_alpha()
+
+        x = self._normalize(np.array(points, dtype=float))
+        k = self._kernel(x, self._normalize(np.array(self.points)), self.lengthScale)
+
+        v = solve_triangular(self.cholesky, k.T, lower=True)
+        variance = np.maximum(1.0 + SURROGATE_NOISE - np.sum(v * v, axis=0), 0.0)[:, None] * self.signalVariance
+
+        means = self.valueMean + self.valueStd * (k @ self.alpha)
+        stds = self.valueStd * np.sqrt(variance)
+
+        return means, stds
+
+    def is_outside(self, point):
+        """ Check whether the parameter combination is confidently outside the region of interest """
+
+        prediction = self.predict(point)
+        if prediction is None:
+            return False
+
+        for metric, mean, std in zip(self.metrics, *prediction):
+            lower, upper = self.bounds[metric]
+
+            if upper is not None and mean - self.confidence * std > upper:
+                return True
+            if lower is not None and mean + self.confidence * std < lower:
+                return True
+
+        return False
+
+    def _fit(self):
+        """ Select the length scale of the kernel by the marginal likelihood of the training rows """
+
+        points = np.array(self.points)
+        self.offset = points.min(axis=0)
+        self.scale = np.where(np.ptp(points, axis=0) > 0, np.ptp(points, axis=0), 1.0)
+
+        x = self._normalize(points)
+
+        best_likelihood = -math.inf
+        best_cholesky = None
+        for length_scale in SURROGATE_LENGTH_SCALES:
+            try:
+                cholesky = np.linalg.cholesky(self._kernel(x, x, length_scale) + SURROGATE_NOISE * np.eye(len(x)))
+            except np.linalg.LinAlgError:
+                continue
+
+            likelihood = self._log_likelihood(cholesky)
+            if likelihood > best_likelihood:
+                best_likelihood = likelihood
+                self.lengthScale = length_scale
+                best_cholesky = cholesky
+
+        # Room for the new rows until the next fit:
+        n = len(self.points)
+        self.choleskyBuffer = np.zeros((min(2 * n, self.maxRows), min(2 * n, self.maxRows)))
+        self.choleskyBuffer[:n, :n] = best_cholesky
+        self.cholesky = self.choleskyBuffer[:n, :n]
+        self.alpha = None
+
+    def _extend_cholesky(self, point):
+        """ Add a row to the Cholesky factor for the new training row (O(n^2) instead of a new fit); the factor is
+        extended in its buffer, without copying it """
+
+        x = self._normalize(np.array([point]))
+        k = self._kernel(self._normalize(np.array(self.points)), x, self.lengthScale)[:, 0]
+
+        l_row = solve_triangular(self.cholesky, k, lower=True)
+        diagonal = math.sqrt(max(1.0 + SURROGATE_NOISE - l_row @ l_row, SURROGATE_NOISE))
+
+        n = len(self.points)
+        self.choleskyBuffer[n, :n] = l_row
+        self.choleskyBuffer[n, n] = diagonal
+
+        self.cholesky = self.choleskyBuffer[:n + 1, :n + 1]
+
+    def _update_alpha(self):
+
+        values = np.array(self.values)
+        self.valueMean = values.mean(axis=0)
+        self.valueStd = np.where(values.std(axis=0) > 0, values.std(axis=0), 1.0)
+
+        normalized_values = (values - self.valueMean) / self.valueStd
+        self.alpha = cho_solve((self.cholesky, True), normalized_values)
+
+        # Signal variance of every metric (maximum likelihood estimate for the given correlation):
+        self.signalVariance = np.maximum(np.sum(normalized_values * self.alpha, axis=0) / len(values), 1e-12)
+
+    def _log_likelihood(self, cholesky):
+        """ Marginal log-likelihood of the metrics (the signal variances are maximized out) """
+
+        values = np.array(self.values)
+        normalized_values = (values - values.mean(axis=0)) / np.where(values.std(axis=0) > 0, values.std(axis=0), 1.0)
+
+        alpha = cho_solve((cholesky, True), normalized_values)
+        signal_variance = np.maximum(np.sum(normalized_values * alpha, axis=0) / len(values), 1e-12)
+
+        return -0.5 * len(values) * np.sum(np.log(signal_variance)) \
+            - len(self.metrics) * np.sum(np.log(np.diag(cholesky)))
+
+    def _normalize(self, points):
+        return (points - self.offset) / self.scale
+
+    @staticmethod
+    def _kernel(a, b, length_scale):
+        """ Squared exponential kernel """
+
+        squared_distances = np.sum((a[:, None, :] - b[None, :, :]) ** 2, axis=2)
+        return np.exp(-0.5 * squared_distances / length_scale ** 2)
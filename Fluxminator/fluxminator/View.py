@@ -11,11 +11,14 @@ from PyQt5.QtGui import QRegExpValidator
 from ui.Fluxminator_UI import FluxminatorLayout, ParameterSetCreatorLayout
 from PyQt5.QtCore import QRegExp, pyqtSignal
 
+from fluxminator.Constants import DESIGN_TYPES, WAVEFORM_DIRECTORY
+
 
 class ParameterSetCreator(QWidget, ParameterSetCreatorLayout):
     """ Widget for creating the parameter set table required for simulations """
 
     signal = pyqtSignal()               # needed for emitting signal when closing the widget window
+    parameterTableFinished = pyqtSignal(str)    # re-emits the result of the parameter table engine in the GUI thread
 
     def __init__(self):
 
@@ -76,6 +79,24 @@ class ParameterSetCreator(QWidget, ParameterSetCreatorLayout):
         self.create_title = QLabel("Create excel file")
         self.create_rowNumberLabel = QLabel("Number of rows: 0")
 
+        self.create_designLabel = QLabel("Design:")
+        self.create_designCombo = QComboBox()
+        self.create_designCombo.addItems(DESIGN_TYPES)
+        self.create_designCombo.setToolTip("Full grid: every combination of the parameter values; other designs: "
+                                           "the given number of rows covering the parameter ranges (fractional "
+                                           "factorial: the next power of 2)")
+
+        self.create_designRowSpinbox = QSpinBox()
+        self.create_designRowSpinbox.setMaximum(100000)
+        self.create_designRowSpinbox.setValue(100)
+        self.create_designRowSpinbox.setDisabled(True)
+
+        self.create_constraintsLabel = QLabel("Constraints:")
+        self.create_constraintsLineEdit = QLineEdit()
+        self.create_constraintsLineEdit.setPlaceholderText("e.g. MAG_W < 0.9 * POLE_PITCH; ...")
+        self.create_constraintsLineEdit.setToolTip("Expressions over the parameter names (and SLOTS, POLES, pi), "
+                                                   "separated by ';'. The combinations violating them are dropped.")
+
         self.create_runtimeLabel = QLabel("Estimated runtime of one simulation [min]:")
         self.create_runtimeSpinbox = QSpinBox()
         self.create_runtimeSpinbox.setMaximum(1000)
@@ -89,6 +110,9 @@ class ParameterSetCreator(QWidget, ParameterSetCreatorLayout):
 
         self.create_excelCreatorButton = QPushButton("Create")
 
+        self.create_progressBar = QProgressBar()         # rows of Sets.xlsx written by the parameter table engine
+        self.create_progressBar.setVisible(False)
+
         # Set up the layout for the widget (ParameterSetCreatorLayout):
 
         self.setup_layout(self)
@@ -118,6 +142,8 @@ class ParameterSetCreator(QWidget, ParameterSetCreatorLayout):
 class FluxminatorView(QWidget, FluxminatorLayout):
     """ MVP - View class (GUI) """
 
+    executionFinished = pyqtSignal(str)     # re-emits the result of the execution engine in the GUI thread
+
     def __init__(self):
 
         super().__init__()
@@ -132,6 +158,29 @@ class FluxminatorView(QWidget, FluxminatorLayout):
 
         self.deleteCheckBox = QCheckBox("Delete the scenario solutions")
 
+        self.workerNumberLabel = QLabel("Flux workers:")
+        self.workerNumberSpinBox = QSpinBox()
+        self.workerNumberSpinBox.setToolTip("Number of Flux simulations running in parallel")
+
+        self.parserProcessLabel = QLabel("Parser processes:")
+        self.parserProcessSpinBox = QSpinBox()
+        self.parserProcessSpinBox.setToolTip("Number of processes reading the ripple result files in parallel")
+
+        self.pipelineCheckBox = QCheckBox("Process results during the next simulation")
+
+        self.cacheCheckBox = QCheckBox("Reuse identical simulations from the cache")
+        self.cacheCheckBox.setToolTip("Raw result files of the same model, scenario and parameter values "
+                                      "(from any project)")
+
+        self.waveformStoreCheckBox = QCheckBox("Store the waveforms of every row")
+        self.waveformStoreCheckBox.setToolTip("Memory-mapped arrays in the Results/" + WAVEFORM_DIRECTORY +
+                                              " folder for later analysis")
+
+        self.timeoutLabel = QLabel("Time limit [min]:")
+        self.timeoutSpinBox = QSpinBox()
+        self.timeoutSpinBox.setMaximum(100000)
+        self.timeoutSpinBox.setToolTip("Time limit of one Flux simulation (0: no limit)")
+
         # Batch mode and price calculation TODO FUTURE DEVELOPMENT
         self.batchModeCheckBox = QCheckBox("Run in batch mode")
         self.priceCalcCheckBox = QCheckBox("Calculate price")
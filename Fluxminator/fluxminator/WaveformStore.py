@@ -0,0 +1,175 @@
+import os
+import json
+import numpy as np
+
+from fluxminator.Constants import *
+
+
+class WaveformStore:
+    """ Project-level store of the waveforms inside the Results folder: one memory-mapped .npy array for every
+    quantity, filled as the rows are processed, so the waveforms of the whole sweep can be sliced without reading
+    the raw result files again.
+
+    Ripple quantities (torque, voltage, current): [row, current, gamma, step].
+    Skewed ripple quantities of the 2 & 3 stack motors: [row, current, stack, step] (stack index 0: 2 stacks, 1: 3
+    stacks); they are only simulated at gamma = 0, so they have their own arrays (no gamma dimension).
+    Cogging quantities (cogging torque, BackEMF voltage): [row, stack, step].
+    The rows follow Sets.xlsx; Rows.npy marks the filled ones, the layout (row IDs, currents, gammas, rotor
+    positions) is in Layout.json. """
+
+    def __init__(self, results_path):
+
+        self.storePath = os.path.join(results_path, WAVEFORM_DIRECTORY)
+
+        self.layout = None
+        self.arrays = {}                    # key=quantity (WAVEFORM_QUANTITIES); value=memory-mapped array
+        self.skewedArrays = {}              # key=quantity (WAVEFORM_RIPPLE_QUANTITIES); value=memory-mapped array
+        self.filledRows = None              # memory-mapped boolean array of the filled rows
+
+    def get_layout(self): return self.layout
+    def get_array(self, quantity): return self.arrays.get(quantity)
+    def get_skewedArray(self, quantity): return self.skewedArrays.get(quantity)
+    def get_filledRows(self): return self.filledRows
+
+    def open(self, row_ids, flux_model, scenario_cogging=True, scenario_ripple=True):
+        """ Open the store of the rows for writing; the existing waveforms are kept if the scenario settings are the
+        same (new rows of Sets.xlsx extend the arrays), otherwise the store is created again """
+
+        layout = {"ids": list(row_ids),
+                  "currents": [float(value) for value in flux_model.rangeCurrent.get_all_values()],
+                  "gammas": [float(value) for value in flux_model.rangeGamma.get_all_values()],
+                  "ripplePositions": [float(value) for value in flux_model.positionRipple.get_all_values()[1:]],
+                  "coggingPositions": [float(value) for value in flux_model.positionCogging.get_all_values()[1:]],
+                  "skewedStacks": WAVEFORM_SKEWED_STACKS,
+                  "ripple": scenario_ripple,
+                  "cogging": scenario_cogging}
+
+        old_layout = WaveformStore._read_layout(self.storePath)
+        keep_rows = old_layout is not None \
+            and all(old_layout.get(key) == layout[key] for key in layout if key != "ids") \
+            and old_layout["ids"] == layout["ids"][:len(old_layout["ids"])]
+
+        os.makedirs(self.storePath, exist_ok=True)
+        old_row_number = len(old_layout["ids"]) if keep_rows else 0
+
+        self.filledRows = self._open_array(WAVEFORM_ROWS_FILE, (len(row_ids),), bool, old_row_number)
+
+        for quantity in WAVEFORM_QUANTITIES:
+            if quantity in WAVEFORM_RIPPLE_QUANTITIES and scenario_ripple:
+                shape = (len(row_ids), len(layout["currents"]), len(layout["gammas"]), len(layout["ripplePositions"]))
+                skewed_shape = (len(row_ids), len(layout["currents"]), len(WAVEFORM_SKEWED_STACKS),
+                                len(layout["ripplePositions"]))
+                self.skewedArrays[quantity] = self._open_array(quantity + WAVEFORM_SKEWED_SUFFIX + ".npy",
+                                                               skewed_shape, np.float64, old_row_number)
+            elif quantity in WAVEFORM_COGGING_QUANTITIES and scenario_cogging:
+                shape = (len(row_ids), 3, len(layout["coggingPositions"]))
+            else:
+                continue
+
+            self.arrays[quantity] = self._open_array(quantity + ".npy", shape, np.float64, old_row_number)
+
+        self.layout = layout
+        with open(os.path.join(self.storePath, WAVEFORM_LAYOUT_FILE), 'w') as layout_file:
+            json.dump(layout, layout_file)
+
+    def add(self, row_index, result):
+        """ Write the waveforms of a processed row (row_index: index of the row in Sets.xlsx, from 0) """
+
+        if self.layout["ripple"]:
+            torque, skewed_torque = self.arrays[WAVEFORM_TORQUE], self.skewedArrays[WAVEFORM_TORQUE]
+            voltage, skewed_voltage = self.arrays[WAVEFORM_VOLTAGE], self.skewedArrays[WAVEFORM_VOLTAGE]
+            current, skewed_current = self.arrays[WAVEFORM_CURRENT], self.skewedArrays[WAVEFORM_CURRENT]
+
+            for current_index, current_value in enumerate(self.layout["currents"]):
+                skewed_ripples = [result.get_ripple2Stack().get(current_value),
+                                  result.get_ripple3Stack().get(current_value)]
+
+                for gamma_index, ripple in enumerate(result.get_rippleModels().get(current_value, [])):
+                    torque[row_index, current_index, gamma_index] = ripple.get_rippleValues()
+                    voltage[row_index, current_index, gamma_index] = ripple.get_voltageValues()
+                    current[row_index, current_index, gamma_index] = ripple.get_currentValues()
+
+                for stack_index, ripple in enumerate(skewed_ripples):
+                    if ripple is not None:
+                        skewed_torque[row_index, current_index, stack_index] = ripple.get_rippleValues()
+                        skewed_voltage[row_index, current_index, stack_index] = ripple.get_voltageValues()
+                        skewed_current[row_index, current_index, stack_index] = ripple.get_currentValues()
+
+        if self.layout["cogging"]:
+            coggings = [result.get_cogging1Stack(), result.get_cogging2Stack(), result.get_cogging3Stack()]
+            bemfs = [result.get_BEMF1Stack(), result.get_BEMF2Stack(), result.get_BEMF3Stack()]
+
+            for stack_index, (cogging, bemf) in enumerate(zip(coggings, bemfs)):
+                if cogging is not None:
+                    self.arrays[WAVEFORM_COGGING_TORQUE][row_index, stack_index] = cogging.get_coggingValue()
+                if bemf is not None:
+                    self.arrays[WAVEFORM_BEMF_VOLTAGE][row_index, stack_index] = bemf.get_voltageValue()
+
+        self.filledRows[row_index] = True                   # after the waveforms
+
+    def close(self):
+        """ Write the changes to the disk and release the memory-mapped files """
+
+        for array in list(self.arrays.values()) + list(self.skewedArrays.values()) + [self.filledRows]:
+            if array is not None:
+                array.flush()
+
+        self.arrays = {}
+        self.skewedArrays = {}
+        self.filledRows = None
+
+    @staticmethod
+    def load(results_path):
+        """ Open the store of a project for reading (None if there is no store); the arrays are memory-mapped,
+        e.g. store.get_array(WAVEFORM_TORQUE)[rows, current_index, gamma_index] doesn't read the other rows """
+
+        store = WaveformStore(results_path)
+        store.layout = WaveformStore._read_layout(store.storePath)
+
+        if store.layout is None:
+            return None
+
+        store.filledRows = np.load(os.path.join(store.storePath, WAVEFORM_ROWS_FILE), mmap_mode='r')
+        for quantity in WAVEFORM_QUANTITIES:
+            file = os.path.join(store.storePath, quantity + ".npy")
+            if os.path.exists(file):
+                store.arrays[quantity] = np.load(file, mmap_mode='r')
+
+            skewed_file = os.path.join(store.storePath, quantity + WAVEFORM_SKEWED_SUFFIX + ".npy")
+            if quantity in WAVEFORM_RIPPLE_QUANTITIES and os.path.exists(skewed_file):
+                store.skewedArrays[quantity] = np.load(skewed_file, mmap_mode='r')
+
+        return store
+
+    def _open_array(self, file_name, shape, dtype, old_row_number):
+        """ Create the memory-mapped array of the rows; the first old_row_number rows are copied from the existing
+        file (if it has the same shape, it is opened as it is). The file is replaced when it grows, so the store is
+        opened by one process at a time (it can't be used in the distributed execution). """
+
+        file = os.path.join(self.storePath, file_name)
+
+        if old_row_number > 0 and os.path.exists(file):
+            old_array = np.load(file, mmap_mode='r+')
+
+            if old_array.shape == shape:
+                return old_array
+
+            new_array = np.lib.format.open_memmap(file + ".tmp", mode='w+', dtype=dtype, shape=shape)
+            new_array[:old_row_number] = old_array[:old_row_number]
+            new_array.flush()
+
+            del old_array, new_array
+            os.replace(file + ".tmp", file)
+
+            return np.load(file, mmap_mode='r+')
+
+        return np.lib.format.open_memmap(file, mode='w+', dtype=dtype, shape=shape)
+
+    @staticmethod
+    def _read_layout(store_path):
+
+        try:
+            with open(os.path.join(store_path, WAVEFORM_LAYOUT_FILE), 'r') as layout_file:
+                return json.load(layout_file)
+        except (IOError, ValueError):
+            return None
@@ -0,0 +1,131 @@
+import os
+import glob
+import shutil
+import queue
+
+from concurrent.futures import ThreadPoolExecutor
+
+from fluxminator.Constants import *
+
+
+class FluxWorker:
+    """ One Flux process slot with its own scratch directory, channel file and copy of the model.
+    The channel data of the worker points to the scratch directory, so Flux writes the raw result files into
+    <scratch>/Results, from where they are gathered back into the Results folder of the project. """
+
+    def __init__(self, index, model_path, model_name, node_name=""):
+
+        self.index = index
+
+        self.projectPath = model_path
+        self.modelName = model_name                                 # name of the .FLU model (with extension)
+
+        # In the multi-node execution mode, every node has its own folder for its workers:
+        self.workingDirectory = os.path.join(model_path, WORKER_DIRECTORY, node_name, WORKER_NAME.format(index))
+
+        # The first line of the channel data is the model path -> it is replaced with the scratch directory:
+        self.channelPathLine = self.workingDirectory.replace('\\', '/').replace('/', '\\\\')
+
+    def get_index(self): return self.index
+    def get_workingDirectory(self): return self.workingDirectory
+
+    def prepare(self):
+        """ Create the scratch directory with its own copy of the model and the PyFlux script """
+
+        if not os.path.exists(self.workingDirectory + "/Results"):
+            os.makedirs(self.workingDirectory + "/Results")
+
+        model_source = os.path.join(self.projectPath, self.modelName)
+        model_copy = os.path.join(self.workingDirectory, self.modelName)
+
+        if os.path.isdir(model_source):                             # the .FLU model is a directory
+            if os.path.exists(model_copy):
+                shutil.rmtree(model_copy)                           # always start from the actual model
+            shutil.copytree(model_source, model_copy)
+        else:
+            shutil.copy2(model_source, model_copy)
+
+        if os.path.exists(PYFLUX_SCRIPT_NAME):
+            shutil.copy2(PYFLUX_SCRIPT_NAME, os.path.join(self.workingDirectory, PYFLUX_SCRIPT_NAME))
+
+    def run(self, flux_launcher, parameter_values_id, channel_data):
+        """ Execute one simulation in the scratch directory and gather the raw result files; return the record of
+        the simulation (see Launcher) """
+
+        worker_channel_data = self.channelPathLine + "\n" + channel_data.split("\n", 1)[1]
+
+        channel_file = open(os.path.join(self.workingDirectory, CHANNEL_FILE_NAME), 'w')
+        channel_file.write(worker_channel_data)
+        channel_file.close()
+
+        script_path = os.path.join(self.workingDirectory, PYFLUX_SCRIPT_NAME)
+        simulation_record = flux_launcher.launch(parameter_values_id, self.workingDirectory, script_path, self.index)
+
+        self.gather_results(parameter_values_id)
+
+        return simulation_record
+
+    def gather_results(self, parameter_values_id):
+        """ Move the raw result files of the simulation into the Results folder of the project """
+
+        file_pattern = self.modelName[:-4] + "_" + parameter_values_id + "_*.xls"
+
+        for file in glob.glob(os.path.join(self.workingDirectory, "Results", file_pattern)):
+            os.replace(file, os.path.join(self.projectPath, "Results", os.path.basename(file)))
+
+
+class FluxWorkerPool:
+    """ N-worker execution mode: parameter combinations (rows of Sets.xlsx) are handed to whichever worker is free """
+
+    def __init__(self, worker_number, model_path, model_name, flux_launcher, node_name=""):
+
+        self.fluxLauncher = flux_launcher
+        self.workerNumber = worker_number
+
+        self.freeWorkers = queue.Queue()
+        for index in range(1, worker_number + 1):
+            worker = FluxWorker(index, model_path, model_name, node_name)
+            worker.prepare()
+            self.freeWorkers.put(worker)
+
+        self.executor = ThreadPoolExecutor(max_workers=worker_number)
+        self.futures = {}                                           # key=parameter set ID; value=Future
+
+    def get_workerNumber(self): return self.workerNumber
+
+    def get_submittedNumber(self): return len(self.futures)
+
+    def is_submitted(self, parameter_values_id):
+        """ Check whether the simulation of the parameter set has already been handed over to the pool """
+        return parameter_values_id in self.futures
+
+    def submit(self, parameter_values_id, channel_data):
+        """ Queue a simulation with the channel data of the parameter set (written for the project directory) """
+        self.futures[parameter_values_id] = self.executor.submit(self._run_on_free_worker,
+                                                                 parameter_values_id, channel_data)
+
+    def wait(self, parameter_values_id):
+        """ Wait for the simulation of the parameter set and return its record """
+        return self.futures.pop(parameter_values_id).result()
+
+    def shutdown(self):
+        """ Let the running simulations finish; return the records of the simulations completed but not yet collected
+        (the caller checks whether they were successful) """
+
+        self.executor.shutdown(wait=True)
+
+        simulation_records = []
+        for future in self.futures.values():
+            if not future.cancelled() and future.exception() is None:
+                simulation_records.append(future.result())
+        self.futures = {}
+
+        return simulation_records
+
+    def _run_on_free_worker(self, parameter_values_id, channel_data):
+
+        worker = self.freeWorkers.get()
+        try:
+            return worker.run(self.fluxLauncher, parameter_values_id, channel_data)
+        finally:
+            self.freeWorkers.put(worker)
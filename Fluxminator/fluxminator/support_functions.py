@@ -1,12 +1,12 @@
 from scipy.fftpack import fft
 from cmath import phase
 
-from PyQt5.QtWidgets import QMessageBox
-
 
 def popup_message(view, message, title="Error"):
     """ Pop up a message box, usually for displaying error messages """
 
+    from PyQt5.QtWidgets import QMessageBox         # the rest of the module is used by the batch mode without Qt
+
     mB = QMessageBox(view)
 
     if title == "Error":
@@ -93,7 +93,9 @@ class MainWindow(QMainWindow, Main_UI):
         print("USER GUIDE - coming soon")
 
     def closeEvent(self, a0: QtGui.QCloseEvent) -> None:
-        """ Also close the Fluxminator subwidgets """
+        """ Also close the Fluxminator subwidgets; the running simulations are killed, the execution is stopped """
+        self.fluxminatorPresenter.shutdown()
+
         if self.fluxminatorView.specialParameterSetCreatorWidget is not None:
             self.fluxminatorView.specialParameterSetCreatorWidget.close()
         self.fluxminatorView.parameterSetCreatorWidget.close()
@@ -0,0 +1,308 @@
+import os
+import sys
+import json
+import time
+import types
+import shutil
+import argparse
+import platform
+import tempfile
+import datetime
+import numpy as np
+
+from fluxminator.Model import Model, Motor, Range, Parameter
+from fluxminator.Result import Result
+from fluxminator.Runner import Runner
+from fluxminator.StandIn import FluxStandIn
+from fluxminator.Parser import ResultParser
+from fluxminator.MetricsStore import MetricsStore
+from fluxminator.ParameterSets import ParameterSets
+from fluxminator.Constants import *
+import fluxminator.support_functions as sup_fun
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+ROW_SCALES = [100, 10000, 100000]               # rows of the parameter table / summary file
+STEP_SCALES = [360, 3600]                       # rotor positions of the raw result files
+SUMMARY_ROW_SCALES = [100, 10000]               # 100k rows don't fit into the memory of the summary workbook
+PARSER_PROCESS_NUMBER = max(2, os.cpu_count() or 1)
+
+SLOT_NUMBER = 12
+POLE_NUMBER = 8
+GAMMAS_FOR_2STACK = [0.0, 10.0]
+GAMMAS_FOR_3STACK = [0.0, 10.0, 20.0]
+
+
+# BENCHMARK CASES: set up the input of the scale, return the function to be timed (or the function and the one
+# releasing its resources)
+
+
+def bench_parameter_table(row_number, work_path):
+    """ Motor.create_final_parameter_set: Cartesian product of 2 parameters (lazy table), streamed in chunks """
+
+    motor = _motor(row_number)
+    return lambda: sum(len(chunk) for chunk in motor.create_final_parameter_set().iter_chunks())
+
+
+def bench_parameter_table_excel(row_number, work_path):
+    """ Motor.create_parameter_table_excel: Sets.xlsx with the styled rows """
+
+    motor = _motor(row_number)
+    parameter_table = motor.create_final_parameter_set()
+
+    return lambda: motor.create_parameter_table_excel(parameter_table, work_path)
+
+
+def bench_parameter_sets(row_number, work_path):
+    """ ParameterSets.read: streaming conversion of Sets.xlsx into the memory-mapped matrix (no sidecar files) """
+
+    motor = _motor(row_number)
+    motor.create_parameter_table_excel(motor.create_final_parameter_set(), work_path)
+
+    return _without_parsed_files(lambda: ParameterSets(motor.parameterSetExcelPath).read(), work_path)
+
+
+def bench_raw_data_file(step_number, work_path):
+    """ Result._read_raw_data_files: one ripple result file of Flux (decoding the .xls file) """
+
+    flux_model = _flux_model(step_number)
+    file = _write_raw_data_files(flux_model, work_path).format(1, 1)
+
+    return _without_parsed_files(lambda: Result._read_raw_data_files("Ripple", file, step_number), work_path)
+
+
+def bench_raw_data_file_cached(step_number, work_path):
+    """ Result._read_raw_data_files: one ripple result file of Flux (from the sidecar file) """
+
+    flux_model = _flux_model(step_number)
+    file = _write_raw_data_files(flux_model, work_path).format(1, 1)
+    Result._read_raw_data_files("Ripple", file, step_number)
+
+    return lambda: Result._read_raw_data_files("Ripple", file, step_number)
+
+
+def bench_fft(step_number, work_path):
+    """ support_functions.fft_: spectrum of a waveform """
+
+    rotor_position = np.arange(1, step_number + 1) * 360.0 / step_number
+    values = np.sin(np.radians(6 * rotor_position)) + 0.3 * np.sin(np.radians(12 * rotor_position))
+
+    return lambda: sup_fun.fft_(rotor_position, values)
+
+
+def bench_ripple_skewing(step_number, work_path):
+    """ Result.setup_Ripple: 3 loads x 3 gammas, with the 2 & 3 stack skewing """
+
+    flux_model = _flux_model(step_number)
+    file = _write_raw_data_files(flux_model, work_path)
+
+    return _without_parsed_files(lambda: Result().setup_Ripple(file, flux_model), work_path)
+
+
+def bench_ripple_parser(step_number, work_path):
+    """ Result.setup_Ripple with the files parsed by the processes of the ResultParser """
+
+    flux_model = _flux_model(step_number)
+    file = _write_raw_data_files(flux_model, work_path)
+    result_parser = ResultParser(PARSER_PROCESS_NUMBER)
+
+    return _without_parsed_files(lambda: Result().setup_Ripple(file, flux_model, result_parser), work_path), \
+        result_parser.shutdown
+
+
+def bench_summary_file(row_number, work_path):
+    """ Runner._create_summary_file for every row (committed into the metrics store), then generating Summary.xlsx """
+
+    model = Model()
+    model.fluxModel = _flux_model(360)
+    presenter = types.SimpleNamespace(model=model)
+
+    file = _write_raw_data_files(model.fluxModel, work_path)
+    result = Result()
+    result.setup_Cogging_BEMF(file.replace("_LOAD_{0}_GAMMA_{1}", "_Cogging_BEMF"), model.fluxModel, 3)
+    result.setup_Ripple(file, model.fluxModel)
+
+    def create_summary_file():
+        Runner.metrics_store = MetricsStore(os.path.join(work_path, "Results"))
+        Runner.metrics_store.open()
+
+        for i in range(1, row_number + 1):
+            Runner._create_summary_file(presenter, result, i, "No-%04d" % i, ["a", "b"], ["A", "B"],
+                                        [float(i % 100), float(i // 100)])
+            Runner.metrics_store.commit()
+
+        Runner.metrics_store.export(os.path.join(work_path, "Summary.xlsx"))
+        Runner.metrics_store.close()
+
+    return create_summary_file
+
+
+# key=case; value=[function, scale type (rows or rotor steps), scales]
+BENCHMARKS = {"parameter_table": [bench_parameter_table, "rows", ROW_SCALES],
+              "parameter_table_excel": [bench_parameter_table_excel, "rows", ROW_SCALES],
+              "parameter_sets": [bench_parameter_sets, "rows", ROW_SCALES],
+              "raw_data_file": [bench_raw_data_file, "steps", STEP_SCALES],
+              "raw_data_file_cached": [bench_raw_data_file_cached, "steps", STEP_SCALES],
+              "fft": [bench_fft, "steps", STEP_SCALES],
+              "ripple_skewing": [bench_ripple_skewing, "steps", STEP_SCALES],
+              "ripple_parser": [bench_ripple_parser, "steps", STEP_SCALES],
+              "summary_file": [bench_summary_file, "rows", SUMMARY_ROW_SCALES]}
+
+
+def _motor(row_number):
+    """ Motor with 2 parameters whose Cartesian product has the given number of rows """
+
+    column_number = 10 ** int(np.log10(row_number) // 2)
+    return Motor(SLOT_NUMBER, POLE_NUMBER, [
+        Parameter("GP", "A", "a", Range(1.0, float(column_number), 1.0)),
+        Parameter("GP", "B", "b", Range(1.0, float(row_number // column_number), 1.0))])
+
+
+def _without_parsed_files(function, work_path):
+    """ Time the decoding of the raw result files: their sidecar files are removed before every call """
+
+    def call():
+        shutil.rmtree(os.path.join(work_path, "Results", PARSED_DIRECTORY), ignore_errors=True)
+        return function()
+
+    return call
+
+
+def _flux_model(step_number):
+    """ Scenario settings of the raw result files: one electrical period over the rotor positions """
+
+    flux_model = Model().fluxModel
+    flux_model.motor = Motor(SLOT_NUMBER, POLE_NUMBER, [])
+    flux_model.positionCogging = Range(0.0, 360.0, 360.0 / step_number)
+    flux_model.positionRipple = Range(0.0, 360.0, 360.0 / step_number)
+    flux_model.rangeCurrent = Range(0.0, 10.0, 5.0)
+    flux_model.rangeGamma = Range(0.0, 20.0, 10.0)
+    flux_model.set_gammasFor2Stack(GAMMAS_FOR_2STACK)
+    flux_model.set_gammasFor3Stack(GAMMAS_FOR_3STACK)
+
+    return flux_model
+
+
+def _write_raw_data_files(flux_model, work_path):
+    """ Write the result files of one simulation with the Flux stand-in; return the ripple file name template """
+
+    channel_path = os.path.join(work_path, CHANNEL_FILE_NAME)
+    os.makedirs(os.path.join(work_path, "Results"), exist_ok=True)
+
+    with open(channel_path, 'w') as channel_file:
+        channel_file.write("\n".join([
+            work_path, "Motor", "No-0001", "3", "None", flux_model.positionCogging.print_range(),
+            flux_model.positionRipple.print_range(), "I " + flux_model.rangeCurrent.print_range(),
+            "G " + flux_model.rangeGamma.print_range(), "GP GP", "A B", "1.00 1.00 ", "True", "S", ""]))
+
+    FluxStandIn().run(channel_path)
+
+    return os.path.join(work_path, "Results", "Motor_No-0001_LOAD_{0}_GAMMA_{1}.xls")
+
+
+# RUNNING & COMPARING:
+
+
+def run_benchmarks(names, max_rows, max_steps, repeat):
+    """ Time every case at every scale (the best of the repetitions) [s]; key="<case>/<scale>" """
+
+    timings = {}
+
+    for name in names:
+        bench, scale_type, scales = BENCHMARKS[name]
+
+        for scale in scales:
+            if scale > (max_rows if scale_type == "rows" else max_steps):
+                continue
+
+            with tempfile.TemporaryDirectory() as work_path:
+                function = bench(scale, work_path)
+                close = None
+                if isinstance(function, tuple):
+                    function, close = function
+
+                best = None
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    function()
+                    elapsed = time.perf_counter() - start
+                    best = elapsed if best is None else min(best, elapsed)
+
+                if close is not None:
+                    close()
+
+            timings["{0}/{1}".format(name, scale)] = best
+            print("{0:<40}{1:>12.4f} s".format("{0}/{1}".format(name, scale), best), flush=True)
+
+    return timings
+
+
+def compare_with_baseline(timings, baseline, tolerance):
+    """ Return the cases slower than the baseline by more than the tolerance (key=case; value=[baseline, timing]) """
+
+    return {case: [baseline[case], timing] for case, timing in timings.items()
+            if case in baseline and timing > baseline[case] * (1 + tolerance)}
+
+
+def read_baseline(path):
+
+    with open(path, 'r') as baseline_file:
+        return json.load(baseline_file)["timings"]
+
+
+def write_baseline(path, timings):
+
+    baseline = {"created": datetime.datetime.now().isoformat(timespec='seconds'),
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "platform": platform.platform(),
+                "timings": timings}
+
+    with open(path, 'w') as baseline_file:
+        json.dump(baseline, baseline_file, indent=2)
+        baseline_file.write("\n")
+
+
+def main(argv=None):
+    """ Benchmarks of the post-processing hot paths; the timings are compared with the recorded JSON baseline """
+
+    parser = argparse.ArgumentParser(description="Time the post-processing hot paths and compare them with the "
+                                                 "baseline. Run from the Fluxminator folder: "
+                                                 "python -m test_scripts.FluxminatorBenchmark")
+    parser.add_argument("cases", nargs="*", help="cases to run (default: all): " + ", ".join(BENCHMARKS))
+    parser.add_argument("--max-rows", type=int, default=max(ROW_SCALES), help="largest row scale")
+    parser.add_argument("--max-steps", type=int, default=max(STEP_SCALES), help="largest rotor step scale")
+    parser.add_argument("--repeat", type=int, default=3, help="repetitions of every case (the best is kept)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="JSON baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown against the baseline")
+    parser.add_argument("--save", action="store_true", help="record the timings as the new baseline")
+    arguments = parser.parse_args(argv)
+
+    for name in arguments.cases:
+        if name not in BENCHMARKS:
+            parser.error("Unknown benchmark case: " + name)
+
+    timings = run_benchmarks(arguments.cases or list(BENCHMARKS), arguments.max_rows, arguments.max_steps,
+                             max(1, arguments.repeat))
+
+    if arguments.save:
+        # Keep the cases of the baseline which weren't run now:
+        baseline = read_baseline(arguments.baseline) if os.path.exists(arguments.baseline) else {}
+        baseline.update(timings)
+        write_baseline(arguments.baseline, baseline)
+        return 0
+
+    if not os.path.exists(arguments.baseline):
+        print("No baseline: " + arguments.baseline)
+        return 0
+
+    regressions = compare_with_baseline(timings, read_baseline(arguments.baseline), arguments.tolerance)
+    for case, (baseline_timing, timing) in regressions.items():
+        print("REGRESSION {0}: {1:.4f} s -> {2:.4f} s".format(case, baseline_timing, timing))
+
+    return 1 if len(regressions) > 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,14 +1,49 @@
+import os
 import sys
+import glob
+import time
+import signal
+import sqlite3
+import tempfile
+import threading
 import unittest
+import unittest.mock
 
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QThread
 from PyQt5.QtWidgets import QApplication
 
 from PyQt5.QtTest import QTest
+from openpyxl import load_workbook
+import xlwt
 
 from fluxminator.View import FluxminatorView
-from fluxminator.Model import Model
+from fluxminator.Model import Model, Range, Parameter
 from fluxminator.Presenter import Presenter
+from fluxminator.Lease import RowLeases
+from fluxminator.Journal import RunJournal
+from fluxminator.Cache import SimulationCache
+from fluxminator.Refinement import select_refined_rows
+from fluxminator.Surrogate import SurrogateModel
+from fluxminator.Constraint import check_constraint
+from fluxminator.Optimizer import BayesianOptimizer
+from fluxminator.StandIn import FluxStandIn
+from fluxminator.Result import Result
+from fluxminator.Parser import ResultParser
+from fluxminator.WaveformStore import WaveformStore
+from fluxminator.Checkpoint import SummaryCheckpointer
+from fluxminator.MetricsStore import MetricsStore
+from fluxminator.ParameterSets import ParameterSets
+from fluxminator.ParameterTable import ParameterTable
+from fluxminator.Launcher import FluxLauncher
+from fluxminator.Runner import Runner
+from test_scripts.FluxminatorBenchmark import run_benchmarks, compare_with_baseline, _flux_model, _write_raw_data_files
+from fluxminator.Constants import EXECUTION_STOP, DESIGN_TYPES, DESIGN_CARTESIAN, REFINE_GRADIENT, REFINE_MINIMUM
+from fluxminator.Constants import PARSED_DIRECTORY, WAVEFORM_TORQUE, WAVEFORM_COGGING_TORQUE
+from fluxminator.Constants import RAW_RIPPLE_FILE_START_INDEX, DESIGN_FRACTIONAL_FACTORIAL, ROW_COUNT_UPDATE_DELAY
+from fluxminator.Constants import FLUX_TIMEOUT_ERROR, FLUX_EXIT_CODE_ERROR, CHANNEL_FILE_NAME, SETS_TABLE_ERROR
+from fluxminator.Constants import STANDIN_FAILING_ROWS_VARIABLE, STANDIN_LATENCY_VARIABLE, PROGRESS_REPORT_INTERVAL
+
+import batch
 
 
 app = QApplication(sys.argv)
@@ -37,6 +72,704 @@ class FluxminatorTest(unittest.TestCase):
         QTest.mouseClick(self.view.runButton, Qt.LeftButton)
         self.assertEqual(self.model.get_executionInProgress(), False)
 
+    def test_execution_engine(self):
+        """ Run the execution off the GUI thread and display the reported progress """
+        execution_threads = []
+
+        def run(presenter):
+            execution_threads.append(QThread.currentThread())
+            presenter.engine.report_progress(3, maximum=10)
+            return EXECUTION_STOP
+
+        self.presenter._run = run
+        self.model.set_executionInProgress(True)
+        self.presenter.engine.start()
+        self.presenter.engine.wait()
+        app.processEvents()
+
+        self.assertNotEqual(execution_threads[0], app.thread())
+        self.assertEqual(self.view.progressBar.maximum(), 10)
+        self.assertEqual(self.view.progressBar.value(), 3)
+        self.assertEqual(self.view.runButton.text(), "Continue")
+        self.assertEqual(self.model.get_executionInProgress(), False)
+
+        # The last value of a burst is displayed at the end of the throttling interval:
+        self.presenter.engine.report_progress(4)
+        self.presenter.engine.report_progress(5)
+        self.assertEqual(self.view.progressBar.value(), 3)
+        QTest.qWait(int(PROGRESS_REPORT_INTERVAL * 1000) + 200)
+        self.assertEqual(self.view.progressBar.value(), 5)
+
+    def test_parameter_table_engine(self):
+        """ Write Sets.xlsx off the GUI thread with the named styles, then unlock the parameter set creator """
+        motor = self.model.fluxModel.motor
+        motor.add_parameter(Parameter("GP", "A", "a", Range(1.0, 3.0, 1.0)))
+        motor.add_parameter(Parameter("GP", "B", "b", Range(0.5, 1.0, 0.5)))
+
+        with tempfile.TemporaryDirectory() as model_path:
+            self.model.fluxModel.set_modelPath(model_path)
+            self.presenter._create_parameter_table()
+            self.assertFalse(self.presenter.view.parameterSetCreatorWidget.splitter.isEnabled())
+
+            self.presenter.tableEngine.wait()
+            app.processEvents()
+
+            ws_sets = load_workbook(motor.get_parameterSetExcelPath()).worksheets[0]
+            self.assertEqual([cell.value for cell in ws_sets[9]], ["No-0006", 3, 1])
+            self.assertEqual([ws_sets.cell(row=row, column=1).style for row in [1, 4, 9]],
+                             ["Sets header ID", "Sets ID", "Sets last ID"])
+            self.assertEqual(ws_sets["B9"].border.bottom.style, "thin")
+
+        widget = self.presenter.view.parameterSetCreatorWidget
+        self.assertEqual(widget.create_progressBar.maximum(), 6)
+        self.assertTrue(widget.splitter.isEnabled())
+        self.assertEqual(widget.create_excelCreatorButton.text(), "Overwrite")
+
+        # An error of the design is reported, the parameter set creator and the main window are unlocked:
+        finished_errors = []
+        self.presenter.tableEngine.tableFinished.connect(finished_errors.append)
+        self.view.setEnabled(False)                                 # while the (closed) creator was open
+        with unittest.mock.patch.object(motor, "create_design_parameter_set", side_effect=ValueError("bad design")), \
+                unittest.mock.patch("fluxminator.support_functions.popup_message") as popup_message:
+            self.presenter._create_parameter_table()
+            self.presenter.tableEngine.wait()
+            app.processEvents()
+
+        self.assertEqual(finished_errors, [SETS_TABLE_ERROR + "bad design"])
+        self.assertEqual(popup_message.call_args[0][1], SETS_TABLE_ERROR + "bad design")
+        self.assertTrue(widget.splitter.isEnabled())
+        self.assertTrue(self.view.isEnabled())
+
+    def test_flux_stand_in(self):
+        """ Write the raw result files of a channel file without Flux, readable like the files of the Flux script """
+        with tempfile.TemporaryDirectory() as model_path:
+            os.mkdir(os.path.join(model_path, "Results"))
+            channel_path = os.path.join(model_path, "Channel.txt")
+            with open(channel_path, 'w') as channel_file:
+                channel_file.write("\n".join([model_path, "Motor", "No-0001", "3", "None", "0.0 90.0 1.0", "0.0 90.0 1.0",
+                                              "I 0.0 10.0 5.0", "G 0.0 20.0 10.0", "GP GP", "A B", "1.00 0.50 ",
+                                              "True", "S", "Tooth", "Rotor", "Magnet", "None", ""]))
+
+            FluxStandIn().run(channel_path)
+
+            results = os.listdir(os.path.join(model_path, "Results"))
+            rotor_position, torque, _, _ = Result._read_raw_data_files(
+                "Ripple", os.path.join(model_path, "Results", "Motor_No-0001_LOAD_3_GAMMA_2.xls"), 90)
+
+        self.assertEqual(len(results), 1 + 3 * 3)
+        self.assertEqual(rotor_position[:2].tolist(), [1.0, 2.0])
+        self.assertTrue(torque.flags['C_CONTIGUOUS'])
+        self.assertGreater(min(torque), 0)
+
+    def test_flux_launcher(self):
+        """ Kill Flux (and the processes started by it) after the time limit; report a non-zero exit code """
+        with tempfile.TemporaryDirectory() as work_path:
+            marker_file = os.path.join(work_path, "alive.txt")
+            slow_flux = os.path.join(work_path, "slow_flux.py")
+            with open(slow_flux, 'w') as script:
+                child_code = "import time; time.sleep(2); open(%r, 'w').close()" % marker_file
+                script.write("import sys, time, subprocess\n"
+                             "subprocess.Popen([sys.executable, '-c', %r])\n"
+                             "time.sleep(30)\n" % child_code)
+            failing_flux = os.path.join(work_path, "failing_flux.py")
+            with open(failing_flux, 'w') as script:
+                script.write("import sys\nsys.exit(3)\n")
+
+            simulation_record = FluxLauncher(slow_flux, work_path, "Motor.FLU", timeout=1) \
+                .launch("No-0001", work_path, "script.py")
+            self.assertTrue(simulation_record.is_timedOut())
+            self.assertLess(simulation_record.get_wallTime(), 10)
+            self.assertEqual(Runner._check_simulation(self.presenter, simulation_record), FLUX_TIMEOUT_ERROR)
+
+            time.sleep(1.5)
+            self.assertFalse(os.path.exists(marker_file))                 # the child process was killed too
+
+            simulation_record = FluxLauncher(failing_flux, work_path, "Motor.FLU").launch("No-0002", work_path,
+                                                                                       "script.py")
+            self.assertFalse(simulation_record.is_timedOut())
+            self.assertEqual(simulation_record.get_exitCode(), 3)
+            self.assertEqual(Runner._check_simulation(self.presenter, simulation_record), FLUX_EXIT_CODE_ERROR)
+
+            # Closing the application kills the running simulation without waiting for it:
+            flux_launcher = FluxLauncher(slow_flux, work_path, "Motor.FLU")
+            records = []
+            launch_thread = threading.Thread(target=lambda: records.append(
+                flux_launcher.launch("No-0003", work_path, "script.py")))
+            launch_thread.start()
+            while not flux_launcher.runningProcesses:
+                time.sleep(0.05)
+
+            Runner.flux_launcher = flux_launcher
+            try:
+                self.presenter.shutdown()
+            finally:
+                Runner.flux_launcher = None
+            launch_thread.join(10)
+
+            self.assertFalse(records[0].is_timedOut())
+            self.assertLess(records[0].get_wallTime(), 10)
+            self.assertEqual(Runner._check_simulation(self.presenter, records[0]), FLUX_EXIT_CODE_ERROR)
+            time.sleep(2.5)
+            self.assertFalse(os.path.exists(marker_file))
+
+    def test_benchmarks(self):
+        """ Time the smallest scales of the benchmarks; a case slower than its baseline is a regression """
+        timings = run_benchmarks(["fft", "parameter_table"], 100, 360, 1)
+        self.assertEqual(sorted(timings), ["fft/360", "parameter_table/100"])
+
+        baseline = {"fft/360": timings["fft/360"] / 2, "parameter_table/100": timings["parameter_table/100"] * 2}
+        self.assertEqual(list(compare_with_baseline(timings, baseline, 0.25)), ["fft/360"])
+
+    def test_parsed_sidecar_files(self):
+        """ Read a raw result file from its sidecar file until the raw file changes """
+        with tempfile.TemporaryDirectory() as work_path:
+            file = _write_raw_data_files(_flux_model(360), work_path).format(1, 1)
+            parsed_path = os.path.join(work_path, "Results", PARSED_DIRECTORY)
+
+            torque = Result._read_raw_data_files("Ripple", file, 360)[1]
+            sidecar_files = os.listdir(parsed_path)
+            self.assertEqual(Result._read_raw_data_files("Ripple", file, 360)[1].tolist(), torque.tolist())
+
+            os.utime(file, ns=(os.stat(file).st_atime_ns, os.stat(file).st_mtime_ns + 10 ** 9))
+            Result._read_raw_data_files("Ripple", file, 360)
+            new_sidecar_files = os.listdir(parsed_path)
+
+            # Too few rotor steps or columns in the raw file:
+            self.assertRaises(IndexError, Result._parse_raw_data_file, "Ripple", file, 361)
+            narrow_file = os.path.join(work_path, "Narrow.xls")
+            wb = xlwt.Workbook()
+            ws = wb.add_sheet("Results")
+            for row in range(RAW_RIPPLE_FILE_START_INDEX + 2):
+                for col in range(4):
+                    ws.write(row, col, 1.0)
+            wb.save(narrow_file)
+            self.assertRaises(IndexError, Result._parse_raw_data_file, "Ripple", narrow_file, 2)
+
+        self.assertEqual(len(sidecar_files), 1)
+        self.assertEqual(len(new_sidecar_files), 1)                 # the old version is removed
+        self.assertNotEqual(sidecar_files, new_sidecar_files)
+
+    def test_waveform_store(self):
+        """ Keep the waveforms of the rows in the memory-mapped store; new rows of Sets.xlsx extend it """
+        with tempfile.TemporaryDirectory() as work_path:
+            flux_model = _flux_model(360)
+            file = _write_raw_data_files(flux_model, work_path)
+            result = Result()
+            result.setup_Ripple(file, flux_model)
+
+            store = WaveformStore(os.path.join(work_path, "Results"))
+            store.open(["No-0001", "No-0002"], flux_model, scenario_cogging=False)
+            store.add(1, result)
+            store.close()
+
+            store.open(["No-0001", "No-0002", "No-0003"], flux_model, scenario_cogging=False)
+            store.close()
+
+            loaded_store = WaveformStore.load(os.path.join(work_path, "Results"))
+            torque = loaded_store.get_array(WAVEFORM_TORQUE)
+            skewed_torque = loaded_store.get_skewedArray(WAVEFORM_TORQUE)
+
+            self.assertEqual(loaded_store.get_filledRows().tolist(), [False, True, False])
+            self.assertEqual(torque.shape, (3, 3, 3, 360))
+            self.assertEqual(skewed_torque.shape, (3, 3, 2, 360))
+            self.assertEqual(torque[1, 2, 1].tolist(), result.get_rippleModels()[10.0][1].get_rippleValues().tolist())
+            self.assertEqual(skewed_torque[1, 2, 1].tolist(),
+                             result.get_ripple3Stack()[10.0].get_rippleValues().tolist())
+            self.assertIsNone(loaded_store.get_array(WAVEFORM_COGGING_TORQUE))
+            del torque, skewed_torque, loaded_store
+
+    def test_lazy_spectrum(self):
+        """ The spectrum of a ripple is computed on the first access only, then it is kept """
+        with tempfile.TemporaryDirectory() as work_path:
+            flux_model = _flux_model(360)
+            result = Result()
+            result.setup_Ripple(_write_raw_data_files(flux_model, work_path), flux_model)
+
+        ripple = result.get_rippleModels()[10.0][1]
+        self.assertIsNone(ripple.fftValues)
+        self.assertIs(ripple.get_fftValues(), ripple.get_fftValues())
+        self.assertAlmostEqual(ripple.get_torqueMean(), ripple.get_rippleValues().mean())
+
+    def test_result_parser(self):
+        """ Parse the ripple result files in parallel processes: same ripples as in the execution thread """
+        with tempfile.TemporaryDirectory() as work_path:
+            flux_model = _flux_model(360)
+            file = _write_raw_data_files(flux_model, work_path)
+
+            result = Result()
+            result.setup_Ripple(file, flux_model)
+
+            result_parser = ResultParser(2)
+            parallel_result = Result()
+            parallel_result.setup_Ripple(file, flux_model, result_parser)
+            self.assertFalse(parallel_result.setup_Ripple(file.replace("Motor", "Missing"), flux_model, result_parser))
+            result_parser.shutdown()
+
+        self.assertEqual(sorted(parallel_result.get_ripple3Stack()), [0.0, 5.0, 10.0])
+        for current_value, ripple in result.get_ripple3Stack().items():
+            self.assertEqual(parallel_result.get_ripple3Stack()[current_value].get_p2p(), ripple.get_p2p())
+
+    def test_metrics_store(self):
+        """ Commit the summary rows into the metrics store, generate Summary.xlsx after every 2 rows and when it is
+        closed; the rows which weren't committed are dropped """
+        with tempfile.TemporaryDirectory() as work_path:
+            summary_path = os.path.join(work_path, "Summary.xlsx")
+            metrics_store = MetricsStore(work_path)
+            metrics_store.open()
+            metrics_store.create(["1 Stack", "2 Stacks"], [["A", "B"], ["a", "b"]])
+            checkpointer = SummaryCheckpointer(metrics_store, summary_path, 2, 0)
+
+            for index in range(1, 4):
+                for sheet_name in metrics_store.get_sheetNames():
+                    metrics_store.append(sheet_name, [float(index), "No-%04d" % index])
+                metrics_store.commit()
+                checkpointer.finish_row()
+
+                if index == 2:
+                    checkpointer.writer.join()
+                    self.assertEqual(load_workbook(summary_path)["2 Stacks"].max_row, 4)
+
+            metrics_store.append("1 Stack", [4.0, "No-0004"])
+            checkpointer.close()
+            metrics_store.close()
+
+            wb_summary = load_workbook(summary_path)
+            self.assertEqual(wb_summary.sheetnames, ["1 Stack", "2 Stacks"])
+            self.assertEqual(list(wb_summary["1 Stack"].iter_rows(values_only=True))[-1], (3, "No-0003"))
+
+            metrics_store.open()
+            self.assertEqual(metrics_store.get_rowNumber("1 Stack"), 5)
+            metrics_store.truncate(3)
+            self.assertEqual(list(metrics_store.iter_rows("2 Stacks", min_row=2)), [["a", "b"], [1.0, "No-0001"]])
+            metrics_store.close()
+
+            # The database error of the export (here: no tables) is raised in the runner thread:
+            empty_store_path = os.path.join(work_path, "Empty")
+            os.makedirs(empty_store_path)
+            checkpointer = SummaryCheckpointer(MetricsStore(empty_store_path), summary_path, 1, 0)
+            checkpointer.finish_row()
+            checkpointer.writer.join()
+            self.assertRaises(sqlite3.Error, checkpointer.finish_row)
+
+    def test_parameter_sets(self):
+        """ Convert Sets.xlsx into the sidecar files of the parameter values, use them while Sets.xlsx is unchanged """
+        motor = self.model.fluxModel.motor
+        motor.add_parameter(Parameter("GP", "A", "a", Range(1.0, 3.0, 1.0)))
+        motor.add_parameter(Parameter("GP", "B", "b", Range(0.5, 1.0, 0.5)))
+
+        with tempfile.TemporaryDirectory() as work_path:
+            motor.create_parameter_table_excel(motor.create_final_parameter_set(), work_path)
+
+            sets_table = ParameterSets(motor.get_parameterSetExcelPath())
+            sets_table.read()
+            self.assertEqual(sets_table.get_parameterNames(), ["A", "B"])
+            self.assertEqual(sets_table.get_setNumber(), 6)
+            self.assertEqual(sets_table.get_parameterValues(6), [3.0, 1.0])
+            sidecar_files = os.listdir(os.path.join(work_path, "Results", "Parsed"))
+            self.assertEqual(len(sidecar_files), 2)
+
+            cached_table = ParameterSets(motor.get_parameterSetExcelPath())
+            cached_table.read()
+            self.assertEqual(cached_table.get_ids(), sets_table.get_ids())
+            self.assertEqual(cached_table.get_id(1), sets_table.get_id(1))
+            self.assertEqual(os.listdir(os.path.join(work_path, "Results", "Parsed")), sidecar_files)
+            sets_table.close()
+            cached_table.close()
+
+    def test_parameter_table_designs(self):
+        """ Generate the requested number of rows on the grid of the parameter ranges """
+        motor = self.model.fluxModel.motor
+        for name in ["A", "B", "C", "D"]:
+            motor.add_parameter(Parameter("GP", name, name, Range(1.0, 10.0, 1.0)))
+
+        for design in DESIGN_TYPES:
+            parameter_table = motor.create_design_parameter_set(design, 50, seed=1)
+
+            if design == DESIGN_CARTESIAN:
+                self.assertEqual(len(parameter_table), 10 ** 4)
+            else:
+                self.assertLessEqual(len(parameter_table), 50)
+                self.assertEqual(len(set(map(tuple, parameter_table))), len(parameter_table))
+            for row in parameter_table:
+                self.assertTrue(all(value in range(1, 11) for value in row))
+            self.assertEqual(motor.count_parameter_sets(design, 50), len(parameter_table))
+
+        # The fractional factorial design has a power of 2 rows (more than requested):
+        for name in ["E", "F", "G", "H"]:
+            motor.add_parameter(Parameter("GP", name, name, Range(1.0, 10.0, 1.0)))
+        self.assertEqual(len(motor.create_design_parameter_set(DESIGN_FRACTIONAL_FACTORIAL, 50)), 64)
+        self.assertEqual(motor.count_parameter_sets(DESIGN_FRACTIONAL_FACTORIAL, 50), 64)
+
+    def test_parameter_table_rank(self):
+        """ Decode the rows of the lazy grid from their index and encode the index from the values """
+        parameter_table = ParameterTable([[1.0, 2.0], [1.0], [1.0, 2.0, 3.0]], lambda rows: rows[:, 2] < 3.0)
+        parameter_table.append([5.0, 1.0, 1.0])
+
+        self.assertEqual(len(parameter_table), 5)
+        self.assertEqual(parameter_table[3], [2.0, 1.0, 2.0])
+        self.assertEqual(parameter_table[-1], [5.0, 1.0, 1.0])
+        self.assertEqual(parameter_table.index([1.0, 1.0, 2.0]), 2)
+        self.assertEqual(parameter_table.index([5.0, 1.0, 1.0]), 4)
+        self.assertNotIn([1.0, 1.0, 3.0], parameter_table)
+        self.assertEqual([chunk.shape for chunk in parameter_table.iter_chunks(3)], [(3, 3), (1, 3), (1, 3)])
+        self.assertEqual(list(parameter_table), [parameter_table[i] for i in range(5)])
+
+    def test_parameter_table_constraints(self):
+        """ Drop the combinations violating the constraints before the parameter table is written """
+        motor = self.model.fluxModel.motor
+        motor.add_parameter(Parameter("GP", "MAG_W", "", Range(1.0, 10.0, 1.0)))
+        motor.add_parameter(Parameter("GP", "POLE_PITCH", "", Range(1.0, 10.0, 1.0)))
+        motor.set_constraints(["MAG_W < 0.9 * POLE_PITCH", "abs(MAG_W - POLE_PITCH) <= 5"])
+
+        parameter_table = motor.create_final_parameter_set()
+        self.assertEqual(len(parameter_table), motor.count_parameter_sets())
+        self.assertEqual(len(parameter_table), 34)
+        self.assertEqual(motor.estimate_parameter_sets(), (34, False))
+        for magnet_width, pole_pitch in parameter_table:
+            self.assertTrue(magnet_width < 0.9 * pole_pitch and pole_pitch - magnet_width <= 5)
+
+        # The row number on the GUI is counted after the last change:
+        self.view.parameterSetCreatorWidget.create_constraintsLineEdit.setText("; ".join(motor.get_constraints()))
+        self.presenter._update_row_number()
+        QTest.qWait(ROW_COUNT_UPDATE_DELAY + 200)
+        self.assertEqual(self.view.parameterSetCreatorWidget.create_rowNumberLabel.text(), "Number of rows: 34")
+
+        for design in DESIGN_TYPES:
+            for magnet_width, pole_pitch in motor.create_design_parameter_set(design, 20, seed=1):
+                self.assertLess(magnet_width, 0.9 * pole_pitch)
+
+        # Large grid (beyond the int64 range): the valid rows are estimated from a sample
+        for index in range(18):
+            motor.add_parameter(Parameter("GP", "P%i" % index, "", Range(1.0, 10.0, 1.0)))
+        row_number, estimated = motor.estimate_parameter_sets()
+        self.assertTrue(estimated)
+        self.assertAlmostEqual(row_number / 10 ** 20, 0.34, delta=0.01)
+
+        self.assertIsNone(check_constraint("1 < MAG_W < POLE_PITCH and POLES > 2", ["MAG_W", "POLE_PITCH", "POLES"]))
+        self.assertIsNotNone(check_constraint("MAG_W < ROTOR_D", ["MAG_W"]))
+        self.assertIsNotNone(check_constraint("__import__('os').getcwd() == 0", ["MAG_W"]))
+        self.assertIsNotNone(check_constraint("MAG_W * 2", ["MAG_W"]))
+
+    def test_grid_refinement(self):
+        """ Refine the grid where the metric jumps, or around its minimum """
+        grid = [[0.0, 1.0, 2.0, 3.0], [0.0, 1.0]]
+        rows = {(a, b) for a in grid[0] for b in grid[1]}
+        results = {(a, b): (10.0 if a >= 2 else 0.0) + abs(a - 1) + b for a, b in rows}
+
+        self.assertEqual(select_refined_rows(results, grid, rows, 2, REFINE_GRADIENT), [[1.5, 0.0], [1.5, 1.0]])
+        self.assertEqual(select_refined_rows(results, grid, rows, 3, REFINE_MINIMUM),
+                         [[0.5, 0.0], [1.0, 0.5], [1.5, 0.0]])
+
+    def test_surrogate_model(self):
+        """ Skip only the rows predicted confidently outside the region of interest """
+        surrogate = SurrogateModel({"cogging_p2p": [None, 10.0]}, confidence=3.0, min_rows=5)
+        self.assertFalse(surrogate.is_outside([1.0, 1.0]))
+
+        for x in range(5):
+            for y in range(5):
+                surrogate.add([x, y], [x ** 2 + y ** 2])
+
+        self.assertFalse(surrogate.is_outside([1.5, 1.5]))
+        self.assertTrue(surrogate.is_outside([3.5, 3.5]))
+
+        mean, std = surrogate.predict([2.0, 3.0])
+        self.assertAlmostEqual(mean[0], 13.0, places=1)
+        self.assertLess(std[0], 0.5)
+
+        surrogate.add([2.5, 2.5], [12.5])                   # the Cholesky factor is extended, not fitted again
+        extended_mean = surrogate.predict([2.5, 2.5])[0][0]
+        self.assertAlmostEqual(extended_mean, 12.5, places=0)
+
+        surrogate.cholesky = None
+        self.assertAlmostEqual(surrogate.predict([2.5, 2.5])[0][0], extended_mean, places=6)
+
+        # Past the limit of the training rows, the older half is dropped; the factor grows in its buffer:
+        surrogate = SurrogateModel({"cogging_p2p": [None, 10.0]}, min_rows=5, max_rows=20)
+        for index in range(45):
+            x, y = index % 5, index // 5 % 5
+            surrogate.add([x, y], [x ** 2 + y ** 2])
+            if surrogate.predict([2.0, 3.0]) is None:
+                continue
+            self.assertLessEqual(surrogate.get_trainingNumber(), 20)
+            self.assertEqual(surrogate.cholesky.shape, (surrogate.get_trainingNumber(),) * 2)
+            self.assertLessEqual(len(surrogate.choleskyBuffer), 20)
+
+        self.assertEqual(surrogate.get_trainingNumber(), 15)
+        self.assertEqual(surrogate.points[-1], [4.0, 3.0])
+        mean = surrogate.predict([2.0, 3.0])[0][0]
+        surrogate.cholesky = None
+        self.assertAlmostEqual(surrogate.predict([2.0, 3.0])[0][0], mean, places=6)
+
+    def test_optimizer(self):
+        """ Find the constrained optimum of a metric with tens of simulations instead of the full grid """
+        parameters = [Parameter("GP", name, name, Range(1.0, 20.0, 1.0)) for name in ["A", "B"]]
+        optimizer = BayesianOptimizer(parameters, "ripple_p2p", {"t_mean": [9.0, None]}, seed=1)
+        optimizer.surrogateModel = SurrogateModel(optimizer.bounds, min_rows=5)
+
+        rows = []
+        while len(rows) < 30:
+            for a, b in optimizer.ask(2, rows):
+                rows.append([a, b])
+                metrics = {"ripple_p2p": (a - 12) ** 2 + (b - 5) ** 2, "t_mean": (a + b) / 2}
+                optimizer.get_surrogateModel().add([a, b], [metrics[m] for m in optimizer.get_surrogateModel().metrics])
+
+        self.assertEqual(len(set(map(tuple, rows))), len(rows))
+        self.assertEqual(optimizer.best(), ([12.0, 6.0], 1.0))      # (12, 5): T_mean = 8.5 < 9
+
+    def test_project_info_file(self):
+        """ Load the scenario settings of a project without the GUI (continue & batch mode) """
+        with tempfile.TemporaryDirectory() as model_path:
+            self.model.fluxModel.set_modelPath(model_path)
+            self.model.fluxModel.set_modelName("Motor.FLU")
+            self.model.fluxModel.motor.set_numberSlot(12)
+            self.model.fluxModel.motor.set_numberPole(8)
+            self.model.set_scenarioRipple(False)
+            self.model.fluxModel.positionCogging.set_min(0.0)
+            self.model.fluxModel.positionCogging.set_max(30.0)
+            self.model.fluxModel.positionCogging.set_step(1.0)
+            self.model.create_info_files()
+
+            loaded_model = Model()
+            loaded_model.fluxModel.set_modelPath(model_path)
+            loaded_model.fluxModel.set_modelName("Motor.FLU")
+            loaded_model.read_project_info_file()
+
+        self.assertEqual(loaded_model.get_scenarioID(), "1")
+        self.assertEqual(loaded_model.fluxModel.motor.get_numberSlot(), 12)
+        self.assertEqual(loaded_model.get_channelData(), self.model.get_channelData())
+
+    def test_worker_pool(self):
+        """ N workers give the same Summary.xlsx as the sequential execution; after a stop in the middle of the pool,
+        the session is continued without simulating a row again """
+        with tempfile.TemporaryDirectory() as work_path:
+            model_file = _create_project(work_path)
+            self.assertEqual(_run_batch(model_file), 0)
+            summary_rows = _summary_rows(model_file)
+
+        with tempfile.TemporaryDirectory() as work_path:
+            model_file = _create_project(work_path)
+            self.assertEqual(_run_batch(model_file, "--workers", "3"), 0)
+            self.assertEqual(_summary_rows(model_file), summary_rows)
+            self.assertEqual(sorted(_simulated_ids(model_file)), ["No-0001", "No-0002", "No-0003", "No-0004"])
+
+        with tempfile.TemporaryDirectory() as work_path:
+            model_file = _create_project(work_path)
+            records_file = os.path.join(work_path, "Results", "Simulation_Records.csv")
+
+            def stop_after_first_simulation():                      # CTRL+C of the batch mode
+                deadline = time.time() + 30
+                while not os.path.exists(records_file) and time.time() < deadline:
+                    time.sleep(0.02)
+                os.kill(os.getpid(), signal.SIGINT)
+
+            stop_thread = threading.Thread(target=stop_after_first_simulation)
+            with unittest.mock.patch.dict(os.environ, {STANDIN_LATENCY_VARIABLE: "0.2"}):
+                stop_thread.start()
+                self.assertEqual(_run_batch(model_file, "--workers", "2"), 1)
+                stop_thread.join()
+            self.assertLess(len(_simulated_ids(model_file)), 4)
+
+            self.assertEqual(_run_batch(model_file, "--session", "continue", "--workers", "2"), 0)
+            self.assertEqual(_summary_rows(model_file), summary_rows)
+            self.assertEqual(sorted(_simulated_ids(model_file)), ["No-0001", "No-0002", "No-0003", "No-0004"])
+
+    def test_pipelined_execution(self):
+        """ The queued row is simulated while the results of the previous one are processed; the rows are still
+        simulated and summarized in the order of Sets.xlsx """
+        with tempfile.TemporaryDirectory() as work_path:
+            model_file = _create_project(work_path)
+            self.assertEqual(_run_batch(model_file), 0)
+            summary_rows = _summary_rows(model_file)
+
+        with tempfile.TemporaryDirectory() as work_path:
+            model_file = _create_project(work_path)
+            with unittest.mock.patch.dict(os.environ, {STANDIN_LATENCY_VARIABLE: "0.1"}):
+                self.assertEqual(_run_batch(model_file, "--pipelined"), 0)
+            self.assertEqual(_summary_rows(model_file), summary_rows)
+            self.assertEqual(_simulated_ids(model_file), ["No-0001", "No-0002", "No-0003", "No-0004"])
+
+    def test_distributed_merge(self):
+        """ Multi-node mode on a single node: the node simulates every row, then merges them into Summary.xlsx; a
+        node continuing the finished session only merges the results again """
+        with tempfile.TemporaryDirectory() as work_path:
+            model_file = _create_project(work_path)
+            self.assertEqual(_run_batch(model_file), 0)
+            summary_rows = _summary_rows(model_file)
+
+        with tempfile.TemporaryDirectory() as work_path:
+            model_file = _create_project(work_path)
+            self.assertEqual(_run_batch(model_file, "--distributed", "--node", "A"), 0)
+            self.assertEqual(_summary_rows(model_file), summary_rows)
+
+            records_file = os.path.join(work_path, "Results", "Simulation_Records.csv")
+            with open(records_file, 'r') as file:
+                record_number = len(file.readlines())
+
+            os.remove(os.path.join(work_path, "Results", "Summary.xlsx"))
+            self.assertEqual(_run_batch(model_file, "--session", "continue", "--distributed", "--node", "B"), 0)
+            self.assertEqual(_summary_rows(model_file), summary_rows)
+            with open(records_file, 'r') as file:
+                self.assertEqual(len(file.readlines()), record_number)     # no simulation of node B
+
+            # The files of the waveform store can't be shared by the nodes:
+            self.assertRaises(SystemExit, _run_batch, model_file, "--distributed", "--waveform-store")
+
+    def test_row_leases(self):
+        """ Claim the rows of Sets.xlsx from several nodes; an expired lease goes back to the pool """
+        with tempfile.TemporaryDirectory() as results_path:
+            node1 = RowLeases(results_path, "Node1", duration=0.2)
+            node2 = RowLeases(results_path, "Node2", duration=0.2)
+
+            self.assertTrue(node1.claim("No-0001"))
+            self.assertFalse(node2.claim("No-0001"))
+            self.assertTrue(node2.claim("No-0002"))
+
+            node2.release("No-0002")
+            self.assertTrue(node1.claim("No-0002"))
+            self.assertEqual(node2.get_leasedIds(), {"No-0001", "No-0002"})
+
+            time.sleep(0.3)                                     # Node1 didn't renew its leases
+            self.assertTrue(node2.claim("No-0001"))
+            self.assertFalse(node1.claim("No-0001"))
+
+            # The stalled node finds its lease lost: neither the renewal nor the release touches the new lease
+            lease_file = node2._lease_file("No-0001")
+            node1.renew()
+            self.assertFalse(node1.is_held("No-0001"))
+            self.assertTrue(node1.is_held("No-0002"))
+            node1.release("No-0001")
+            with open(lease_file, 'r') as file:
+                self.assertIn("Node2", file.read())
+            self.assertFalse(node1.claim("No-0001"))
+
+    def test_run_journal(self):
+        """ Continue from the last summarized row of the run journal, even after an interrupted writing """
+        with tempfile.TemporaryDirectory() as results_path:
+            journal = RunJournal(results_path)
+            self.assertIsNone(journal.get_resumeIndex())
+
+            for index in range(1, 1001):
+                parameter_values_id = "No-%04d" % index
+                for state in RunJournal.STATES:
+                    journal.record(parameter_values_id, index, state)
+            journal.record("No-1001", 1001, RunJournal.SIMULATED)
+
+            with open(journal.get_path(), 'a') as journal_file:
+                journal_file.write('{"id": "No-1002", "ind')
+
+            self.assertEqual(journal.get_resumeIndex(), 1001)
+
+            journal = RunJournal(results_path)
+            journal.record("No-1001", 1001, RunJournal.SUMMARIZED)
+
+            self.assertEqual(journal.get_resumeIndex(), 1002)
+            self.assertTrue(journal.is_simulated("No-1001"))
+            self.assertFalse(journal.is_simulated("No-1002"))
+
+            journal.record("No-1003", 1003, RunJournal.CLAIMED)
+            self.assertTrue(journal.is_interrupted("No-1003"))
+            self.assertFalse(journal.is_interrupted("No-1001"))
+
+    def test_failed_simulation(self):
+        """ A crashed Flux run isn't recorded as simulated: its partial raw result files are simulated again after
+        continuing the session """
+        with tempfile.TemporaryDirectory() as work_path:
+            model_file = _create_project(work_path)
+            self.assertEqual(_run_batch(model_file), 0)
+            summary_rows = _summary_rows(model_file)
+
+        with tempfile.TemporaryDirectory() as work_path:
+            model_file = _create_project(work_path)
+            cache_path = os.path.join(work_path, "Cache")
+            with unittest.mock.patch.dict(os.environ, {STANDIN_FAILING_ROWS_VARIABLE: "No-0002"}):
+                self.assertEqual(_run_batch(model_file, "--cache", cache_path), 1)
+
+            results_path = os.path.join(work_path, "Results")
+            self.assertTrue(os.path.exists(os.path.join(results_path, "Motor_No-0002_Cogging_BEMF.xls")))
+            self.assertTrue(RunJournal(results_path).is_interrupted("No-0002"))
+            self.assertEqual(len(glob.glob(os.path.join(cache_path, "*", "*"))), 1)          # only the first row
+
+            self.assertEqual(_run_batch(model_file, "--session", "continue", "--cache", cache_path), 0)
+            self.assertEqual(_summary_rows(model_file), summary_rows)
+            self.assertFalse(RunJournal(results_path).is_interrupted("No-0002"))
+            self.assertEqual(len(glob.glob(os.path.join(cache_path, "*", "*"))), 4)
+
+    def test_simulation_cache(self):
+        """ Reuse the raw result files of an identical simulation in another project """
+        with tempfile.TemporaryDirectory() as directory:
+            for project in ["Project1", "Project2"]:
+                os.makedirs(os.path.join(directory, project, "Results"))
+                with open(os.path.join(directory, project, "Motor.FLU"), 'w') as model_file:
+                    model_file.write("model")
+
+            channel_data = "{path}\nMotor\n{id}\n1\nNone\n0.0 30.0 1.0\n0.0 0.0 0.0\nI 0.0 0.0 0.0\nG 0.0 0.0 0.0\n" \
+                           "GP\nA\n{values}\n{delete}\nS\nTooth\nRotor\nMagnet\nNone\n"
+            cache_path = os.path.join(directory, "Cache")
+
+            cache1 = SimulationCache(cache_path, os.path.join(directory, "Project1"), "Motor.FLU")
+            with open(os.path.join(directory, "Project1", "Results", "Motor_No-0001_Cogging_BEMF.xls"), 'w') as file:
+                file.write("raw data")
+            cache1.store(channel_data.format(path="Project1", id="No-0001", values="1.00", delete=False), "No-0001")
+
+            # The deletion of the scenario solutions doesn't change the raw result files:
+            cache2 = SimulationCache(cache_path, os.path.join(directory, "Project2"), "Motor.FLU")
+            self.assertFalse(cache2.fetch(channel_data.format(path="Project2", id="No-0005", values="2.00",
+                                                              delete=False), "No-0005"))
+            self.assertTrue(cache2.fetch(channel_data.format(path="Project2", id="No-0007", values="1.00",
+                                                             delete=True), "No-0007"))
+
+            with open(os.path.join(directory, "Project2", "Results", "Motor_No-0007_Cogging_BEMF.xls"), 'r') as file:
+                self.assertEqual(file.read(), "raw data")
+
+
+def _create_project(work_path):
+    """ Project folder with a (dummy) Flux model and a Sets.xlsx of 4 rows; return the path of the model """
+
+    motor = Model().fluxModel.motor
+    motor.add_parameter(Parameter("GP", "A", "a", Range(1.0, 2.0, 1.0)))
+    motor.add_parameter(Parameter("GP", "B", "b", Range(0.5, 1.0, 0.5)))
+    motor.create_parameter_table_excel(motor.create_final_parameter_set(), work_path)
+
+    model_file = os.path.join(work_path, "Motor.FLU")
+    with open(model_file, 'w') as file:
+        file.write("model")
+
+    return model_file
+
+
+def _run_batch(model_file, *arguments):
+    """ Run the batch mode on the project with the Flux stand-in (without the start delay); return the exit code """
+
+    scenario = ["--slots", "12", "--poles", "8", "--cogging", "0", "30", "1", "--ripple", "0", "30", "1",
+                "--current", "0", "10", "10", "--gamma", "0", "0", "0", "--gamma-name", "G", "--current-name", "I",
+                "--current-source-name", "S", "--flux-exe", "flux_standin.py"]
+    sets_file = os.path.join(os.path.dirname(model_file), "Results", "Sets.xlsx")
+
+    try:
+        with unittest.mock.patch("fluxminator.Runner.FLUX_START_DELAY", 0):
+            return batch.main([model_file, "--sets", sets_file] + scenario + list(arguments))
+    finally:
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        if os.path.exists(CHANNEL_FILE_NAME):                       # sequential mode: in the working directory
+            os.remove(CHANNEL_FILE_NAME)
+
+
+def _simulated_ids(model_file):
+    """ Row IDs of the Flux simulations of the project, in the order of the simulation records """
+
+    with open(os.path.join(os.path.dirname(model_file), "Results", "Simulation_Records.csv"), 'r') as file:
+        return [line.split(",")[0] for line in file.readlines()[1:]]
+
+
+def _summary_rows(model_file):
+    """ Rows of every sheet of Summary.xlsx in the Results folder of the project """
+
+    wb_summary = load_workbook(os.path.join(os.path.dirname(model_file), "Results", "Summary.xlsx"), read_only=True)
+    summary_rows = {name: list(wb_summary[name].iter_rows(values_only=True)) for name in wb_summary.sheetnames}
+    wb_summary.close()
+
+    return summary_rows
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -32,6 +32,7 @@ class ParameterSetCreatorLayout:
 
         widget.vBox = QVBoxLayout()
         widget.vBox.addWidget(widget.splitter)
+        widget.vBox.addWidget(widget.create_progressBar)
 
         widget.setLayout(widget.vBox)
 
@@ -147,6 +148,15 @@ class ParameterSetCreatorLayout:
 
         widget.create_title.setFont(QFont("Ubuntu Mono", 9, QFont.Black))
 
+        widget.create_designHBox = QHBoxLayout()
+        widget.create_designHBox.addWidget(widget.create_designLabel)
+        widget.create_designHBox.addWidget(widget.create_designCombo)
+        widget.create_designHBox.addWidget(widget.create_designRowSpinbox)
+
+        widget.create_constraintsHBox = QHBoxLayout()
+        widget.create_constraintsHBox.addWidget(widget.create_constraintsLabel)
+        widget.create_constraintsHBox.addWidget(widget.create_constraintsLineEdit)
+
         widget.create_runtimeHBox = QHBoxLayout()
         widget.create_runtimeHBox.addWidget(widget.create_runtimeLabel)
         widget.create_runtimeHBox.addWidget(widget.create_runtimeSpinbox)
@@ -164,6 +174,8 @@ class ParameterSetCreatorLayout:
         widget.create_vBox = QVBoxLayout(widget.create_frame)
         widget.create_vBox.setAlignment(Qt.AlignTop)
         widget.create_vBox.addWidget(widget.create_title)
+        widget.create_vBox.addLayout(widget.create_designHBox)
+        widget.create_vBox.addLayout(widget.create_constraintsHBox)
         widget.create_vBox.addWidget(widget.create_rowNumberLabel)
         widget.create_vBox.addLayout(widget.create_runtimeHBox)
         widget.create_vBox.addWidget(widget.create_sumRuntimeLabel)
@@ -243,6 +255,27 @@ class FluxminatorLayout:
         flux_widget.nameEditorHBox.addLayout(flux_widget.nameVBox)
         flux_widget.nameEditorHBox.addLayout(flux_widget.editorVBox)
 
+        flux_widget.workerNumberSpinBox.setFixedWidth(75)
+        flux_widget.workerNumberSpinBox.setAlignment(Qt.AlignRight)
+
+        flux_widget.workerNumberHBox = QHBoxLayout()
+        flux_widget.workerNumberHBox.addWidget(flux_widget.workerNumberLabel)
+        flux_widget.workerNumberHBox.addWidget(flux_widget.workerNumberSpinBox)
+
+        flux_widget.parserProcessSpinBox.setFixedWidth(75)
+        flux_widget.parserProcessSpinBox.setAlignment(Qt.AlignRight)
+
+        flux_widget.parserProcessHBox = QHBoxLayout()
+        flux_widget.parserProcessHBox.addWidget(flux_widget.parserProcessLabel)
+        flux_widget.parserProcessHBox.addWidget(flux_widget.parserProcessSpinBox)
+
+        flux_widget.timeoutSpinBox.setFixedWidth(75)
+        flux_widget.timeoutSpinBox.setAlignment(Qt.AlignRight)
+
+        flux_widget.timeoutHBox = QHBoxLayout()
+        flux_widget.timeoutHBox.addWidget(flux_widget.timeoutLabel)
+        flux_widget.timeoutHBox.addWidget(flux_widget.timeoutSpinBox)
+
         flux_widget.extraSettingsFrame = QFrame()
         flux_widget.extraSettingsFrame.setFrameStyle(QFrame.StyledPanel)
 
@@ -251,10 +284,16 @@ class FluxminatorLayout:
         flux_widget.extraSettingsVBox.addWidget(flux_widget.settingsTitle)
         flux_widget.extraSettingsVBox.addSpacing(20)
         flux_widget.extraSettingsVBox.addWidget(flux_widget.deleteCheckBox)
+        flux_widget.extraSettingsVBox.addWidget(flux_widget.pipelineCheckBox)
+        flux_widget.extraSettingsVBox.addWidget(flux_widget.cacheCheckBox)
+        flux_widget.extraSettingsVBox.addWidget(flux_widget.waveformStoreCheckBox)
         flux_widget.extraSettingsVBox.addWidget(flux_widget.batchModeCheckBox)
         flux_widget.extraSettingsVBox.addWidget(flux_widget.priceCalcCheckBox)
         flux_widget.extraSettingsVBox.addSpacing(20)
         flux_widget.extraSettingsVBox.addLayout(flux_widget.nameEditorHBox)
+        flux_widget.extraSettingsVBox.addLayout(flux_widget.workerNumberHBox)
+        flux_widget.extraSettingsVBox.addLayout(flux_widget.parserProcessHBox)
+        flux_widget.extraSettingsVBox.addLayout(flux_widget.timeoutHBox)
 
         flux_widget.settingsSplitter = QSplitter(Qt.Vertical)
         flux_widget.settingsSplitter.addWidget(flux_widget.settingsFrame)